@@ -0,0 +1,180 @@
+""" Asynchronous application logging.
+    Loggers only put records on a queue (logging.handlers.QueueHandler); one listener thread
+    formats them and does the disk and console I/O, so a log call never waits on the disk,
+    not even on the Tk thread. The log file is rotated by size and the rotated segments are
+    gzipped on the listener thread. Optional JSON lines go to a second file for machine parsing.
+    Forked children (batch pool) do not touch the files: they forward their records over a pipe
+    to the listener of the parent, so there is still one writer and one rotator per log file.
+"""
+import os
+import sys
+import gzip
+import json
+import queue
+import atexit
+import shutil
+import logging
+import threading
+import multiprocessing
+import logging.handlers
+
+from pathlib import Path
+from typing import Optional
+
+LOG_FORMAT = "%(asctime)s - %(levelname)s - %(message)s"
+DEFAULT_MAX_BYTES = 10 * 1024 * 1024  # rotate app.log at 10 MB
+DEFAULT_BACKUPS = 5  # gzipped segments kept
+
+
+class JsonFormatter(logging.Formatter):
+    """One JSON object per line: time, level, logger, thread and message (with the traceback)."""
+
+    def format(self, record: logging.LogRecord) -> str:
+        entry = {
+            "time": self.formatTime(record),
+            "created": record.created,
+            "level": record.levelname,
+            "logger": record.name,
+            "thread": record.threadName,
+            "message": record.getMessage(),
+        }
+        if record.exc_info:
+            entry["exception"] = self.formatException(record.exc_info)
+        return json.dumps(entry, ensure_ascii=False)
+
+
+class GzipRotatingFileHandler(logging.handlers.RotatingFileHandler):
+    """RotatingFileHandler whose rotated segments are app.log.1.gz, app.log.2.gz, ..."""
+
+    def __init__(self, filename, max_bytes: int = DEFAULT_MAX_BYTES, backups: int = DEFAULT_BACKUPS):
+        super().__init__(filename, maxBytes=max_bytes, backupCount=backups, encoding="utf-8", delay=True)
+        self.namer = lambda name: name + ".gz"
+        self.rotator = self._compress
+
+    @staticmethod
+    def _compress(source: str, dest: str) -> None:
+        tmp = dest + ".tmp"
+        with open(source, "rb") as f_in, gzip.open(tmp, "wb") as f_out:
+            shutil.copyfileobj(f_in, f_out)
+        os.replace(tmp, dest)
+        os.remove(source)
+
+
+class _QueueHandler(logging.handlers.QueueHandler):
+    """QueueHandler that also accepts a multiprocessing SimpleQueue (which has no put_nowait)."""
+
+    def enqueue(self, record: logging.LogRecord) -> None:
+        self.queue.put(record)
+
+
+class AsyncLogging:
+    """Queue based logging set up on the root logger.
+    Args:
+            log_path: the text log, rotated by size
+            json_path: optional JSON lines log, rotated the same way
+            console: also write to stderr
+    """
+
+    def __init__(self, log_path, json_path=None, level: int = logging.INFO, console: bool = True,
+                 max_bytes: int = DEFAULT_MAX_BYTES, backups: int = DEFAULT_BACKUPS):
+        self.handlers = []
+        Path(log_path).parent.mkdir(parents=True, exist_ok=True)
+        text = GzipRotatingFileHandler(str(log_path), max_bytes, backups)
+        text.setFormatter(logging.Formatter(LOG_FORMAT))
+        self.handlers.append(text)
+        if json_path:
+            lines = GzipRotatingFileHandler(str(json_path), max_bytes, backups)
+            lines.setFormatter(JsonFormatter())
+            self.handlers.append(lines)
+        if console:
+            stream = logging.StreamHandler()
+            stream.setFormatter(logging.Formatter(LOG_FORMAT))
+            self.handlers.append(stream)
+        self.queue_handler = None
+        self.listener = None
+        self._records = None
+        self._forwarded = None  # pipe from forked children, created on the first fork
+        self._forwarder = None
+        self._start()
+        root = logging.getLogger()
+        root.setLevel(level)
+        root.addHandler(self.queue_handler)
+        atexit.register(self.stop)  # flush what is still queued
+        if hasattr(os, "register_at_fork"):
+            os.register_at_fork(before=self._before_fork, after_in_parent=self._after_fork_parent,
+                                after_in_child=self._after_fork_child)
+
+    def _start(self) -> None:
+        """Start the listener thread on a fresh queue."""
+        self._records = queue.SimpleQueue()
+        self.queue_handler = _QueueHandler(self._records)
+        self.listener = logging.handlers.QueueListener(self._records, *self.handlers, respect_handler_level=True)
+        self.listener.start()
+
+    def _before_fork(self) -> None:
+        if self.listener is not None and self._forwarded is None:
+            self._forwarded = multiprocessing.get_context("fork").SimpleQueue()
+        for handler in self.handlers:
+            handler.acquire()
+            handler.flush()
+
+    def _after_fork_parent(self) -> None:
+        for handler in self.handlers:
+            handler.release()
+        if self._forwarder is None and self._forwarded is not None:
+            self._forwarder = threading.Thread(target=self._forward, name="log-forwarder", daemon=True)
+            self._forwarder.start()
+
+    def _after_fork_child(self) -> None:
+        # the child has no listener thread: its records go to the parent's listener instead
+        # (logging itself reinitialises the handler locks in the child)
+        if self._forwarded is not None:
+            self.queue_handler.queue = self._forwarded
+        self.listener = None
+        self._forwarder = None
+
+    def _forward(self) -> None:
+        """Move the records of forked children onto the listener queue (parent only)."""
+        while True:
+            record = self._forwarded.get()
+            if record is None:
+                return
+            self._records.put(record)
+
+    def stop(self) -> None:
+        """Write out the queued records and stop the listener thread (no-op in a forked child)."""
+        if self.listener is None:
+            return
+        if self._forwarder is not None:
+            self._forwarded.put(None)
+            self._forwarder.join(timeout=2)
+            self._forwarder = None
+        if self.listener._thread is not None:
+            self.listener.stop()
+        for handler in self.handlers:
+            handler.flush()
+
+
+_logging: Optional[AsyncLogging] = None
+
+
+def setup_logging(log_path, json_lines: Optional[bool] = None, level: int = logging.INFO) -> AsyncLogging:
+    """Set up asynchronous logging once per process.
+    json_lines defaults to the FIGMA_LOG_JSON environment variable, the file is log_path with
+    a .jsonl suffix. FIGMA_LOG_MAX_MB and FIGMA_LOG_BACKUPS change the rotation.
+    """
+    global _logging
+    if _logging is None:
+        if json_lines is None:
+            json_lines = os.environ.get("FIGMA_LOG_JSON", "").lower() in ("1", "true", "yes")
+        max_mb = float(os.environ.get("FIGMA_LOG_MAX_MB") or DEFAULT_MAX_BYTES / 1024 ** 2)
+        backups = int(os.environ.get("FIGMA_LOG_BACKUPS") or DEFAULT_BACKUPS)
+        _logging = AsyncLogging(
+            log_path,
+            Path(log_path).with_suffix(".jsonl") if json_lines else None,
+            level,
+            console=sys.stderr is not None,  # pythonw and frozen GUI builds have no stderr
+            max_bytes=int(max_mb * 1024 ** 2),
+            backups=backups,
+        )
+    return _logging
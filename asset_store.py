@@ -0,0 +1,324 @@
+""" Shared content addressed asset store.
+    A node drawn by nothing but an image fill is made from the raw image, stored once under its
+    `imageRef` (GET /v1/files/<id>/images) and sized with Pillow, so every node and every file
+    using that image shares one download. Other rendered assets are stored under a render key
+    built from the file and node id and the node content (image fills, sizes, child layout,
+    styles). Stored assets are copied into every new output directory by reflink, hardlink or
+    plain copy instead of being downloaded again.
+"""
+import os
+import json
+import shutil
+import hashlib
+import logging
+import tempfile
+import threading
+
+from pathlib import Path
+from stat import S_ISREG
+from typing import Dict, Optional, Tuple
+
+DEFAULT_QUOTA_BYTES = 1024 ** 3  # 1 GB
+FICLONE = 0x40049409  # linux ioctl for copy-on-write clones (btrfs, xfs)
+
+# keys that only place the node, they do not change what it looks like
+_PLACEMENT_KEYS = ("id", "absoluteBoundingBox", "absoluteRenderBounds", "transitionNodeID", "prototypeStartNodeID")
+# node types whose shape is not in the file JSON (only with ?geometry=paths), so their content says
+# nothing about what they render
+_FREEFORM_TYPES = ("VECTOR", "BOOLEAN_OPERATION")
+# image fill scale modes fit_image draws like Figma (TILE and CROP are rendered by Figma)
+_RAW_SCALE_MODES = ("FILL", "STRETCH")
+_NORMAL_BLEND = ("PASS_THROUGH", "NORMAL")
+
+
+def _render_content(node: Dict) -> Dict:
+    """What the rendering of node depends on: its own properties, its size and its children
+    with their offsets inside it.
+    """
+    content = {key: value for key, value in node.items() if key not in _PLACEMENT_KEYS and key != "children"}
+    box = node.get("absoluteBoundingBox") or {}
+    content["size"] = [box.get("width"), box.get("height")]
+    children = []
+    for child in node.get("children") or []:
+        child_box = child.get("absoluteBoundingBox") or {}
+        offset = [_offset(child_box, box, "x"), _offset(child_box, box, "y")]
+        children.append({"offset": offset, "node": _render_content(child)})
+    content["children"] = children
+    return content
+
+
+def _offset(child_box: Dict, box: Dict, axis: str) -> Optional[float]:
+    if child_box.get(axis) is None or box.get(axis) is None:
+        return None
+    return round(child_box[axis] - box[axis], 3)
+
+
+def _freeform(node: Dict) -> bool:
+    return node.get("type") in _FREEFORM_TYPES or any(_freeform(child) for child in node.get("children") or [])
+
+
+def image_refs(node: Dict) -> list:
+    """All imageRef hashes used by image fills of the node and its children."""
+    refs = [fill["imageRef"] for fill in node.get("fills") or [] if fill.get("imageRef")]
+    for child in node.get("children") or []:
+        refs += image_refs(child)
+    return refs
+
+
+def image_fill(node: Dict) -> Optional[Dict]:
+    """The image fill of a rectangle drawn by nothing else (no strokes, effects, corners, opacity or
+    transform), None for every other node. Its asset can be made from the raw image of the fill.
+    """
+    if node.get("type") != "RECTANGLE" or node.get("children"):
+        return None
+    fills = [fill for fill in node.get("fills") or [] if fill.get("visible", True)]
+    if len(fills) != 1:
+        return None
+    fill = fills[0]
+    if (fill.get("type") != "IMAGE" or not fill.get("imageRef")
+            or fill.get("scaleMode", "FILL") not in _RAW_SCALE_MODES
+            or fill.get("imageTransform") or fill.get("filters") or fill.get("opacity", 1) != 1
+            or fill.get("blendMode", "NORMAL") not in _NORMAL_BLEND):
+        return None
+    if any(item.get("visible", True) for item in (node.get("strokes") or []) + (node.get("effects") or [])):
+        return None
+    if (node.get("cornerRadius") or any(node.get("rectangleCornerRadii") or []) or node.get("rotation")
+            or node.get("opacity", 1) != 1 or node.get("isMask")
+            or node.get("blendMode", "PASS_THROUGH") not in _NORMAL_BLEND):
+        return None
+    return fill
+
+
+def can_fit_images() -> bool:
+    """True when Pillow is installed, fit_image needs it."""
+    try:
+        import PIL  # noqa: F401
+    except ImportError:
+        return False
+    return True
+
+
+def fit_image(source: Path, target: Path, size: Tuple[int, int], scale_mode: str = "FILL") -> None:
+    """Write the raw image source to target as a size (pixels) PNG, drawn like a Figma image fill:
+    FILL covers the box and is cropped around the centre, STRETCH is scaled to the box.
+    """
+    from PIL import Image, ImageOps
+
+    with Image.open(source) as image:
+        image = image.convert("RGBA")
+        if scale_mode == "STRETCH":
+            image = image.resize(size, Image.Resampling.LANCZOS)
+        else:
+            image = ImageOps.fit(image, size, Image.Resampling.LANCZOS, centering=(0.5, 0.5))
+        target.parent.mkdir(parents=True, exist_ok=True)
+        target.unlink(missing_ok=True)  # never write through a hardlink into the store
+        image.save(target, "PNG")
+
+
+def render_key(node: Dict, file_id: str, fmt: str = "png", scale: float = 1) -> Optional[str]:
+    """Key of the rendered asset of a node of file_id, or None when it cannot be shared.
+    The key only matches the same node rendered with the same image fills, styles, size and child
+    layout. Vector paths are not in the file JSON, so a subtree with vectors or boolean operations
+    gets no key: its shape may change while everything the key sees stays the same.
+    """
+    if _freeform(node):
+        return None
+    payload = json.dumps(
+        {"file": file_id, "id": node.get("id"), "refs": image_refs(node), "node": _render_content(node),
+         "format": fmt, "scale": scale},
+        sort_keys=True, separators=(",", ":"),
+    )
+    return hashlib.sha256(payload.encode()).hexdigest()
+
+
+def place_file(source: Path, target: Path) -> str:
+    """Put source at target without downloading: reflink, then hardlink, then copy."""
+    target.parent.mkdir(parents=True, exist_ok=True)
+    if target.exists():
+        target.unlink()
+    try:
+        import fcntl
+        with open(source, "rb") as src, open(target, "wb") as dst:
+            fcntl.ioctl(dst.fileno(), FICLONE, src.fileno())
+        return "reflink"
+    except (ImportError, OSError):
+        if target.exists():
+            target.unlink()
+    try:
+        os.link(source, target)
+        return "hardlink"
+    except OSError:
+        shutil.copyfile(source, target)
+        return "copy"
+
+
+class AssetStore:
+    """Content addressed asset store with a byte quota and LRU eviction.
+    Args:
+            root: directory of the store
+            quota_bytes: total size of the stored assets before old ones are evicted
+    """
+
+    def __init__(self, root, quota_bytes: int = DEFAULT_QUOTA_BYTES):
+        self.root = Path(root)
+        self.objects = self.root / "objects"
+        self.stats_path = self.root / "stats.json"
+        self.quota_bytes = quota_bytes
+        self._lock = threading.Lock()
+        self._hits = 0
+        self._misses = 0
+        self._bytes_saved = 0
+        self.objects.mkdir(parents=True, exist_ok=True)
+
+    def path_for(self, key: str) -> Path:
+        return self.objects / key[:2] / key
+
+    def fetch_fill(self, ref: str, target: Path, size: Tuple[int, int], scale_mode: str = "FILL") -> bool:
+        """Make the asset of an image fill node from the raw image stored under its imageRef;
+        False on a miss (or when the stored image cannot be read).
+        """
+        source = self.path_for(ref)  # imageRefs are 40 hex digits, render keys 64
+        try:
+            fit_image(source, target, size, scale_mode)
+            os.utime(source)
+            saved = source.stat().st_size
+        except FileNotFoundError:
+            with self._lock:
+                self._misses += 1
+            return False
+        except OSError as e:
+            logging.warning(f"Could not reuse stored image {ref[:12]}: {e}")
+            with self._lock:
+                self._misses += 1
+            return False
+        with self._lock:
+            self._hits += 1
+            self._bytes_saved += saved
+        return True
+
+    def fetch(self, key: str, target: Path) -> bool:
+        """Place the stored asset at target; False on a miss."""
+        source = self.path_for(key)
+        if not source.exists():
+            with self._lock:
+                self._misses += 1
+            return False
+        try:
+            place_file(source, target)
+            os.utime(source)  # mark as recently used
+        except OSError as e:
+            logging.warning(f"Could not reuse stored asset {key[:12]}: {e}")
+            with self._lock:
+                self._misses += 1
+            return False
+        with self._lock:
+            self._hits += 1
+            self._bytes_saved += source.stat().st_size
+        return True
+
+    def put(self, key: str, source: Path) -> None:
+        """Add a freshly downloaded asset to the store."""
+        target = self.path_for(key)
+        if target.exists():
+            return
+        target.parent.mkdir(parents=True, exist_ok=True)
+        fd, tmp = tempfile.mkstemp(dir=target.parent, suffix=".tmp")
+        os.close(fd)
+        shutil.copyfile(source, tmp)
+        os.replace(tmp, target)
+
+    def put_data(self, key: str, data: bytes) -> Path:
+        """Add freshly downloaded bytes (a raw image fill) to the store and return where they are."""
+        target = self.path_for(key)
+        target.parent.mkdir(parents=True, exist_ok=True)
+        fd, tmp = tempfile.mkstemp(dir=target.parent, suffix=".tmp")
+        with os.fdopen(fd, "wb") as f:
+            f.write(data)
+        os.replace(tmp, target)
+        return target
+
+    def size(self) -> int:
+        return sum(stat.st_size for _, stat in self._entries())
+
+    def _entries(self):
+        """(path, stat) of the stored assets, stat'ed once. The store is shared between processes,
+        entries another one removed meanwhile are skipped.
+        """
+        entries = []
+        for entry in self.objects.glob("*/*"):
+            if entry.suffix == ".tmp":
+                continue
+            try:
+                stat = entry.stat()
+            except FileNotFoundError:
+                continue
+            if S_ISREG(stat.st_mode):
+                entries.append((entry, stat))
+        return entries
+
+    def evict(self) -> int:
+        """Remove least recently used assets until the store fits its quota; returns the count removed."""
+        entries = sorted(self._entries(), key=lambda entry: entry[1].st_mtime)
+        total = sum(stat.st_size for _, stat in entries)
+        removed = 0
+        for entry, stat in entries:
+            if total <= self.quota_bytes:
+                break
+            total -= stat.st_size
+            try:
+                entry.unlink()
+            except FileNotFoundError:
+                continue  # evicted by another process
+            except OSError as e:  # in use on Windows
+                logging.info(f"Could not evict {entry.name} from the asset store: {e}")
+                continue
+            removed += 1
+        if removed:
+            logging.info(f"Evicted {removed} asset(s) from the asset store")
+        return removed
+
+    def flush_stats(self) -> None:
+        """Add the counters of this process to the persisted totals."""
+        with self._lock:
+            hits, misses, saved = self._hits, self._misses, self._bytes_saved
+            self._hits = self._misses = self._bytes_saved = 0
+        if not (hits or misses):
+            return
+        stats = self.stats()
+        stats["hits"] += hits
+        stats["misses"] += misses
+        stats["bytes_saved"] += saved
+        fd, tmp = tempfile.mkstemp(dir=self.root, suffix=".tmp")
+        with os.fdopen(fd, "w") as f:
+            json.dump({key: stats[key] for key in ("hits", "misses", "bytes_saved")}, f)
+        os.replace(tmp, self.stats_path)
+
+    def stats(self) -> Dict:
+        """Persisted hit/miss totals plus the current size of the store."""
+        stats = {"hits": 0, "misses": 0, "bytes_saved": 0}
+        if self.stats_path.exists():
+            try:
+                stats.update(json.loads(self.stats_path.read_text()))
+            except (OSError, ValueError):
+                pass
+        lookups = stats["hits"] + stats["misses"]
+        stats["hit_rate"] = stats["hits"] / lookups if lookups else 0.0
+        stats["size"] = self.size()
+        stats["quota"] = self.quota_bytes
+        return stats
+
+
+def format_stats(stats: Dict) -> str:
+    return (
+        f"Asset store: {stats['hits']} hit(s), {stats['misses']} miss(es), "
+        f"hit rate {stats['hit_rate']:.1%}, {stats['bytes_saved'] / 1024 ** 2:.1f} MB not downloaded, "
+        f"{stats['size'] / 1024 ** 2:.1f} MB of {stats['quota'] / 1024 ** 2:.0f} MB used"
+    )
+
+
+def store_from_env(root) -> Optional[AssetStore]:
+    """Build the store for root, honouring FIGMA_ASSET_QUOTA_MB (0 disables the store)."""
+    quota_mb = float(os.environ.get("FIGMA_ASSET_QUOTA_MB", DEFAULT_QUOTA_BYTES / 1024 ** 2))
+    if quota_mb <= 0:
+        return None
+    return AssetStore(root, int(quota_mb * 1024 ** 2))
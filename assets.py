@@ -0,0 +1,210 @@
+""" Batched image export and parallel asset download.
+    Node ids are grouped by format and scale into as few export calls as the url length
+    allows, then the rendered assets are downloaded on a bounded thread pool that shares
+    the pooled session of the Figma client. With an asset store, nodes drawn by a plain image
+    fill are made from the raw image instead, downloaded once per imageRef.
+"""
+import logging
+import threading
+
+from collections import defaultdict
+from concurrent.futures import ThreadPoolExecutor
+from dataclasses import dataclass
+from pathlib import Path
+from typing import Dict, List, Optional, Tuple
+from urllib.parse import quote
+
+from asset_store import can_fit_images, fit_image
+from errors import ConversionCancelled
+from metrics import ConversionMetrics
+
+MAX_URL_LENGTH = 8000  # stay well below the limits of proxies and the Figma edge
+DOWNLOAD_WORKERS = 8
+
+
+@dataclass
+class AssetRequest:
+    """A node to render and the file it is written to."""
+    node_id: str
+    path: Path
+    format: str = "png"
+    scale: float = 1
+    key: Optional[str] = None  # render key in the shared asset store
+    image_ref: Optional[str] = None  # set when the node is drawn by nothing but this image fill
+    scale_mode: str = "FILL"
+    size: Tuple[float, float] = (0, 0)  # of the node, in Figma units
+
+    @property
+    def pixels(self) -> Tuple[int, int]:
+        return max(1, round(self.size[0] * self.scale)), max(1, round(self.size[1] * self.scale))
+
+
+def chunk_ids(ids: List[str], budget: int = MAX_URL_LENGTH) -> List[List[str]]:
+    """Split node ids into groups whose url encoded, comma joined form fits in budget characters."""
+    chunks: List[List[str]] = []
+    current: List[str] = []
+    used = 0
+    for node_id in ids:
+        size = len(quote(node_id, safe="")) + (3 if current else 0)  # %2C separator
+        if current and used + size > budget:
+            chunks.append(current)
+            current, used = [], 0
+            size -= 3
+        current.append(node_id)
+        used += size
+    if current:
+        chunks.append(current)
+    return chunks
+
+
+def resolve_urls(client, file_id: str, requests: List[AssetRequest]) -> Dict[str, str]:
+    """Ask Figma for the render urls with one export call per (format, scale, url sized chunk)."""
+    groups: Dict[Tuple[str, float], List[str]] = defaultdict(list)
+    for request in requests:
+        groups[(request.format, request.scale)].append(request.node_id)
+
+    # leave room for the endpoint and the other query parameters
+    budget = MAX_URL_LENGTH - len(f"{client.api_url}/images/{file_id}?ids=&format=png&scale=1") - 32
+    urls: Dict[str, str] = {}
+    for (fmt, scale), ids in groups.items():
+        for chunk in chunk_ids(list(dict.fromkeys(ids)), budget):
+            urls.update(client.get_image_urls(file_id, chunk, fmt, scale))
+    return urls
+
+
+def download_fills(client, file_id: str, fills: Dict[str, List[AssetRequest]], store,
+                   workers: int = DOWNLOAD_WORKERS, progress=None, cancel=None,
+                   metrics=None) -> Tuple[List[Path], List[AssetRequest]]:
+    """Download the raw image of every imageRef in fills once, add it to the store and size it for
+    each node using it. Returns the written paths and the requests that still need a rendered export
+    (no url for their image, or an image Pillow cannot read).
+    """
+    metrics = metrics or ConversionMetrics()
+    with metrics.stage("image_export", client):
+        urls = client.get_image_fills(file_id)
+    refs = [ref for ref in fills if urls.get(ref)]
+    failed = [request for ref in fills if not urls.get(ref) for request in fills[ref]]
+    written: List[Path] = []
+    if not refs:
+        return written, failed
+    done = [0]
+    done_lock = threading.Lock()
+
+    def fetch(ref: str):
+        if cancel is not None and cancel.is_set():
+            raise ConversionCancelled("Conversion cancelled")
+        source = store.put_data(ref, client.download(urls[ref]))
+        placed, rest = [], []
+        for request in fills[ref]:
+            try:
+                fit_image(source, request.path, request.pixels, request.scale_mode)
+                placed.append(request.path)
+            except OSError as e:
+                logging.warning(f"Could not use the image of node {request.node_id}, exporting it instead: {e}")
+                rest.append(request)
+        if progress is not None:
+            with done_lock:
+                done[0] += 1
+                progress("assets", done[0], len(refs))
+        return placed, rest
+
+    with metrics.stage("asset_download", client), \
+            ThreadPoolExecutor(max_workers=max(1, min(workers, len(refs))),
+                               thread_name_prefix=f"{threading.current_thread().name}-fills") as pool:
+        for placed, rest in pool.map(fetch, refs):
+            written += placed
+            failed += rest
+    logging.info(f"Downloaded {len(refs)} image fill(s) for {len(written)} asset(s) of {file_id}")
+    return written, failed
+
+
+def download_assets(client, file_id: str, requests: List[AssetRequest],
+                    workers: int = DOWNLOAD_WORKERS, store=None, progress=None,
+                    cancel=None, metrics=None) -> List[Path]:
+    """Export and download every requested asset; returns the paths that were written.
+    With an asset_store.AssetStore, assets already in the store are placed from there
+    and only the rest is exported and downloaded (then added to the store). Requests with an
+    image_ref are made from the raw image of that fill when Pillow is installed.
+    progress("assets", done, total) reports the downloads, a set cancel event stops them.
+    A metrics.ConversionMetrics records the image_export and asset_download stages.
+    """
+    metrics = metrics or ConversionMetrics()
+    reused: List[Path] = []
+    written: List[Path] = []
+    duplicates: List[AssetRequest] = []
+    fills: Dict[str, List[AssetRequest]] = defaultdict(list)
+    keys = set()
+    if store is not None:
+        use_fills = can_fit_images()
+        missing = []
+        for request in requests:
+            if use_fills and request.image_ref:
+                if request.image_ref in fills or not store.fetch_fill(
+                        request.image_ref, request.path, request.pixels, request.scale_mode):
+                    fills[request.image_ref].append(request)  # one download per image
+                else:
+                    reused.append(request.path)
+            elif request.key in keys:
+                duplicates.append(request)  # placed from the store once the first copy is in
+            elif request.key and store.fetch(request.key, request.path):
+                reused.append(request.path)
+            else:
+                missing.append(request)
+                keys.add(request.key)
+        requests = missing
+    if fills:
+        written, failed = download_fills(client, file_id, fills, store, workers, progress, cancel, metrics)
+        for request in failed:
+            if request.key in keys:
+                duplicates.append(request)
+            else:
+                requests.append(request)
+                keys.add(request.key)
+    if requests:
+        written += export_assets(client, file_id, requests, workers, store, progress, cancel, metrics)
+    if store is not None:
+        reused += [request.path for request in duplicates if store.fetch(request.key, request.path)]
+        if reused:
+            logging.info(f"Reused {len(reused)} asset(s) from the asset store")
+        if written:
+            store.evict()
+        store.flush_stats()
+    return reused + written
+
+
+def export_assets(client, file_id: str, requests: List[AssetRequest], workers: int = DOWNLOAD_WORKERS,
+                  store=None, progress=None, cancel=None, metrics=None) -> List[Path]:
+    """Render the requested nodes with the batched export calls and download them (see download_assets)."""
+    metrics = metrics or ConversionMetrics()
+    with metrics.stage("image_export", client):
+        urls = resolve_urls(client, file_id, requests)
+    done = [0]
+    done_lock = threading.Lock()
+
+    def fetch(request: AssetRequest):
+        if cancel is not None and cancel.is_set():
+            raise ConversionCancelled("Conversion cancelled")
+        url = urls.get(request.node_id)
+        if not url:
+            logging.warning(f"Figma returned no image for node {request.node_id}")
+            return None
+        request.path.parent.mkdir(parents=True, exist_ok=True)
+        data = client.download(url)
+        # never write through an existing file, it may be a hardlink into the asset store
+        request.path.unlink(missing_ok=True)
+        request.path.write_bytes(data)
+        if store is not None and request.key:
+            store.put(request.key, request.path)
+        if progress is not None:
+            with done_lock:
+                done[0] += 1
+                progress("assets", done[0], len(requests))
+        return request.path
+
+    # the pool threads are named after the caller so its log records can be followed
+    with metrics.stage("asset_download", client), \
+            ThreadPoolExecutor(max_workers=max(1, min(workers, len(requests))),
+                               thread_name_prefix=f"{threading.current_thread().name}-assets") as pool:
+        written = [path for path in pool.map(fetch, requests) if path is not None]
+    logging.info(f"Downloaded {len(written)} asset(s) for {file_id}")
+    return written
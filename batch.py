@@ -0,0 +1,177 @@
+""" Batch conversion of many Figma files.
+    Reads a manifest (plain list of urls, JSON or CSV), normalizes and dedupes the urls
+    and converts them concurrently on a bounded process pool.
+"""
+import csv
+import json
+import time
+import logging
+
+from concurrent.futures import ProcessPoolExecutor, as_completed
+from dataclasses import dataclass, field, asdict
+from datetime import datetime
+from pathlib import Path
+from typing import Dict, List, Optional
+
+from figma import DATA_DIR, convert_url_to_file_format, get_history, get_metrics
+from history import output_size
+from engine import extract_file_id, output_name
+
+DEFAULT_BATCH_WORKERS = 4
+
+
+@dataclass
+class BatchJob:
+    """One entry of the manifest."""
+    url: str
+    output: Optional[str] = None
+    options: Dict = field(default_factory=dict)
+
+
+@dataclass
+class BatchReportEntry:
+    url: str
+    file_id: str
+    output: str
+    status: str = "pending"
+    duration: float = 0.0
+    frames: int = 0
+    assets: int = 0
+    error: str = ""
+    metrics: Dict = field(default_factory=dict)  # per-stage seconds, bytes and requests
+
+
+def _job_from_dict(entry: Dict) -> BatchJob:
+    entry = dict(entry)
+    url = entry.pop("url", "") or entry.pop("file_url", "")
+    output = entry.pop("output", None) or entry.pop("output_dir", None)
+    return BatchJob(url=url.strip(), output=output or None, options=entry)
+
+
+def load_manifest(path) -> List[BatchJob]:
+    """Load a manifest file.
+    Supported formats:
+            .json: a list of urls or objects with url/output/options, or {"files": [...]}
+            .csv: header row with a url column and optional output and option columns
+            anything else: one url per line, blank lines and # comments are ignored
+    """
+    path = Path(path)
+    if path.suffix.lower() == ".json":
+        data = json.loads(path.read_text(encoding="utf-8"))
+        if isinstance(data, dict):
+            data = data.get("files", [])
+        return [BatchJob(url=entry.strip()) if isinstance(entry, str) else _job_from_dict(entry) for entry in data]
+    if path.suffix.lower() == ".csv":
+        with open(path, newline="", encoding="utf-8") as f:
+            return [_job_from_dict({k: v for k, v in row.items() if v}) for row in csv.DictReader(f)]
+    lines = path.read_text(encoding="utf-8").splitlines()
+    return [BatchJob(url=line.strip()) for line in lines if line.strip() and not line.strip().startswith("#")]
+
+
+def normalize_jobs(jobs: List[BatchJob]) -> List[BatchJob]:
+    """Normalize every url with convert_url_to_file_format and drop duplicates (first one wins)."""
+    seen = set()
+    unique = []
+    for job in jobs:
+        try:
+            file_url = convert_url_to_file_format(job.url)
+        except ValueError:
+            logging.warning(f"Skipping invalid manifest entry: {job.url!r}")
+            continue
+        if file_url in seen:
+            logging.info(f"Skipping duplicate manifest entry: {job.url}")
+            continue
+        seen.add(file_url)
+        unique.append(BatchJob(url=file_url, output=job.output, options=job.options))
+    return unique
+
+
+def _flag(options: Dict, key: str, default: bool) -> bool:
+    """Read a boolean option that may come from CSV/JSON as a string."""
+    value = options.get(key, default)
+    if isinstance(value, str):
+        return value.strip().lower() in ("true", "1", "yes")
+    return bool(value)
+
+
+def job_output(job: BatchJob, output_root: Path) -> Path:
+    """The output directory of a job: its own, or one per file and node selection in output_root."""
+    return Path(job.output) if job.output else Path(output_root) / output_name(job.url)
+
+
+def _convert_job(token: str, file_url: str, output: str, options: Dict) -> Dict:
+    """Run one conversion inside a pool process."""
+    from figma import converter
+
+    start = time.perf_counter()
+    result = converter(
+        options.get("token", token), file_url, Path(output),
+        engine=options.get("engine", "native"),
+        use_cache=_flag(options, "use_cache", True),
+        refresh=_flag(options, "refresh", False),
+        incremental=_flag(options, "incremental", True),
+    )
+    return {
+        "duration": time.perf_counter() - start,
+        "frames": result.frame_count,
+        "assets": len(result.assets),
+        "bytes": output_size(result),
+        "metrics": result.metrics,
+    }
+
+
+def run_batch(jobs: List[BatchJob], token: str, workers: int = DEFAULT_BATCH_WORKERS,
+              output_root: Optional[Path] = None) -> List[BatchReportEntry]:
+    """Convert all jobs on a bounded process pool and return the per-file report."""
+    jobs = normalize_jobs(jobs)
+    output_root = Path(output_root or DATA_DIR / f"batch_{datetime.now().strftime('%Y-%m-%d_%H-%M-%S')}")
+    output_root.mkdir(parents=True, exist_ok=True)
+    logging.info(f"Converting {len(jobs)} file(s) with {workers} worker(s) into {output_root}")
+
+    report = []
+    with ProcessPoolExecutor(max_workers=max(1, workers)) as pool:
+        futures = {}
+        for job in jobs:
+            file_id = extract_file_id(job.url)
+            output = job_output(job, output_root)
+            output.mkdir(parents=True, exist_ok=True)
+            entry = BatchReportEntry(url=job.url, file_id=file_id, output=str(output))
+            futures[pool.submit(_convert_job, token, job.url, str(output), job.options)] = entry
+            report.append(entry)
+
+        for future in as_completed(futures):
+            entry = futures[future]
+            try:
+                outcome = future.result()
+                entry.status = "done"
+                entry.duration = outcome["duration"]
+                entry.frames = outcome["frames"]
+                entry.assets = outcome["assets"]
+                entry.metrics = outcome["metrics"]
+                logging.info(f"✓ {entry.file_id} converted in {entry.duration:.2f}s")
+                get_history().record(entry.file_id, entry.output, "done", entry.duration, file_url=entry.url,
+                                     frames=entry.frames, assets=entry.assets, size=outcome["bytes"])
+                get_metrics().observe("done", entry.duration, entry.metrics)
+            except Exception as e:
+                entry.status = "failed"
+                entry.error = str(e)
+                logging.error(f"❌ {entry.file_id} failed: {e}")
+                get_history().record(entry.file_id, entry.output, "failed", file_url=entry.url, error=entry.error)
+                get_metrics().observe("failed")
+
+    write_report(report, output_root / "batch_report.json")
+    return report
+
+
+def write_report(report: List[BatchReportEntry], path: Path) -> None:
+    """Write the JSON summary and log a short table."""
+    summary = {
+        "total": len(report),
+        "done": sum(entry.status == "done" for entry in report),
+        "failed": sum(entry.status == "failed" for entry in report),
+        "files": [asdict(entry) for entry in report],
+    }
+    path.write_text(json.dumps(summary, indent=4), encoding="utf-8")
+    for entry in report:
+        logging.info(f"{entry.status:<7} {entry.duration:7.2f}s  {entry.file_id}  {entry.output}")
+    logging.info(f"Batch finished: {summary['done']} done, {summary['failed']} failed. Report: {path}")
@@ -0,0 +1,223 @@
+""" End-to-end conversion benchmark against the local fake Figma API (fake_figma.py).
+    Runs converter() on synthetic documents (synthetic.py) of 10 to 100k nodes, each size in a
+    fresh child process, and reports latency percentiles, throughput, peak RSS and the per-stage times.
+    The results are compared with a JSON baseline, the script exits with 1 on a regression
+    (2 when there is no baseline). The children run on a temporary FIGMA_DATA_DIR.
+
+    python benchmarks/bench_conversion.py                      # compare with the baseline
+    python benchmarks/bench_conversion.py --update-baseline    # record a new baseline
+    python benchmarks/bench_conversion.py --sizes 1000,10000 --runs 10 --latency 0.005
+    python benchmarks/bench_conversion.py --depth 12 --image-fills 2000 --image-refs 50
+"""
+import os
+import sys
+import json
+import time
+import argparse
+import platform
+import statistics
+import subprocess
+import tempfile
+
+from pathlib import Path
+from typing import Dict, List, Optional
+
+ROOT = Path(__file__).resolve().parent.parent
+BASELINE_PATH = Path(__file__).resolve().parent / "baselines" / "conversion.json"
+DEFAULT_SIZES = [10, 100, 1000, 10000, 100000]
+DEFAULT_RUNS = 5
+DEFAULT_THRESHOLD = 0.25  # fail when the median is 25% slower than the baseline
+MIN_DELTA_MS = 20  # ... and at least 20 ms slower, smaller changes are noise
+DEFAULT_RSS_THRESHOLD = 0.25  # fail when peak RSS grew by 25%
+MIN_RSS_DELTA_MB = 20
+
+
+def percentile(values: List[float], q: float) -> float:
+    """q-th percentile (0..100) with linear interpolation between the closest ranks."""
+    ordered = sorted(values)
+    rank = (len(ordered) - 1) * q / 100
+    low = int(rank)
+    high = min(low + 1, len(ordered) - 1)
+    return ordered[low] + (ordered[high] - ordered[low]) * (rank - low)
+
+
+def peak_rss_mb() -> Optional[float]:
+    """Peak resident set size of this process, None where the resource module is missing."""
+    try:
+        import resource
+    except ImportError:
+        return None
+    peak = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+    return peak / 1024 ** 2 if sys.platform == "darwin" else peak / 1024  # bytes on macOS, KB elsewhere
+
+
+def measure(nodes: int, runs: int, warmup: int) -> Dict:
+    """Convert the generated file of nodes nodes runs times (runs in a fresh child process)."""
+    sys.path.insert(0, str(ROOT))
+    from figma import converter
+
+    url = f"https://www.figma.com/design/gen{nodes}/Bench"
+    seconds, stages = [], {}
+    result = None
+    for run in range(warmup + runs):
+        with tempfile.TemporaryDirectory() as output:
+            start = time.perf_counter()
+            result = converter("bench-token", url, output, use_cache=False)
+            elapsed = time.perf_counter() - start
+        if run < warmup:
+            continue  # connection setup and first-use imports
+        seconds.append(elapsed)
+        for name, entry in result.metrics.items():
+            stages.setdefault(name, []).append(entry["seconds"])
+    return {
+        "nodes": nodes,
+        "seconds": seconds,
+        "frames": result.frame_count,
+        "assets": len(result.assets),
+        "requests": result.request_count,
+        "document_bytes": result.metrics.get("parse", {}).get("bytes", 0),
+        "stages": {name: statistics.median(values) for name, values in stages.items()},
+        "peak_rss_mb": peak_rss_mb(),
+    }
+
+
+def summarize(sample: Dict) -> Dict:
+    seconds = sample["seconds"]
+    median = statistics.median(seconds)
+    return {
+        "nodes": sample["nodes"],
+        "runs": len(seconds),
+        "frames": sample["frames"],
+        "assets": sample["assets"],
+        "requests": sample["requests"],
+        "document_bytes": sample["document_bytes"],
+        "p50_ms": round(median * 1000, 2),
+        "p90_ms": round(percentile(seconds, 90) * 1000, 2),
+        "p99_ms": round(percentile(seconds, 99) * 1000, 2),
+        "mean_ms": round(statistics.mean(seconds) * 1000, 2),
+        "nodes_per_s": round(sample["nodes"] / median, 1),
+        "mb_per_s": round(sample["document_bytes"] / median / 1024 ** 2, 2),
+        "peak_rss_mb": round(sample["peak_rss_mb"], 1) if sample["peak_rss_mb"] is not None else None,
+        "stages_ms": {name: round(value * 1000, 2) for name, value in sample["stages"].items()},
+    }
+
+
+def run(sizes: List[int], runs: int, warmup: int, latency: float, spec: Dict) -> Dict:
+    """Convert every size; spec holds the synthetic.DocumentSpec options besides the node count."""
+    sys.path.insert(0, str(ROOT))
+    from fake_figma import FakeFigma, FakeFigmaServer
+    from synthetic import DocumentSpec, generate
+
+    results: Dict = {
+        "python": platform.python_version(),
+        "platform": sys.platform,
+        "created": time.strftime("%Y-%m-%d %H:%M:%S"),
+        "latency": latency,
+        "spec": spec,
+        "sizes": {},
+    }
+    with FakeFigmaServer(FakeFigma(latency=latency)) as server, tempfile.TemporaryDirectory() as data:
+        env = dict(os.environ, FIGMA_API_URL=server.api_url, FIGMA_DATA_DIR=data, PYTHONPATH=str(ROOT))
+        for nodes in sizes:
+            server.api.add(f"gen{nodes}", generate(DocumentSpec.for_nodes(nodes, **spec)))
+            print(f"Converting {nodes} nodes ({runs} runs)...")
+            command = [sys.executable, str(Path(__file__).resolve()), "--measure", str(nodes),
+                       "--runs", str(runs), "--warmup", str(warmup)]
+            process = subprocess.run(command, cwd=ROOT, env=env, capture_output=True, text=True)
+            if process.returncode != 0:
+                error = process.stderr.strip().splitlines()[-1:] or ["unknown error"]
+                print(f"  conversion of {nodes} nodes failed: {error[0]}", file=sys.stderr)
+                continue
+            results["sizes"][str(nodes)] = summarize(json.loads(process.stdout.strip().splitlines()[-1]))
+        results["requests"] = dict(server.api.requests)
+    return results
+
+
+def compare(results: Dict, baseline: Dict, threshold: float, min_delta_ms: float,
+            rss_threshold: float, min_rss_delta_mb: float) -> List[str]:
+    """Sizes whose median latency or peak RSS got worse than the baseline allows."""
+    regressions = []
+    if baseline.get("spec", {}) != results.get("spec", {}):
+        print("The baseline was recorded with other document options, not comparing")
+        return regressions
+    for size, current in results["sizes"].items():
+        base = baseline.get("sizes", {}).get(size)
+        if not base:
+            continue
+        p50, base_p50 = current["p50_ms"], base["p50_ms"]
+        if p50 > base_p50 * (1 + threshold) and p50 - base_p50 > min_delta_ms:
+            regressions.append(f"{size} nodes: p50 {p50:.1f} ms, baseline {base_p50:.1f} ms "
+                               f"(+{p50 / base_p50 - 1:.0%})")
+        rss, base_rss = current.get("peak_rss_mb"), base.get("peak_rss_mb")
+        if rss and base_rss and rss > base_rss * (1 + rss_threshold) and rss - base_rss > min_rss_delta_mb:
+            regressions.append(f"{size} nodes: peak RSS {rss:.1f} MB, baseline {base_rss:.1f} MB "
+                               f"(+{rss / base_rss - 1:.0%})")
+    return regressions
+
+
+def report(results: Dict) -> None:
+    print(f"{'nodes':>8} {'p50 ms':>10} {'p90 ms':>10} {'p99 ms':>10} {'nodes/s':>10} {'MB/s':>7} {'RSS MB':>8}")
+    for size, entry in results["sizes"].items():
+        rss = f"{entry['peak_rss_mb']:.1f}" if entry["peak_rss_mb"] is not None else "n/a"
+        print(f"{size:>8} {entry['p50_ms']:>10.1f} {entry['p90_ms']:>10.1f} {entry['p99_ms']:>10.1f} "
+              f"{entry['nodes_per_s']:>10.0f} {entry['mb_per_s']:>7.2f} {rss:>8}")
+        slowest = sorted(((ms, name) for name, ms in entry["stages_ms"].items()), reverse=True)[:3]
+        print("         " + ", ".join(f"{name} {ms:.1f} ms" for ms, name in slowest))
+
+
+def main(argv=None) -> int:
+    parser = argparse.ArgumentParser(description="Benchmark converter() against the local fake Figma API")
+    parser.add_argument("--sizes", default=",".join(map(str, DEFAULT_SIZES)),
+                        help="comma separated node counts of the generated documents")
+    parser.add_argument("--runs", type=int, default=DEFAULT_RUNS, help="timed conversions per size")
+    parser.add_argument("--warmup", type=int, default=1, help="untimed conversions before the timed ones")
+    parser.add_argument("--latency", type=float, default=0.0, help="seconds the fake API adds to every request")
+    parser.add_argument("--frame-nodes", type=int, default=50, help="nodes per frame of the synthetic documents")
+    parser.add_argument("--depth", type=int, default=3, help="deepest auto-layout nesting in a frame")
+    parser.add_argument("--image-fills", type=int, default=0, help="rectangles with an image fill")
+    parser.add_argument("--image-refs", type=int, default=1, help="distinct imageRefs the image fills share")
+    parser.add_argument("--seed", type=int, default=0, help="seed of the synthetic documents")
+    parser.add_argument("--baseline", type=Path, default=BASELINE_PATH, help="baseline JSON file")
+    parser.add_argument("--update-baseline", action="store_true", help="write the results as the new baseline")
+    parser.add_argument("--threshold", type=float, default=DEFAULT_THRESHOLD,
+                        help="allowed relative slowdown of the median (0.25 = 25%%)")
+    parser.add_argument("--min-delta-ms", type=float, default=MIN_DELTA_MS,
+                        help="slowdowns below this are ignored as noise")
+    parser.add_argument("--rss-threshold", type=float, default=DEFAULT_RSS_THRESHOLD,
+                        help="allowed relative growth of the peak RSS")
+    parser.add_argument("--output", type=Path, help="also write the results to this file")
+    parser.add_argument("--measure", type=int, help=argparse.SUPPRESS)
+    args = parser.parse_args(argv)
+
+    if args.measure:
+        print(json.dumps(measure(args.measure, args.runs, args.warmup)))
+        return 0
+
+    spec = {"nodes": args.frame_nodes, "depth": args.depth, "image_fills": args.image_fills,
+            "image_refs": args.image_refs, "seed": args.seed}
+    results = run([int(size) for size in args.sizes.split(",") if size], args.runs, args.warmup, args.latency, spec)
+    report(results)
+    if args.output:
+        args.output.write_text(json.dumps(results, indent=2))
+
+    if args.update_baseline:
+        args.baseline.parent.mkdir(parents=True, exist_ok=True)
+        args.baseline.write_text(json.dumps(results, indent=2))
+        print(f"Baseline written to {args.baseline}")
+        return 0
+    if not args.baseline.exists():
+        print(f"No baseline at {args.baseline}, run with --update-baseline to record one", file=sys.stderr)
+        return 2
+
+    regressions = compare(results, json.loads(args.baseline.read_text()), args.threshold, args.min_delta_ms,
+                          args.rss_threshold, MIN_RSS_DELTA_MB)
+    for regression in regressions:
+        print(f"REGRESSION: {regression}")
+    if regressions:
+        return 1
+    print("No conversion regressions")
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,251 @@
+""" Startup benchmark for gui.py and figma.py.
+    Measures cold and warm `python -X importtime` profiles, the time to construct
+    FigmaConverterApp (on a real or virtual display, or with a mocked Tk) and load_settings,
+    compares the results with a JSON baseline and exits with 1 when an import regressed
+    (2 when there is no baseline). The app runs on a temporary FIGMA_DATA_DIR.
+
+    python benchmarks/bench_startup.py                      # compare with the baseline
+    python benchmarks/bench_startup.py --update-baseline    # record a new baseline
+"""
+import os
+import sys
+import json
+import time
+import shutil
+import argparse
+import platform
+import statistics
+import subprocess
+import tempfile
+
+from pathlib import Path
+from typing import Dict, List, Optional
+
+ROOT = Path(__file__).resolve().parent.parent
+BASELINE_PATH = Path(__file__).resolve().parent / "baselines" / "startup.json"
+MODULES = ["figma", "gui"]
+DEFAULT_RUNS = 5
+DEFAULT_THRESHOLD = 0.25  # fail when an import is 25% slower than the baseline
+MIN_DELTA_US = 10000  # ... and at least 10 ms slower, smaller changes are noise
+
+
+def parse_importtime(stderr: str) -> Dict[str, int]:
+    """Cumulative import time in microseconds of every top level package."""
+    times: Dict[str, int] = {}
+    for line in stderr.splitlines():
+        if not line.startswith("import time:") or "[us]" in line:
+            continue
+        _, cumulative, name = line.split(":", 1)[1].split("|")
+        name = name.strip()
+        if "." not in name:
+            times[name] = int(cumulative)
+    return times
+
+
+def import_profile(module: str, cold: bool, runs: int) -> Optional[Dict[str, int]]:
+    """Median cumulative import times of module and the packages it pulls in.
+    Cold runs compile everything into an empty bytecode cache, warm runs reuse a filled one.
+    """
+    samples: List[Dict[str, int]] = []
+    with tempfile.TemporaryDirectory() as pycache:
+        env = dict(os.environ, PYTHONPYCACHEPREFIX=pycache, PYTHONPATH=str(ROOT))
+        env.pop("PYTHONDONTWRITEBYTECODE", None)  # warm runs need the bytecode written
+        command = [sys.executable, "-X", "importtime", "-c", f"import {module}"]
+        if not cold:
+            subprocess.run(command, cwd=ROOT, env=env, capture_output=True)  # fill the cache
+        for _ in range(runs):
+            if cold:
+                shutil.rmtree(pycache, ignore_errors=True)
+            process = subprocess.run(command, cwd=ROOT, env=env, capture_output=True, text=True)
+            if process.returncode != 0:
+                error = process.stderr.strip().splitlines()[-1:] or ["unknown error"]
+                print(f"  import {module} failed: {error[0]}", file=sys.stderr)
+                return None
+            samples.append(parse_importtime(process.stderr))
+    names = set.intersection(*(set(sample) for sample in samples))
+    return {name: int(statistics.median(sample[name] for sample in samples)) for name in sorted(names)}
+
+
+def install_mock_tk() -> None:
+    """Replace tkinter and customtkinter with inert stand-ins so the app builds without a display."""
+    import types
+
+    class MockWidget:
+        def __init__(self, *args, **kwargs):
+            pass
+
+        def __getattr__(self, name):
+            if name.startswith("__"):
+                raise AttributeError(name)
+            return mock_call
+
+    class MockVar:
+        def __init__(self, master=None, value=None, **kwargs):
+            self.value = value
+
+        def get(self):
+            return self.value
+
+        def set(self, value):
+            self.value = value
+
+    def mock_call(*args, **kwargs):
+        return MockWidget()
+
+    def module_getattr(name):
+        if name.startswith("__"):
+            raise AttributeError(name)
+        return MockWidget if name[:1].isupper() else mock_call
+
+    for name in ("tkinter", "customtkinter"):
+        module = types.ModuleType(name)
+        module.__getattr__ = module_getattr
+        module.BooleanVar = module.StringVar = module.IntVar = MockVar
+        sys.modules[name] = module
+
+
+def measure_app(display: str) -> Dict:
+    """Construct FigmaConverterApp and load its settings (runs in a fresh child process)."""
+    if display == "mock":
+        install_mock_tk()
+    sys.path.insert(0, str(ROOT))
+    start = time.perf_counter()
+    import gui
+    imported = time.perf_counter()
+    app = gui.FigmaConverterApp()
+    constructed = time.perf_counter()
+    app.update()  # first paint (a no-op with the mocked Tk)
+    painted = time.perf_counter()
+    app.load_settings()
+    loaded = time.perf_counter()
+    return {
+        "display": display,
+        "import_ms": (imported - start) * 1000,
+        "construct_ms": (constructed - imported) * 1000,
+        "first_paint_ms": (painted - start) * 1000,
+        "load_settings_ms": (loaded - painted) * 1000,
+    }
+
+
+def pick_display(display: str) -> str:
+    if display != "auto":
+        return display
+    if os.environ.get("DISPLAY") or sys.platform in ("win32", "darwin"):
+        return "native"
+    return "xvfb" if shutil.which("xvfb-run") else "mock"
+
+
+def app_profile(display: str, runs: int) -> Optional[Dict]:
+    """Median app timings over fresh processes."""
+    command = [sys.executable, str(Path(__file__).resolve()), "--measure-app", "mock" if display == "mock" else "native"]
+    if display == "xvfb":
+        command = ["xvfb-run", "-a", *command]
+    samples = []
+    for _ in range(runs):
+        # a fresh data dir per run: no logs, history or settings left in the real one
+        with tempfile.TemporaryDirectory() as data:
+            env = dict(os.environ, FIGMA_DATA_DIR=data)
+            process = subprocess.run(command, cwd=ROOT, env=env, capture_output=True, text=True)
+        if process.returncode != 0:
+            error = process.stderr.strip().splitlines()[-1:] or ["unknown error"]
+            print(f"  app startup failed: {error[0]}", file=sys.stderr)
+            return None
+        samples.append(json.loads(process.stdout.strip().splitlines()[-1]))
+    profile = {key: round(statistics.median(sample[key] for sample in samples), 2)
+               for key in samples[0] if key != "display"}
+    profile["display"] = display
+    return profile
+
+
+def run(runs: int, display: str) -> Dict:
+    results: Dict = {
+        "python": platform.python_version(),
+        "platform": sys.platform,
+        "created": time.strftime("%Y-%m-%d %H:%M:%S"),
+        "imports": {"cold": {}, "warm": {}},
+    }
+    for module in MODULES:
+        for mode in ("cold", "warm"):
+            print(f"Profiling {mode} import of {module} ({runs} runs)...")
+            profile = import_profile(module, mode == "cold", runs)
+            if profile is not None:
+                results["imports"][mode][module] = profile
+    display = pick_display(display)
+    print(f"Timing FigmaConverterApp startup ({display} display)...")
+    results["app"] = app_profile(display, runs)
+    return results
+
+
+def compare(results: Dict, baseline: Dict, threshold: float, min_delta_us: int) -> List[str]:
+    """Imports that got slower than the baseline allows."""
+    regressions = []
+    for mode, modules in results["imports"].items():
+        for module, times in modules.items():
+            base = baseline.get("imports", {}).get(mode, {}).get(module, {})
+            for name, us in times.items():
+                if name in base and us > base[name] * (1 + threshold) and us - base[name] > min_delta_us:
+                    regressions.append(
+                        f"{mode} import {module}: {name} took {us / 1000:.1f} ms, "
+                        f"baseline {base[name] / 1000:.1f} ms (+{(us / base[name] - 1):.0%})"
+                    )
+    return regressions
+
+
+def report(results: Dict) -> None:
+    for mode, modules in results["imports"].items():
+        for module, times in modules.items():
+            print(f"{mode:>5} import {module}: {times.get(module, 0) / 1000:.1f} ms")
+            slowest = sorted(((us, name) for name, us in times.items() if name != module), reverse=True)[:5]
+            for us, name in slowest:
+                print(f"        {name}: {us / 1000:.1f} ms")
+    app = results.get("app")
+    if app:
+        print(f"App ({app['display']}): import {app['import_ms']:.1f} ms, construct {app['construct_ms']:.1f} ms, "
+              f"first paint {app['first_paint_ms']:.1f} ms, load_settings {app['load_settings_ms']:.1f} ms")
+
+
+def main(argv=None) -> int:
+    parser = argparse.ArgumentParser(description="Benchmark the startup of gui.py and figma.py")
+    parser.add_argument("--runs", type=int, default=DEFAULT_RUNS, help="runs per measurement (median is kept)")
+    parser.add_argument("--baseline", type=Path, default=BASELINE_PATH, help="baseline JSON file")
+    parser.add_argument("--update-baseline", action="store_true", help="write the results as the new baseline")
+    parser.add_argument("--threshold", type=float, default=DEFAULT_THRESHOLD,
+                        help="allowed relative slowdown of an import (0.25 = 25%%)")
+    parser.add_argument("--min-delta-ms", type=float, default=MIN_DELTA_US / 1000,
+                        help="slowdowns below this are ignored as noise")
+    parser.add_argument("--display", choices=["auto", "native", "xvfb", "mock"], default="auto",
+                        help="how to construct the app: real display, xvfb-run or a mocked Tk")
+    parser.add_argument("--output", type=Path, help="also write the results to this file")
+    parser.add_argument("--measure-app", choices=["native", "mock"], help=argparse.SUPPRESS)
+    args = parser.parse_args(argv)
+
+    if args.measure_app:
+        print(json.dumps(measure_app(args.measure_app)))
+        return 0
+
+    results = run(args.runs, args.display)
+    report(results)
+    if args.output:
+        args.output.write_text(json.dumps(results, indent=2))
+
+    if args.update_baseline:
+        args.baseline.parent.mkdir(parents=True, exist_ok=True)
+        args.baseline.write_text(json.dumps(results, indent=2))
+        print(f"Baseline written to {args.baseline}")
+        return 0
+    if not args.baseline.exists():
+        print(f"No baseline at {args.baseline}, run with --update-baseline to record one", file=sys.stderr)
+        return 2
+
+    regressions = compare(results, json.loads(args.baseline.read_text()), args.threshold,
+                          int(args.min_delta_ms * 1000))
+    for regression in regressions:
+        print(f"REGRESSION: {regression}")
+    if regressions:
+        return 1
+    print("No import regressions")
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,130 @@
+""" On-disk cache of Figma document JSON.
+    Entries are keyed by file id and document version, so a cheap metadata request
+    is enough to know whether the stored JSON can be reused. Without a version nothing is cached.
+    Hits are read through an open file, so an entry evicted by another process meanwhile is
+    still readable (or, when it is already gone, just a miss).
+"""
+import os
+import hashlib
+import logging
+import tempfile
+import threading
+
+from contextlib import contextmanager
+from pathlib import Path
+from typing import BinaryIO, Optional
+
+DEFAULT_CACHE_BYTES = 2 * 1024 ** 3  # 2 GB
+
+
+class DocumentCache:
+    """Content addressed store of raw document JSON with size based LRU eviction.
+    Args:
+            root: directory holding the cached documents
+            max_bytes: total size the cache may use before old entries are evicted
+    """
+
+    def __init__(self, root, max_bytes: int = DEFAULT_CACHE_BYTES):
+        self.root = Path(root)
+        self.max_bytes = max_bytes
+        self._lock = threading.Lock()
+        self.root.mkdir(parents=True, exist_ok=True)
+
+    def path_for(self, file_id: str, version: str) -> Path:
+        digest = hashlib.sha256(str(version).encode()).hexdigest()[:16]
+        return self.root / f"{file_id}-{digest}.json"
+
+    def get(self, file_id: str, version: str) -> Optional[Path]:
+        """Return the cached document path for this version, or None on a miss.
+        The entry may still be evicted by another process before it is read, see open().
+        """
+        if not version:
+            return None
+        path = self.path_for(file_id, version)
+        try:
+            os.utime(path)  # mark as recently used
+        except FileNotFoundError:
+            return None
+        logging.info(f"Document cache hit for {file_id} (version {version})")
+        return path
+
+    def open(self, file_id: str, version: str) -> Optional[BinaryIO]:
+        """Open the cached document for this version for reading, or return None on a miss."""
+        if not version:
+            return None
+        path = self.path_for(file_id, version)
+        try:
+            file = open(path, "rb")
+        except FileNotFoundError:
+            return None
+        try:
+            os.utime(path)  # mark as recently used
+        except OSError:
+            pass  # evicted right after it was opened, the open file is still readable
+        logging.info(f"Document cache hit for {file_id} (version {version})")
+        return file
+
+    def put(self, file_id: str, version: str, content: bytes) -> Optional[Path]:
+        """Store the raw document JSON, dropping older versions of the same file.
+        Returns None (and stores nothing) without a version.
+        """
+        if not version:
+            return None
+        with self.store(file_id, version) as tmp:
+            tmp.write_bytes(content)
+        return self.path_for(file_id, version)
+
+    @contextmanager
+    def store(self, file_id: str, version: str):
+        """Yield a temporary path to write the document JSON to (e.g. streamed from the network).
+        It replaces older versions of the file once the block succeeds and is removed when it fails.
+        """
+        if not version:
+            raise ValueError(f"Cannot cache document {file_id} without a version")
+        path = self.path_for(file_id, version)
+        fd, name = tempfile.mkstemp(dir=self.root, prefix=f"{file_id}-", suffix=".tmp")
+        os.close(fd)
+        tmp = Path(name)
+        try:
+            yield tmp
+        except BaseException:
+            tmp.unlink(missing_ok=True)
+            raise
+        with self._lock:
+            for stale in self.root.glob(f"{file_id}-*.json"):
+                if stale != path:
+                    stale.unlink(missing_ok=True)
+            os.replace(tmp, path)
+            self.evict(keep=path)
+
+    def _entries(self):
+        """(path, stat) of the cached documents, skipping those removed by another process meanwhile."""
+        for entry in self.root.glob("*.json"):
+            try:
+                yield entry, entry.stat()
+            except FileNotFoundError:
+                continue
+
+    def size(self) -> int:
+        return sum(stat.st_size for _, stat in self._entries())
+
+    def evict(self, keep: Optional[Path] = None) -> None:
+        """Remove least recently used entries (but not keep) until the cache fits in max_bytes."""
+        entries = sorted(self._entries(), key=lambda entry: entry[1].st_mtime)
+        total = sum(stat.st_size for _, stat in entries)
+        for path, stat in entries:
+            if total <= self.max_bytes:
+                break
+            if path == keep:
+                continue
+            try:
+                path.unlink(missing_ok=True)
+            except OSError as e:  # open by a reader on Windows
+                logging.info(f"Could not evict {path.name} from the document cache: {e}")
+                continue
+            total -= stat.st_size
+            logging.info(f"Evicted {path.name} from the document cache")
+
+    def clear(self) -> None:
+        for entry in self.root.glob("*.json"):
+            entry.unlink(missing_ok=True)
@@ -0,0 +1,404 @@
+""" Headless conversion daemon.
+    Serves a local HTTP/JSON job API (on a TCP port or a Unix socket) and runs the submitted
+    conversions on the prewarmed worker pool, so every client shares one warm service and
+    one set of document and asset caches.
+
+    POST   /jobs               {"token", "url", "output"?, "nodes"?, "refresh"?, "incremental"?, "use_cache"?}
+                               (output is a directory name below .figma-converter/daemon)
+    GET    /jobs               all jobs
+    GET    /jobs/<id>          status, stage, duration and the latest log lines of a job
+    DELETE /jobs/<id>          cancel a job
+    POST   /jobs/<id>/retry    queue a failed or cancelled job again
+    GET    /jobs/<id>/result   zip archive of the build directory of the output
+    GET    /health             worker pool and queue state
+    GET    /metrics            Prometheus text-format counters of the finished conversions
+"""
+import io
+import os
+import re
+import sys
+import json
+import time
+import socket
+import zipfile
+import logging
+import argparse
+import http.client
+import socketserver
+
+from collections import deque
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from pathlib import Path
+from typing import Deque, Dict, Optional
+from urllib.parse import urlparse
+
+from engine import output_name
+from figma import (convert_url_to_file_format, get_history, get_metrics, stream_converter,
+                   init_app, DATA_DIR)
+from scheduler import JobScheduler, ConversionJob, DEFAULT_WORKERS, DONE, resolve_document_version
+from worker_pool import get_default_pool
+
+DEFAULT_HOST = "127.0.0.1"
+DEFAULT_PORT = 8765
+JOB_LOG_LINES = 200  # log lines kept per job for status requests
+JOB_OPTIONS = ("refresh", "incremental", "use_cache")
+POLL_INTERVAL = 1.0
+
+
+class DaemonError(Exception):
+    """Raised by DaemonClient when the daemon answers with an error."""
+
+
+class ConversionService:
+    """Runs the conversion jobs of the daemon on the scheduler and the worker pool."""
+
+    def __init__(self, workers: int = DEFAULT_WORKERS, pool=None, root: Optional[Path] = None):
+        self.pool = pool
+        self.root = Path(root) if root else DATA_DIR / "daemon"  # every job output stays below it
+        self.logs: Dict[int, Deque[str]] = {}
+        # identical jobs in flight (same file, selection, version and output) share one conversion
+        self.scheduler = JobScheduler(self.run_job, workers=workers, resolve_version=resolve_document_version,
+                                      history=get_history(), metrics=get_metrics())
+
+    def output_dir(self, name: str) -> Path:
+        """The output directory of a job below root. The API has no authentication, so a client
+        must not be able to point a job (and its result archive) anywhere else.
+        """
+        relative = Path(name)
+        if relative.is_absolute() or relative.drive or ".." in relative.parts or name.startswith("~"):
+            raise ValueError(f"output must be a relative path inside {self.root}")
+        root = self.root.resolve()
+        path = (root / relative).resolve()
+        if root not in path.parents:  # the root itself, or out of it through a symlink
+            raise ValueError(f"output must be a relative path inside {self.root}")
+        path.mkdir(parents=True, exist_ok=True)
+        return path
+
+    def submit(self, payload: Dict) -> ConversionJob:
+        token, url = payload.get("token"), payload.get("url")
+        if not token or not url:
+            raise ValueError("Both token and url are required")
+        nodes = payload.get("nodes")  # node ids to convert, instead of the node-id of the url
+        if nodes is not None and not (isinstance(nodes, list) and all(isinstance(node, str) for node in nodes)):
+            raise ValueError("nodes must be a list of node ids")
+        file_url = convert_url_to_file_format(url, nodes)
+        if not file_url:
+            raise ValueError(f"Not a Figma file url: {url}")
+        # by default one stable directory per file and selection so repeated jobs convert incrementally
+        output = self.output_dir(str(payload.get("output") or output_name(file_url)))
+        options = {key: bool(payload[key]) for key in JOB_OPTIONS if key in payload}
+        job = self.scheduler.submit(token, file_url, output, **options)
+        known = {job.id for job in self.scheduler.jobs()}
+        for job_id in [job_id for job_id in self.logs if job_id not in known]:
+            del self.logs[job_id]  # the scheduler no longer keeps the job
+        logging.info(f"Daemon queued job #{job.id} for {job.file_id}")
+        return job
+
+    def run_job(self, job: ConversionJob):
+        log = self.logs.setdefault(job.id, deque(maxlen=JOB_LOG_LINES))
+        result = None
+        for event in stream_converter(job.token, job.file_url, job.output_path, pool=self.pool,
+                                      cancel=job.cancel, **job.options):
+            if event.kind == "log":
+                log.append(event.message)
+            elif event.kind == "progress":
+                self.scheduler.set_stage(job, f"{event.stage} {event.done}/{event.total}")
+            elif event.kind == "result":
+                result = event.result
+        return result
+
+    def describe(self, job: ConversionJob, with_log: bool = False) -> Dict:
+        """JSON view of a job (never includes the token)."""
+        data = {
+            "id": job.id,
+            "url": job.file_url,
+            "file_id": job.file_id,
+            "output": str(job.output_path),
+            "state": job.state,
+            "stage": job.stage,
+            "attempts": job.attempts,
+            "version": job.version,
+            "submitted": job.submitted,
+            "started": job.started,
+            "finished": job.finished,
+            "duration": round(job.duration, 3),
+            "error": job.error,
+        }
+        result = job.result
+        if result is not None:
+            data["result"] = {
+                "summary": result.summary(),
+                "frame_count": result.frame_count,
+                "skipped": result.skipped,
+                "files": len(result.files),
+                "assets": len(result.assets),
+                "request_count": result.request_count,
+                "bytes_downloaded": result.bytes_downloaded,
+                "metrics": result.metrics,
+            }
+        if with_log:
+            data["log"] = list(self.logs.get(job.id, ()))
+        return data
+
+    def get(self, job_id: int) -> Optional[ConversionJob]:
+        return next((job for job in self.scheduler.jobs() if job.id == job_id), None)
+
+    def health(self) -> Dict:
+        pool = self.pool.health_check() if self.pool is not None else {}
+        return {"status": "ok", "jobs": self.scheduler.counts(), "pool": pool}
+
+
+def archive(path: Path) -> bytes:
+    """Zip the build directory the conversion wrote into path, in memory.
+    Nothing else of path is included, nor files that symlinks lead out of the build directory to.
+    """
+    build = (Path(path) / "build").resolve()
+    buffer = io.BytesIO()
+    with zipfile.ZipFile(buffer, "w", zipfile.ZIP_DEFLATED) as zf:
+        for entry in sorted(build.rglob("*")):
+            if entry.is_file() and build in entry.resolve().parents:
+                zf.write(entry, entry.relative_to(build.parent).as_posix())
+    return buffer.getvalue()
+
+
+class DaemonHandler(BaseHTTPRequestHandler):
+    """JSON API on top of ConversionService (server.service)."""
+
+    server_version = "FigmaConverterDaemon/1.0"
+
+    def address_string(self):
+        return self.client_address[0] if self.client_address else "unix"
+
+    def log_message(self, format, *args):
+        logging.info(f"Daemon {self.address_string()} {format % args}")
+
+    def send_json(self, status: int, data) -> None:
+        body = json.dumps(data).encode()
+        self.send_response(status)
+        self.send_header("Content-Type", "application/json")
+        self.send_header("Content-Length", str(len(body)))
+        self.end_headers()
+        self.wfile.write(body)
+
+    def read_json(self) -> Dict:
+        length = int(self.headers.get("Content-Length") or 0)
+        payload = json.loads(self.rfile.read(length) or b"{}")
+        if not isinstance(payload, dict):
+            raise ValueError("Expected a JSON object")
+        return payload
+
+    def route(self):
+        """(job, action) of a /jobs/<id>[/action] path, job is None when it does not exist."""
+        match = re.fullmatch(r"/jobs/(\d+)(?:/(\w+))?/?", urlparse(self.path).path)
+        if not match:
+            return None, None
+        return self.server.service.get(int(match.group(1))), match.group(2)
+
+    def do_GET(self):
+        service = self.server.service
+        path = urlparse(self.path).path.rstrip("/")
+        if path == "/health":
+            return self.send_json(200, service.health())
+        if path == "/jobs":
+            return self.send_json(200, [service.describe(job) for job in service.scheduler.jobs()])
+        if path == "/metrics":
+            body = service.scheduler.metrics.render().encode()
+            self.send_response(200)
+            self.send_header("Content-Type", "text/plain; version=0.0.4")
+            self.send_header("Content-Length", str(len(body)))
+            self.end_headers()
+            self.wfile.write(body)
+            return None
+        job, action = self.route()
+        if job is None:
+            return self.send_json(404, {"error": "No such job"})
+        if action is None:
+            return self.send_json(200, service.describe(job, with_log=True))
+        if action == "result":
+            if job.state != DONE:
+                return self.send_json(409, {"error": f"Job is {job.state}"})
+            body = archive(job.output_path)
+            self.send_response(200)
+            self.send_header("Content-Type", "application/zip")
+            self.send_header("Content-Disposition", f'attachment; filename="{job.file_id}.zip"')
+            self.send_header("Content-Length", str(len(body)))
+            self.end_headers()
+            self.wfile.write(body)
+            return None
+        return self.send_json(404, {"error": f"Unknown action {action}"})
+
+    def do_POST(self):
+        service = self.server.service
+        if urlparse(self.path).path.rstrip("/") == "/jobs":
+            try:
+                job = service.submit(self.read_json())
+            except ValueError as e:
+                return self.send_json(400, {"error": str(e)})
+            return self.send_json(202, service.describe(job))
+        job, action = self.route()
+        if job is None:
+            return self.send_json(404, {"error": "No such job"})
+        if action == "retry":
+            if service.scheduler.retry(job.id) is None:
+                return self.send_json(409, {"error": f"Job is {job.state}"})
+            return self.send_json(202, service.describe(job))
+        return self.send_json(404, {"error": f"Unknown action {action}"})
+
+    def do_DELETE(self):
+        job, action = self.route()
+        if job is None or action is not None:
+            return self.send_json(404, {"error": "No such job"})
+        self.server.service.scheduler.cancel(job.id)
+        return self.send_json(202, self.server.service.describe(job))
+
+
+class UnixHTTPServer(socketserver.ThreadingMixIn, socketserver.UnixStreamServer):
+    daemon_threads = True
+
+    def server_bind(self):
+        if os.path.exists(self.server_address):
+            os.unlink(self.server_address)  # left over from a previous run
+        super().server_bind()
+        os.chmod(self.server_address, 0o600)  # only the owner may submit jobs
+
+    def get_request(self):
+        request, _ = super().get_request()
+        return request, ("unix", 0)
+
+
+def make_server(service: ConversionService, host: str = DEFAULT_HOST, port: int = DEFAULT_PORT,
+                socket_path: Optional[str] = None):
+    if socket_path:
+        server = UnixHTTPServer(socket_path, DaemonHandler)
+    else:
+        server = ThreadingHTTPServer((host, port), DaemonHandler)
+    server.service = service
+    return server
+
+
+class _UnixConnection(http.client.HTTPConnection):
+    def __init__(self, socket_path: str, timeout: float = 60):
+        super().__init__("localhost", timeout=timeout)
+        self.socket_path = socket_path
+
+    def connect(self):
+        self.sock = socket.socket(socket.AF_UNIX, socket.SOCK_STREAM)
+        self.sock.settimeout(self.timeout)
+        self.sock.connect(self.socket_path)
+
+
+class DaemonClient:
+    """Thin client of the daemon API.
+    Args:
+            address: http://host:port of the daemon or unix:/path/to/socket
+    """
+
+    def __init__(self, address: str = f"http://{DEFAULT_HOST}:{DEFAULT_PORT}", timeout: float = 60):
+        self.address = address
+        self.timeout = timeout
+
+    def _connection(self) -> http.client.HTTPConnection:
+        if self.address.startswith("unix:"):
+            return _UnixConnection(self.address[len("unix:"):], self.timeout)
+        parsed = urlparse(self.address)
+        return http.client.HTTPConnection(parsed.hostname, parsed.port or DEFAULT_PORT, timeout=self.timeout)
+
+    def _call(self, method: str, path: str, payload: Optional[Dict] = None):
+        connection = self._connection()
+        try:
+            body = json.dumps(payload).encode() if payload is not None else None
+            headers = {"Content-Type": "application/json"} if body else {}
+            connection.request(method, path, body=body, headers=headers)
+            response = connection.getresponse()
+            data = response.read()
+        finally:
+            connection.close()
+        if response.status >= 400:
+            try:
+                message = json.loads(data).get("error", "")
+            except ValueError:
+                message = data[:200].decode(errors="replace")
+            raise DaemonError(f"{method} {path} failed with {response.status}: {message}")
+        if response.getheader("Content-Type") == "application/json":
+            return json.loads(data)
+        return data
+
+    def submit(self, token: str, url: str, output: Optional[str] = None, **options) -> Dict:
+        payload = {"token": token, "url": url, **options}
+        if output:
+            payload["output"] = str(output)
+        return self._call("POST", "/jobs", payload)
+
+    def status(self, job_id: int) -> Dict:
+        return self._call("GET", f"/jobs/{job_id}")
+
+    def jobs(self) -> list:
+        return self._call("GET", "/jobs")
+
+    def cancel(self, job_id: int) -> Dict:
+        return self._call("DELETE", f"/jobs/{job_id}")
+
+    def retry(self, job_id: int) -> Dict:
+        return self._call("POST", f"/jobs/{job_id}/retry")
+
+    def result(self, job_id: int) -> bytes:
+        """The output directory of a finished job as zip bytes."""
+        return self._call("GET", f"/jobs/{job_id}/result")
+
+    def health(self) -> Dict:
+        return self._call("GET", "/health")
+
+    def wait(self, job_id: int, interval: float = POLL_INTERVAL, on_status=None) -> Dict:
+        """Poll until the job is finished and return its last status."""
+        while True:
+            status = self.status(job_id)
+            if on_status is not None:
+                on_status(status)
+            if status["state"] not in ("queued", "running"):
+                return status
+            time.sleep(interval)
+
+    def download(self, job_id: int, target: Path) -> Path:
+        """Extract the result archive of a finished job into target."""
+        target = Path(target)
+        target.mkdir(parents=True, exist_ok=True)
+        with zipfile.ZipFile(io.BytesIO(self.result(job_id))) as zf:
+            zf.extractall(target)
+        return target
+
+
+def parse_args(argv=None):
+    parser = argparse.ArgumentParser(description="Run the Figma converter as a local job service")
+    parser.add_argument("--host", default=os.environ.get("FIGMA_DAEMON_HOST", DEFAULT_HOST),
+                        help="address to listen on (keep it local, the API has no authentication)")
+    parser.add_argument("--port", type=int, default=int(os.environ.get("FIGMA_DAEMON_PORT", DEFAULT_PORT)))
+    parser.add_argument("--socket", help="listen on this Unix socket instead of a TCP port")
+    parser.add_argument("--workers", type=int, default=DEFAULT_WORKERS, help="jobs converted at the same time")
+    parser.add_argument("--no-pool", action="store_true", help="convert in the daemon process instead of the worker pool")
+    return parser.parse_args(argv)
+
+
+def main(argv=None):
+    args = parse_args(argv)
+    init_app()
+    pool = None
+    if not args.no_pool:
+        pool = get_default_pool(size=int(os.environ.get("FIGMA_POOL_SIZE", max(args.workers, 1))))
+    server = make_server(ConversionService(args.workers, pool), args.host, args.port, args.socket)
+    where = f"unix:{args.socket}" if args.socket else f"http://{args.host}:{args.port}"
+    logging.info(f"Conversion daemon listening on {where} (data in {DATA_DIR})")
+    try:
+        server.serve_forever()
+    except KeyboardInterrupt:
+        logging.info("Conversion daemon stopped")
+    finally:
+        server.server_close()
+        if pool is not None:
+            pool.shutdown()
+        if args.socket and os.path.exists(args.socket):
+            os.unlink(args.socket)
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
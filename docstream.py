@@ -0,0 +1,156 @@
+""" Page by page reading of Figma file JSON.
+    A file's pages are the items of document.children. DocumentReader yields them one at a
+    time from the JSON on disk, so only the page being converted (not the whole file) is held
+    as Python objects. The standard library reader decodes each page with raw_decode from a
+    buffer that grows until the page is complete; ijson is used instead when it is installed
+    with a C backend.
+"""
+import os
+import json
+import codecs
+
+from pathlib import Path
+from typing import Dict, Iterator
+
+CHUNK_SIZE = 1024 * 1024
+_WHITESPACE = " \t\n\r"
+_FAST_IJSON_BACKENDS = ("yajl2_c", "yajl2_cffi")
+
+
+def _ijson():
+    """The ijson module when it has a C backend (the pure Python one is slower than raw_decode)."""
+    try:
+        import ijson
+    except ImportError:
+        return None
+    return ijson if getattr(ijson, "backend", None) in _FAST_IJSON_BACKENDS else None
+
+
+class DocumentReader:
+    """Iterate over the pages of a file JSON without loading the rest of it.
+    Args:
+            path: the file JSON as GET /v1/files/<id> answers it, a path or a file opened in
+                binary mode (which is left open)
+            use_ijson: False forces the standard library reader
+    """
+
+    def __init__(self, path, chunk_size: int = CHUNK_SIZE, use_ijson: bool = True):
+        self._owned = not hasattr(path, "read")
+        self.file = open(Path(path), "rb") if self._owned else path
+        self.name = Path(str(getattr(self.file, "name", "document"))).name  # for error messages
+        self.size = os.fstat(self.file.fileno()).st_size
+        self.chunk_size = chunk_size
+        self.ijson = _ijson() if use_ijson else None
+        self._decoder = codecs.getincrementaldecoder("utf-8")()
+        self._json = json.JSONDecoder()
+        self._buf = ""
+        self._pos = 0
+        self._eof = False
+        self._largest = 0  # characters of the largest value so far, pages tend to be alike
+        self._closed = False
+
+    @property
+    def bytes_read(self) -> int:
+        """Bytes of the file consumed so far, for progress reports."""
+        return self.size if self._closed or self.file.closed else self.file.tell()
+
+    def close(self) -> None:
+        if self._owned:
+            self.file.close()
+        self._closed = True
+
+    def __enter__(self) -> "DocumentReader":
+        return self
+
+    def __exit__(self, *exc) -> None:
+        self.close()
+
+    def pages(self) -> Iterator[Dict]:
+        if self.ijson is not None:
+            yield from self.ijson.items(self.file, "document.children.item", use_float=True)
+            return
+        self._expect("{")
+        for key in self._keys():
+            if key != "document":
+                self._value()  # name, version, components, styles, ...
+                continue
+            self._expect("{")
+            for document_key in self._keys():
+                if document_key != "children":
+                    self._value()
+                    continue
+                self._expect("[")
+                while self._peek() != "]":
+                    yield self._value()
+                    if self._peek() == ",":
+                        self._pos += 1
+                self._pos += 1
+            return
+
+    # ---------------------------------------------standard library reader----------------
+    def _read(self, size: int) -> bool:
+        """Append up to size more bytes of the file to the buffer, False at the end of the file."""
+        data = self.file.read(size)
+        self._eof = not data
+        text = self._decoder.decode(data, final=self._eof)
+        self._buf = self._buf[self._pos:] + text  # drop what was already consumed
+        self._pos = 0
+        return not self._eof
+
+    def _peek(self) -> str:
+        """The next character that is not whitespace (the cursor is moved onto it)."""
+        while True:
+            while self._pos < len(self._buf) and self._buf[self._pos] in _WHITESPACE:
+                self._pos += 1
+            if self._pos < len(self._buf):
+                return self._buf[self._pos]
+            if not self._read(self.chunk_size):
+                raise ValueError(f"Unexpected end of {self.name}")
+
+    def _expect(self, char: str) -> None:
+        found = self._peek()
+        if found != char:
+            raise ValueError(f"Expected {char!r} but found {found!r} at byte {self.bytes_read} of {self.name}")
+        self._pos += 1
+
+    def _value(self):
+        """Decode the next value. The buffer doubles until it holds the whole value, so the
+        work stays linear and the memory bounded by the largest single value. Reading as much
+        as the largest value so far first saves the failed attempts on pages of similar size.
+        """
+        self._peek()
+        if len(self._buf) - self._pos < self._largest and not self._eof:
+            self._read(self._largest - (len(self._buf) - self._pos))
+        while True:
+            try:
+                value, end = self._json.raw_decode(self._buf, self._pos)
+                # a number cut at the end of the buffer decodes too early, so only trust it before the end
+                if end < len(self._buf) or self._eof:
+                    self._largest = max(self._largest, end - self._pos)
+                    self._pos = end
+                    return value
+            except json.JSONDecodeError:
+                if self._eof:
+                    raise
+            self._read(max(self.chunk_size, len(self._buf) - self._pos))
+
+    def _keys(self) -> Iterator[str]:
+        """Keys of the object the cursor is in, each followed by its value at the cursor."""
+        while True:
+            char = self._peek()
+            if char == ",":
+                self._pos += 1
+                char = self._peek()
+            if char == "}":
+                self._pos += 1
+                return
+            key = self._value()
+            self._expect(":")
+            yield key
+
+
+def iter_pages(path, use_ijson: bool = True) -> Iterator[Dict]:
+    """Pages of the file JSON at path, one at a time."""
+    with DocumentReader(path, use_ijson=use_ijson) as reader:
+        yield from reader.pages()
+
@@ -0,0 +1,686 @@
+""" In-process Figma to tkinter conversion engine.
+    Fetches the Figma document over a pooled keep-alive session and turns the frames
+    into tkinter code without spawning `tkdesigner` for every conversion.
+"""
+import os
+import re
+import json
+import time
+import hashlib
+import logging
+import tempfile
+import threading
+
+from contextlib import contextmanager
+from dataclasses import dataclass, field
+from pathlib import Path
+from typing import TYPE_CHECKING, Callable, Dict, List, Optional
+from urllib.parse import parse_qs, urlparse
+
+from errors import FigmaAPIError, ConversionCancelled, ConversionTimeout  # re-exported for callers
+from assets import AssetRequest, download_assets
+from asset_store import image_fill, render_key
+from docstream import DocumentReader
+from incremental import OutputManifest, frame_entry
+from metrics import ConversionMetrics
+
+if TYPE_CHECKING:
+    import requests  # imported on first use, it is slow to import and only needed to talk to Figma
+
+FIGMA_API_URL = "https://api.figma.com/v1"  # FIGMA_API_URL in the environment overrides it (fake_figma.py)
+REQUEST_TIMEOUT = 60
+DOWNLOAD_CHUNK = 1024 * 1024
+
+_session: Optional["requests.Session"] = None
+_session_lock = threading.Lock()
+
+
+def get_session() -> "requests.Session":
+    """Return the process wide keep-alive session (created on first use)."""
+    global _session
+    with _session_lock:
+        if _session is None:
+            import requests
+            from requests.adapters import HTTPAdapter
+
+            session = requests.Session()
+            adapter = HTTPAdapter(pool_connections=4, pool_maxsize=16, max_retries=2)
+            session.mount("https://", adapter)
+            session.mount("http://", adapter)
+            session.headers.update({"Accept-Encoding": "gzip, deflate"})
+            _session = session
+        return _session
+
+
+def check_cancelled(cancel) -> None:
+    """Raise ConversionCancelled once the cancel event (a threading.Event or None) is set."""
+    if cancel is not None and cancel.is_set():
+        raise ConversionCancelled("Conversion cancelled")
+
+
+class FigmaClient:
+    """Thin wrapper around the Figma REST API using the shared session."""
+
+    def __init__(self, token: str, session: Optional["requests.Session"] = None, api_url: Optional[str] = None):
+        self.token = token
+        self.session = session or get_session()
+        self.api_url = (api_url or os.environ.get("FIGMA_API_URL") or FIGMA_API_URL).rstrip("/")
+        self.request_count = 0
+        self.bytes_downloaded = 0
+        self._counter_lock = threading.Lock()  # downloads run on a thread pool
+
+    def _count(self, size: int, requests: int = 1) -> None:
+        with self._counter_lock:
+            self.request_count += requests
+            self.bytes_downloaded += size
+
+    def _request(self, endpoint: str, params: Optional[Dict] = None, headers: Optional[Dict] = None,
+                 allow=(200,), stream: bool = False) -> "requests.Response":
+        url = f"{self.api_url}/{endpoint.lstrip('/')}"
+        response = self.session.get(
+            url, params=params, headers={"X-Figma-Token": self.token, **(headers or {})}, timeout=REQUEST_TIMEOUT,
+            stream=stream,
+        )
+        self._count(0 if stream else len(response.content))  # a streamed body is counted as it is read
+        if response.status_code not in allow:
+            retry_after = response.headers.get("Retry-After")
+            raise FigmaAPIError(
+                f"GET {endpoint} failed with {response.status_code}: {response.text[:200]}",
+                status_code=response.status_code,
+                retry_after=float(retry_after) if retry_after and retry_after.isdigit() else None,
+            )
+        return response
+
+    def _get(self, endpoint: str, params: Optional[Dict] = None) -> Dict:
+        return self._request(endpoint, params).json()
+
+    def get_file(self, file_id: str, **params) -> Dict:
+        """Fetch the whole file document."""
+        return self._get(f"files/{file_id}", params or None)
+
+    def get_file_bytes(self, file_id: str, **params) -> bytes:
+        """Fetch the file document as raw JSON bytes (what the document cache stores)."""
+        return self._request(f"files/{file_id}", params or None).content
+
+    def download_file(self, file_id: str, target, **params) -> int:
+        """Stream the file document to target on disk and return its size, it is never held in memory."""
+        size = 0
+        with self._request(f"files/{file_id}", params or None, stream=True) as response, open(target, "wb") as f:
+            for chunk in response.iter_content(DOWNLOAD_CHUNK):
+                f.write(chunk)
+                size += len(chunk)
+        self._count(size, requests=0)
+        return size
+
+    def get_nodes(self, file_id: str, ids: List[str], depth: Optional[int] = None) -> Dict[str, Optional[Dict]]:
+        """Fetch only the given nodes (down to depth levels below them), a mapping of node id
+        to {"document": node, ...}, or None for an id that is not in the file.
+        """
+        params = {"ids": ",".join(ids)}
+        if depth is not None:
+            params["depth"] = depth
+        return self._get(f"files/{file_id}/nodes", params).get("nodes") or {}
+
+    def get_pages(self, file_id: str, depth: int = 1) -> List[Dict]:
+        """The pages of the file, depth=1 for their names only, 2 to include their top level frames."""
+        return self._get(f"files/{file_id}", {"depth": depth}).get("document", {}).get("children", [])
+
+    def get_file_meta(self, file_id: str) -> Dict:
+        """Cheap metadata request: the document without its page contents."""
+        data = self._get(f"files/{file_id}", {"depth": 1})
+        return {key: data.get(key) for key in ("name", "version", "lastModified")}
+
+    def get_file_meta_if_changed(self, file_id: str, validators: Dict) -> Optional[Dict]:
+        """Conditional metadata request, None when Figma answers 304 Not Modified.
+        validators keeps the ETag / Last-Modified of the previous answer and is updated in place.
+        """
+        headers = {}
+        if validators.get("etag"):
+            headers["If-None-Match"] = validators["etag"]
+        if validators.get("last_modified"):
+            headers["If-Modified-Since"] = validators["last_modified"]
+        response = self._request(f"files/{file_id}", {"depth": 1}, headers, allow=(200, 304))
+        if response.status_code == 304:
+            return None
+        validators["etag"] = response.headers.get("ETag")
+        validators["last_modified"] = response.headers.get("Last-Modified")
+        data = response.json()
+        return {key: data.get(key) for key in ("name", "version", "lastModified")}
+
+    def get_image_urls(self, file_id: str, ids: List[str], fmt: str = "png", scale: float = 1) -> Dict[str, str]:
+        """Render the given nodes and return a mapping of node id to download url."""
+        if not ids:
+            return {}
+        data = self._get(f"images/{file_id}", {"ids": ",".join(ids), "format": fmt, "scale": scale})
+        if data.get("err"):
+            raise FigmaAPIError(f"Image export failed: {data['err']}")
+        return data.get("images") or {}
+
+    def get_image_fills(self, file_id: str) -> Dict[str, str]:
+        """Download urls of the raw images of every image fill in the file, by imageRef."""
+        return self._get(f"files/{file_id}/images").get("meta", {}).get("images") or {}
+
+    def download(self, url: str) -> bytes:
+        """Download an exported asset (no token, the urls are pre-signed)."""
+        response = self.session.get(url, timeout=REQUEST_TIMEOUT)
+        response.raise_for_status()
+        self._count(len(response.content))
+        return response.content
+
+
+@dataclass
+class ConversionResult:
+    """Structured outcome of a single conversion."""
+    file_id: str
+    output_path: Path
+    files: List[Path] = field(default_factory=list)
+    assets: List[Path] = field(default_factory=list)
+    frame_count: int = 0
+    skipped: int = 0
+    request_count: int = 0
+    bytes_downloaded: int = 0
+    duration: float = 0.0
+    log: str = ""
+    metrics: Dict = field(default_factory=dict)  # per-stage seconds, bytes and requests (metrics.py)
+
+    @property
+    def success(self) -> bool:
+        return self.frame_count > 0
+
+    def summary(self) -> str:
+        return (
+            f"{self.frame_count} frame(s) ({self.skipped} unchanged), {len(self.assets)} asset(s) "
+            f"written to {self.output_path} "
+            f"in {self.duration:.2f}s ({self.request_count} requests, {self.bytes_downloaded} bytes)"
+        )
+
+
+def extract_file_id(file_url: str) -> str:
+    """Extract the Figma file id from a file/design url."""
+    if match := re.search(r"figma.com/(?:file|design)/([0-9A-Za-z]+)", file_url):
+        return match.group(1)
+    raise ValueError(f"Could not extract Figma file ID from URL: {file_url}")
+
+
+def extract_node_ids(file_url: str) -> List[str]:
+    """Node ids of the node-id parameter of a url (1-2 in links, 1:2 in the API), [] for the whole file."""
+    node_ids: List[str] = []
+    for value in parse_qs(urlparse(file_url).query).get("node-id", []):
+        for node_id in value.split(","):
+            node_id = node_id.strip().replace("-", ":")
+            if node_id and node_id not in node_ids:
+                node_ids.append(node_id)
+    return node_ids
+
+
+def safe_node_id(node_id: str) -> str:
+    """A node id (1:2, I1:2;3:4) usable in file names."""
+    return re.sub(r"[^0-9A-Za-z]+", "-", node_id)
+
+
+def output_name(file_url: str) -> str:
+    """Directory name for the output of a url: the file id, followed by the selected node ids
+    (or a short hash of them when there are many), so two selections never share a directory.
+    """
+    file_id = extract_file_id(file_url)
+    node_ids = extract_node_ids(file_url)
+    if not node_ids:
+        return file_id
+    selection = "_".join(safe_node_id(node_id) for node_id in node_ids)
+    if len(selection) > 40:
+        selection = hashlib.sha1(",".join(node_ids).encode()).hexdigest()[:12]
+    return f"{file_id}_{selection}"
+
+
+# ----------------------------------------------CODE GENERATION---------------------------
+def color_to_hex(color: Dict) -> str:
+    """Convert a Figma rgba (0..1 floats) color to a tkinter hex string."""
+    r, g, b = (int(round(color.get(c, 0) * 255)) for c in ("r", "g", "b"))
+    return f"#{r:02X}{g:02X}{b:02X}"
+
+
+def solid_fill(node: Dict, default: str = "#FFFFFF") -> str:
+    for fill in node.get("fills") or []:
+        if fill.get("type") == "SOLID" and fill.get("visible", True):
+            return color_to_hex(fill["color"])
+    return default
+
+
+def classify(node: Dict) -> Optional[str]:
+    """Decide how a frame child is rendered; None means it is skipped."""
+    if not node.get("visible", True) or "absoluteBoundingBox" not in node:
+        return None
+    name = node.get("name", "").strip().lower()
+    node_type = node.get("type")
+    if name.startswith("button"):
+        return "button"
+    if name.startswith("textbox"):
+        return "textbox"
+    if name.startswith("textarea"):
+        return "textarea"
+    if name.startswith("image"):
+        return "image"
+    if node_type == "TEXT":
+        return "text"
+    if node_type == "RECTANGLE" and all(f.get("type") == "SOLID" for f in node.get("fills") or []):
+        return "rectangle"
+    # vectors, groups, components and image fills are rendered by Figma
+    return "image"
+
+
+def page_frames(page: Dict):
+    """Yield the top level frames of a page."""
+    for node in page.get("children", []):
+        if node.get("type") in ("FRAME", "COMPONENT", "INSTANCE") and node.get("visible", True):
+            yield node
+
+
+def find_pages(pages: List[Dict], names: List[str]) -> List[Dict]:
+    """The pages matching names, each a page id (0:1 or 0-1) or a page name in any case."""
+    found: List[Dict] = []
+    for name in names:
+        wanted = name.strip()
+        matches = [page for page in pages
+                   if page.get("id") == wanted.replace("-", ":") or page.get("name", "").strip().lower() == wanted.lower()]
+        if not matches:
+            available = ", ".join(f"{page.get('name')} ({page.get('id')})" for page in pages)
+            raise ValueError(f"No page '{name}' in the file, its pages are: {available}")
+        found += [page for page in matches if page not in found]
+    return found
+
+
+def iter_frames(document: Dict):
+    """Yield (page, frame) for every top level frame of every page."""
+    for page in document.get("children", []):
+        for node in page_frames(page):
+            yield page, node
+
+
+EXPORTED_KINDS = ("button", "textbox", "textarea", "image")
+
+
+def asset_name(node: Dict, index: int) -> str:
+    kind = classify(node)
+    return f"{'entry' if kind in ('textbox', 'textarea') else kind}_{index}.png"
+
+
+FRAME_TEMPLATE = '''
+# This file was generated by the Figma converter engine
+
+
+from pathlib import Path
+
+from tkinter import Tk, Canvas, Entry, Text, Button, PhotoImage
+
+
+OUTPUT_PATH = Path(__file__).parent
+ASSETS_PATH = OUTPUT_PATH / Path(r"assets/{assets_dir}")
+
+
+def relative_to_assets(path: str) -> Path:
+    return ASSETS_PATH / Path(path)
+
+
+window = Tk()
+
+window.geometry("{width}x{height}")
+window.configure(bg = "{bg}")
+
+
+canvas = Canvas(
+    window,
+    bg = "{bg}",
+    height = {height},
+    width = {width},
+    bd = 0,
+    highlightthickness = 0,
+    relief = "ridge"
+)
+
+canvas.place(x = 0, y = 0)
+{elements}
+window.resizable(False, False)
+window.mainloop()
+'''
+
+
+def generate_element(node: Dict, frame_box: Dict, index: int) -> str:
+    """Generate the tkinter code for one direct child of a frame."""
+    kind = classify(node)
+    box = node["absoluteBoundingBox"]
+    x = int(box["x"] - frame_box["x"])
+    y = int(box["y"] - frame_box["y"])
+    width, height = int(box["width"]), int(box["height"])
+    image = asset_name(node, index)
+
+    if kind == "rectangle":
+        return (
+            f"canvas.create_rectangle(\n    {x}.0,\n    {y}.0,\n    {x + width}.0,\n    {y + height}.0,\n"
+            f'    fill="{solid_fill(node, "#000000")}",\n    outline="")\n'
+        )
+    if kind == "text":
+        style = node.get("style", {})
+        characters = node.get("characters", "").replace("\\", "\\\\").replace('"', '\\"').replace("\n", "\\n")
+        font = f'("{style.get("fontFamily", "Inter")}", {int(style.get("fontSize", 12)) * -1})'
+        return (
+            f"canvas.create_text(\n    {x}.0,\n    {y}.0,\n    anchor=\"nw\",\n"
+            f'    text="{characters}",\n    fill="{solid_fill(node, "#000000")}",\n    font={font}\n)\n'
+        )
+    if kind == "button":
+        return (
+            f'button_image_{index} = PhotoImage(\n    file=relative_to_assets("{image}"))\n'
+            f"button_{index} = Button(\n    image=button_image_{index},\n    borderwidth=0,\n"
+            f"    highlightthickness=0,\n    command=lambda: print(\"button_{index} clicked\"),\n"
+            f'    relief="flat"\n)\nbutton_{index}.place(\n    x={x}.0,\n    y={y}.0,\n'
+            f"    width={width}.0,\n    height={height}.0\n)\n"
+        )
+    if kind in ("textbox", "textarea"):
+        widget = "Entry" if kind == "textbox" else "Text"
+        bg = solid_fill(node)
+        return (
+            f'entry_image_{index} = PhotoImage(\n    file=relative_to_assets("{image}"))\n'
+            f"entry_bg_{index} = canvas.create_image(\n    {x + width / 2},\n    {y + height / 2},\n"
+            f"    image=entry_image_{index}\n)\n"
+            f'entry_{index} = {widget}(\n    bd=0,\n    bg="{bg}",\n    fg="#000716",\n    highlightthickness=0\n)\n'
+            f"entry_{index}.place(\n    x={x}.0,\n    y={y}.0,\n    width={width}.0,\n    height={height}.0\n)\n"
+        )
+    return (
+        f'image_image_{index} = PhotoImage(\n    file=relative_to_assets("{image}"))\n'
+        f"image_{index} = canvas.create_image(\n    {x + width / 2},\n    {y + height / 2},\n"
+        f"    image=image_image_{index}\n)\n"
+    )
+
+
+def generate_frame_code(frame: Dict, assets_dir: str) -> str:
+    """Generate a complete tkinter script for a frame."""
+    frame_box = frame["absoluteBoundingBox"]
+    elements = [
+        generate_element(child, frame_box, index)
+        for index, child in enumerate(frame.get("children", []), start=1)
+        if classify(child)
+    ]
+    return FRAME_TEMPLATE.format(
+        assets_dir=assets_dir,
+        width=int(frame_box["width"]),
+        height=int(frame_box["height"]),
+        bg=solid_fill(frame),
+        elements="\n" + "\n".join(elements),
+    )
+
+
+def frame_script_name(index: int, single: bool) -> str:
+    """gui.py for the only frame of a file, gui<index>.py otherwise."""
+    return "gui.py" if single else f"gui{index}.py"
+
+
+def frame_paths(build_dir: Path, frame: Dict, index: int, single: bool, partial: bool = False):
+    """(script, assets folder) of a frame. A partial conversion always names them after the frame id
+    (gui.py is only for the frame of a full single frame conversion), so a selection never
+    overwrites the other frames an earlier conversion left in build_dir.
+    """
+    if not partial:
+        return build_dir / frame_script_name(index, single), build_dir / "assets" / f"frame{index}"
+    key = safe_node_id(frame["id"])
+    return build_dir / f"gui_{key}.py", build_dir / "assets" / f"frame_{key}"
+
+
+# ----------------------------------------------CONVERSION--------------------------------
+@contextmanager
+def fetch_document(client: FigmaClient, file_id: str, cache=None, refresh: bool = False,
+                   metrics: Optional[ConversionMetrics] = None):
+    """Yield the file JSON on disk opened for binary reading, reusing the cached copy while its
+    version is current. The download is streamed to disk (into the cache, or a temporary file
+    removed afterwards), so the raw JSON is never held in memory. A document without a version
+    is never cached.
+    Args:
+            cache: a cache.DocumentCache, or None to always download
+            refresh: skip the cached copy but store the fresh download
+            metrics: records the metadata and document_fetch stages
+    """
+    metrics = metrics or ConversionMetrics()
+    version = ""
+    if cache is not None:
+        with metrics.stage("metadata", client):
+            version = client.get_file_meta(file_id).get("version") or ""
+        if not version:
+            logging.info(f"Figma document {file_id} has no version, not caching it")
+    if version:
+        document = None if refresh else cache.open(file_id, version)
+        if document is None:
+            logging.info(f"Fetching Figma document {file_id} (version {version})")
+            with metrics.stage("document_fetch", client), cache.store(file_id, version) as tmp:
+                client.download_file(file_id, tmp)
+            document = open(cache.path_for(file_id, version), "rb")
+        else:
+            # served from the cache, no request
+            metrics.add("document_fetch", bytes=os.fstat(document.fileno()).st_size)
+        with document:
+            yield document
+        return
+
+    logging.info(f"Fetching Figma document {file_id}")
+    fd, name = tempfile.mkstemp(prefix=f"figma-{file_id}-", suffix=".json")
+    os.close(fd)
+    try:
+        with metrics.stage("document_fetch", client):
+            client.download_file(file_id, name)
+        with open(name, "rb") as document:
+            yield document
+    finally:
+        Path(name).unlink(missing_ok=True)
+
+
+def load_document(client: FigmaClient, file_id: str, cache=None, refresh: bool = False,
+                  metrics: Optional[ConversionMetrics] = None) -> Dict:
+    """Fetch the whole file JSON as one dict (see fetch_document for the arguments).
+    convert() does not use it, it reads the document page by page.
+    """
+    metrics = metrics or ConversionMetrics()
+    with fetch_document(client, file_id, cache, refresh, metrics) as document:
+        with metrics.stage("parse"):
+            parsed = json.load(document)
+        metrics.add("parse", bytes=os.fstat(document.fileno()).st_size)
+    return parsed
+
+
+def fetch_frames(client: FigmaClient, file_id: str, node_ids: List[str],
+                 metrics: Optional[ConversionMetrics] = None) -> List[Dict]:
+    """Fetch only the selected nodes (GET /files/<id>/nodes) and return the frames to convert.
+    A page id stands for its top level frames, any other node with a bounding box is converted
+    as a frame of its own. The rest of the file is never downloaded.
+    """
+    metrics = metrics or ConversionMetrics()
+    logging.info(f"Fetching {len(node_ids)} node(s) of Figma document {file_id}")
+    with metrics.stage("document_fetch", client):
+        nodes = client.get_nodes(file_id, node_ids)
+    frames: List[Dict] = []
+    with metrics.stage("parse"):
+        for node_id in node_ids:
+            node = (nodes.get(node_id) or {}).get("document")
+            if node is None:
+                raise FigmaAPIError(f"Node {node_id} was not found in the Figma file", status_code=404)
+            if node.get("type") == "DOCUMENT":
+                selected = [frame for _, frame in iter_frames(node)]
+            elif node.get("type") == "CANVAS":
+                selected = list(page_frames(node))
+            elif "absoluteBoundingBox" in node:
+                selected = [node]
+            else:
+                raise FigmaAPIError(f"Node {node_id} ({node.get('type')}) is not a page or a frame")
+            frames += [frame for frame in selected if all(frame["id"] != other["id"] for other in frames)]
+    return frames
+
+
+@contextmanager
+def open_frames(client: FigmaClient, file_id: str, node_ids: Optional[List[str]] = None, cache=None,
+                refresh: bool = False, metrics: Optional[ConversionMetrics] = None,
+                progress: Optional[Callable[[str, int, int], None]] = None):
+    """Yield an iterator over the top level frames to convert.
+    With node_ids only those nodes are fetched (the document cache is not used), otherwise the whole
+    file is streamed from disk page by page and progress("document", kb, total_kb) follows the decoding.
+    """
+    progress = progress or (lambda stage, done, total: None)
+    metrics = metrics or ConversionMetrics()
+    if node_ids:
+        yield iter(fetch_frames(client, file_id, node_ids, metrics))
+        return
+
+    with fetch_document(client, file_id, cache, refresh, metrics) as document, DocumentReader(document) as reader:
+        total_kb = max(1, reader.size // 1024)
+
+        def frames():
+            for frame in stream_frames(reader, metrics):
+                progress("document", min(reader.bytes_read // 1024, total_kb), total_kb)
+                yield frame
+
+        yield frames()
+
+
+def stream_frames(reader: DocumentReader, metrics: ConversionMetrics):
+    """Yield the top level frames page by page. A page is decoded only when the frames before
+    it are done and dropped after its last frame, so memory follows the largest page.
+    """
+    pages = reader.pages()
+    while True:
+        start, before = time.perf_counter(), reader.bytes_read
+        page = next(pages, None)
+        metrics.add("parse", time.perf_counter() - start, reader.bytes_read - before)
+        if page is None:
+            return
+        yield from page_frames(page)
+
+
+def with_last(items):
+    """Yield (item, is_last) with a lookahead of one item."""
+    iterator = iter(items)
+    previous = next(iterator, None)
+    for item in iterator:
+        yield previous, False
+        previous = item
+    if previous is not None:
+        yield previous, True
+
+
+def convert_frame(frame: Dict, script: Path, assets_dir: Path, result: ConversionResult,
+                  reuse: Optional[set] = None, keyed: bool = False,
+                  metrics: Optional[ConversionMetrics] = None) -> List[AssetRequest]:
+    """Write the script of one frame and return the assets it still needs.
+    Args:
+            reuse: ids of children whose existing asset file can be kept as is
+            keyed: compute the asset store render key of every asset
+            metrics: records the codegen and file_write stages
+    """
+    metrics = metrics or ConversionMetrics()
+    assets_dir.mkdir(parents=True, exist_ok=True)
+    reuse = reuse or set()
+
+    pending = []
+    for position, child in enumerate(frame.get("children", []), start=1):
+        if classify(child) not in EXPORTED_KINDS:
+            continue
+        asset_path = assets_dir / asset_name(child, position)
+        if child["id"] in reuse and asset_path.exists():
+            result.assets.append(asset_path)
+            continue
+        request = AssetRequest(child["id"], asset_path)
+        if keyed:
+            request.key = render_key(child, result.file_id)
+            fill = image_fill(child)
+            if fill is not None:
+                box = child["absoluteBoundingBox"]
+                request.image_ref, request.scale_mode = fill["imageRef"], fill.get("scaleMode", "FILL")
+                request.size = (box["width"], box["height"])
+        pending.append(request)
+
+    with metrics.stage("codegen"):
+        code = generate_frame_code(frame, assets_dir.name).encode("utf-8")
+    with metrics.stage("file_write"):
+        script.write_bytes(code)
+    metrics.add("file_write", bytes=len(code))
+    result.files.append(script)
+    logging.info(f"Generated {script.name} for frame '{frame.get('name')}'")
+    return pending
+
+
+def convert(token: str, file_url: str, output_path, client: Optional[FigmaClient] = None,
+            cache=None, refresh: bool = False, incremental: bool = True,
+            asset_store=None, progress: Optional[Callable[[str, int, int], None]] = None,
+            cancel=None, metrics: Optional[ConversionMetrics] = None,
+            node_ids: Optional[List[str]] = None) -> ConversionResult:
+    """Convert a Figma file into tkinter code in the current process.
+    With incremental=True, frames whose subtree hash matches the manifest of a previous
+    run in the same output directory are left untouched. An asset_store.AssetStore
+    lets assets seen in earlier conversions be placed without downloading them.
+    progress(stage, done, total) is called as the conversion advances and setting the
+    cancel event stops it with ConversionCancelled at the next frame or asset.
+    Stage timings go into metrics (a new metrics.ConversionMetrics by default) and result.metrics.
+    The document is streamed to disk and decoded one page at a time, its frames converted before
+    the next page is read; the "document" progress stage counts the KB decoded so far.
+    node_ids (by default the node-id of file_url) limits the conversion to those pages and frames,
+    fetched on their own; frames of earlier conversions in the same directory are kept.
+    """
+    progress = progress or (lambda stage, done, total: None)
+    metrics = metrics or ConversionMetrics()
+    keyed = asset_store is not None
+    start = time.perf_counter()
+    file_id = extract_file_id(file_url)
+    node_ids = extract_node_ids(file_url) if node_ids is None else node_ids
+    client = client or FigmaClient(token)
+    build_dir = Path(output_path) / "build"
+    build_dir.mkdir(parents=True, exist_ok=True)
+    result = ConversionResult(file_id=file_id, output_path=build_dir)
+    manifest = OutputManifest(build_dir) if incremental else None
+
+    entries = {}
+    pending: List[AssetRequest] = []
+    frame_count = 0
+    progress("document", 0, 1)
+    with open_frames(client, file_id, node_ids, cache, refresh, metrics, progress) as frames:
+        # frames are converted while their page is parsed, the lookahead only tells if there is a single one
+        for frame, last in with_last(frames):
+            check_cancelled(cancel)
+            index = frame_count
+            frame_count += 1
+            script, assets_dir = frame_paths(build_dir, frame, index, index == 0 and last, bool(node_ids))
+            if node_ids and manifest is not None and frame["id"] in manifest.frames:
+                # a frame converted before keeps its file names
+                previous = manifest.frames[frame["id"]]
+                script, assets_dir = build_dir / previous["script"], build_dir / "assets" / previous["assets"]
+            if manifest is None:
+                pending += convert_frame(frame, script, assets_dir, result, keyed=keyed, metrics=metrics)
+                continue
+
+            with metrics.stage("codegen"):  # hashing the subtree decides what to regenerate
+                entry = frame_entry(frame, script.name, assets_dir.name)
+            entries[frame["id"]] = entry
+            if manifest.is_current(frame["id"], entry):
+                result.skipped += 1
+                continue
+            reuse = manifest.unchanged_children(frame["id"], entry)
+            pending += convert_frame(frame, script, assets_dir, result, reuse, keyed, metrics)
+    if not frame_count:
+        where = "the selected nodes" if node_ids else "the Figma document"
+        raise FigmaAPIError(f"No frames found in {where}")
+    progress("document", 1, 1)
+    progress("frames", frame_count, frame_count)
+
+    # all frames share the batched export calls and the download pool
+    result.assets += download_assets(
+        client, file_id, pending, store=asset_store, progress=progress, cancel=cancel, metrics=metrics
+    )
+
+    if manifest is not None:
+        with metrics.stage("file_write"):
+            # a partial run leaves the other frames of earlier conversions in place
+            frames = manifest.merged(entries) if node_ids else entries
+            manifest.remove_stale(frames)
+            manifest.save(frames)
+        if result.skipped:
+            logging.info(f"{result.skipped} unchanged frame(s) skipped")
+
+    result.frame_count = frame_count
+    result.request_count = client.request_count
+    result.bytes_downloaded = client.bytes_downloaded
+    result.duration = time.perf_counter() - start
+    result.metrics = metrics.to_dict()
+    return result
@@ -0,0 +1,20 @@
+""" Exceptions shared by the conversion modules. """
+
+
+class FigmaAPIError(Exception):
+    """Raised when the Figma API answers with an error.
+    status_code and retry_after (seconds, from a 429 answer) are set when known.
+    """
+
+    def __init__(self, message: str, status_code=None, retry_after=None):
+        super().__init__(message)
+        self.status_code = status_code
+        self.retry_after = retry_after
+
+
+class ConversionCancelled(Exception):
+    """Raised when a conversion is cancelled by the user."""
+
+
+class ConversionTimeout(ConversionCancelled):
+    """Raised when a conversion runs past its wall-clock or idle timeout."""
@@ -0,0 +1,295 @@
+""" Local stand-in for the Figma REST API.
+    Serves the endpoints the converter uses from fixture or generated documents, so
+    conversions can be run and benchmarked offline, without rate limits or network noise.
+
+    GET /v1/files/<id>               the file (?depth=N trims the tree), with an ETag and 304s
+    GET /v1/files/<id>/nodes?ids=    node-scoped documents (?depth=N)
+    GET /v1/files/<id>/images        download urls of the image fills (imageRef)
+    GET /v1/images/<id>?ids=         export urls that point back at this server
+    GET /assets/<id>/<name>.<fmt>    the exported image or image fill (a small placeholder PNG)
+
+    Documents are read from <file_id>.json files of a fixture directory, or added with
+    FakeFigma.add (e.g. a synthetic.generate document). File ids of the form gen<nodes> or
+    gen<nodes>s<seed> get a synthetic document of exactly that many nodes.
+
+    python fake_figma.py --port 8766 --fixtures path/to/fixtures
+    FIGMA_API_URL=http://127.0.0.1:8766/v1 python figma.py --token x   # url .../design/gen1000/Bench
+"""
+import re
+import sys
+import gzip
+import json
+import time
+import zlib
+import struct
+import logging
+import argparse
+import threading
+
+from collections import Counter
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from pathlib import Path
+from typing import Dict, List, Optional
+from urllib.parse import parse_qs, quote, urlparse
+
+from synthetic import DocumentSpec, generate, image_refs
+
+DEFAULT_HOST = "127.0.0.1"
+DEFAULT_PORT = 8766  # next to the conversion daemon's 8765
+
+_GENERATED = re.compile(r"gen(\d+)(?:s(\d+))?")
+
+
+def placeholder_png(width: int = 1, height: int = 1) -> bytes:
+    """A valid, blank RGBA PNG."""
+    def chunk(kind: bytes, data: bytes) -> bytes:
+        return struct.pack(">I", len(data)) + kind + data + struct.pack(">I", zlib.crc32(kind + data))
+
+    rows = b"".join(b"\x00" + b"\x00\x00\x00\x00" * width for _ in range(height))
+    return (b"\x89PNG\r\n\x1a\n" + chunk(b"IHDR", struct.pack(">IIBBBBB", width, height, 8, 6, 0, 0, 0))
+            + chunk(b"IDAT", zlib.compress(rows)) + chunk(b"IEND", b""))
+
+
+PLACEHOLDER_PNG = placeholder_png()
+
+
+# ----------------------------------------------DOCUMENTS---------------------------------
+def trim(node: Dict, depth: Optional[int]) -> Dict:
+    """node with only depth levels of children below it (all of them for None)."""
+    if depth is None or "children" not in node:
+        return node
+    if depth <= 0:
+        return {key: value for key, value in node.items() if key != "children"}
+    return {**node, "children": [trim(child, depth - 1) for child in node["children"]]}
+
+
+def iter_nodes(node: Dict):
+    yield node
+    for child in node.get("children", []):
+        yield from iter_nodes(child)
+
+
+class FakeFigma:
+    """Documents and request counts behind the fake API.
+    Args:
+            fixtures: directory of <file_id>.json files
+            latency: seconds added to every request, to mimic the network
+    """
+
+    def __init__(self, fixtures=None, latency: float = 0.0):
+        self.fixtures = Path(fixtures) if fixtures else None
+        self.latency = latency
+        self.requests = Counter()  # by endpoint: files, nodes, images, image_fills, assets
+        self._documents: Dict[str, Dict] = {}
+        self._index: Dict[str, Dict[str, Dict]] = {}
+        self._refs: Dict[str, List[str]] = {}
+        self._encoded: Dict[tuple, bytes] = {}
+        self._lock = threading.Lock()
+
+    def add(self, file_id: str, document: Dict) -> None:
+        with self._lock:
+            self._documents[file_id] = document
+            self._index.pop(file_id, None)
+            self._refs.pop(file_id, None)
+            self._encoded = {key: value for key, value in self._encoded.items() if key[0] != file_id}
+
+    def document(self, file_id: str) -> Optional[Dict]:
+        """The whole file, loaded from the fixtures or generated on first use."""
+        with self._lock:
+            if file_id not in self._documents:
+                path = self.fixtures / f"{file_id}.json" if self.fixtures else None
+                if path is not None and path.is_file():
+                    self._documents[file_id] = json.loads(path.read_text(encoding="utf-8"))
+                elif match := _GENERATED.fullmatch(file_id):
+                    spec = DocumentSpec.for_nodes(int(match.group(1)), seed=int(match.group(2) or 0))
+                    self._documents[file_id] = generate(spec)
+                else:
+                    return None
+            return self._documents[file_id]
+
+    def node(self, file_id: str, node_id: str) -> Optional[Dict]:
+        document = self.document(file_id)
+        if document is None:
+            return None
+        with self._lock:
+            if file_id not in self._index:
+                self._index[file_id] = {node["id"]: node for node in iter_nodes(document["document"])}
+            return self._index[file_id].get(node_id)
+
+    def image_refs(self, file_id: str) -> List[str]:
+        document = self.document(file_id)
+        with self._lock:
+            if file_id not in self._refs:
+                self._refs[file_id] = image_refs(document)
+            return self._refs[file_id]
+
+    def encoded(self, file_id: str, depth: Optional[int], compress: bool) -> bytes:
+        """The JSON of a file at a depth, encoded (and gzipped) once and then served from memory."""
+        key = (file_id, depth, compress)
+        with self._lock:
+            if key in self._encoded:
+                return self._encoded[key]
+        document = self.document(file_id)
+        body = json.dumps({**document, "document": trim(document["document"], depth)}).encode()
+        if compress:
+            body = gzip.compress(body, compresslevel=1)
+        with self._lock:
+            self._encoded[key] = body
+        return body
+
+
+# ----------------------------------------------SERVER------------------------------------
+class FakeFigmaHandler(BaseHTTPRequestHandler):
+    server_version = "FakeFigma/1.0"
+    protocol_version = "HTTP/1.1"  # keep-alive, like the real API behind the pooled session
+
+    def log_message(self, format, *args):
+        logging.debug(f"Fake Figma {format % args}")
+
+    def send_body(self, status: int, body: bytes, content_type: str = "application/json",
+                  headers: Optional[Dict] = None) -> None:
+        self.send_response(status)
+        self.send_header("Content-Type", content_type)
+        self.send_header("Content-Length", str(len(body)))
+        for name, value in (headers or {}).items():
+            self.send_header(name, value)
+        self.end_headers()
+        self.wfile.write(body)
+
+    def send_json(self, status: int, data) -> None:
+        self.send_body(status, json.dumps(data).encode())
+
+    def send_error_json(self, status: int, message: str) -> None:
+        self.send_json(status, {"status": status, "err": message})
+
+    def do_GET(self):
+        api: FakeFigma = self.server.api
+        url = urlparse(self.path)
+        query = {key: values[-1] for key, values in parse_qs(url.query).items()}
+        if api.latency:
+            time.sleep(api.latency)
+
+        if re.fullmatch(r"/assets/\w+/[^/]+\.\w+", url.path):
+            api.requests["assets"] += 1
+            return self.send_body(200, PLACEHOLDER_PNG, "image/png")
+        if not self.headers.get("X-Figma-Token"):
+            return self.send_error_json(403, "Invalid token")
+        match = re.fullmatch(r"/v1/(files|images)/(\w+)(?:/(nodes|images))?/?", url.path)
+        if not match:
+            return self.send_error_json(404, "Not found")
+        endpoint, file_id, scope = match.groups()
+        document = api.document(file_id)
+        if document is None:
+            return self.send_error_json(404, "Not found")
+        try:
+            depth = int(query["depth"]) if "depth" in query else None
+        except ValueError:
+            return self.send_error_json(400, "depth must be an integer")
+        ids = [node_id for node_id in query.get("ids", "").split(",") if node_id]
+
+        if endpoint == "images":
+            api.requests["images"] += 1
+            if not ids:
+                return self.send_error_json(400, "ids is required")
+            fmt = query.get("format", "png")
+            base = f"http://{self.headers.get('Host')}/assets/{file_id}"
+            images = {node_id: f"{base}/{quote(node_id, safe='')}.{fmt}" if api.node(file_id, node_id) else None
+                      for node_id in ids}
+            return self.send_json(200, {"err": None, "images": images})
+
+        if scope == "images":
+            api.requests["image_fills"] += 1
+            base = f"http://{self.headers.get('Host')}/assets/{file_id}"
+            refs = {ref: f"{base}/{ref}.png" for ref in api.image_refs(file_id)}
+            return self.send_json(200, {"error": False, "status": 200, "meta": {"images": refs}})
+
+        if scope == "nodes":
+            api.requests["nodes"] += 1
+            if not ids:
+                return self.send_error_json(400, "ids is required")
+            found = {}
+            for node_id in ids:
+                node = api.node(file_id, node_id)
+                found[node_id] = {"document": trim(node, depth), "components": {}, "styles": {}} if node else None
+            return self.send_json(200, {"name": document.get("name"), "version": document.get("version"),
+                                        "lastModified": document.get("lastModified"), "nodes": found})
+
+        api.requests["files"] += 1
+        etag = f'"{document.get("version", "")}"'
+        if self.headers.get("If-None-Match") == etag:
+            return self.send_body(304, b"", headers={"ETag": etag})
+        compress = "gzip" in (self.headers.get("Accept-Encoding") or "")
+        body = api.encoded(file_id, depth, compress)
+        headers = {"ETag": etag}
+        if compress:
+            headers["Content-Encoding"] = "gzip"
+        return self.send_body(200, body, headers=headers)
+
+
+class FakeFigmaServer(ThreadingHTTPServer):
+    """The fake API on a local port (0 picks a free one), served from a background thread
+    when used as a context manager or after start().
+    """
+
+    daemon_threads = True
+    request_queue_size = 64  # the asset downloads open many connections at once
+
+    def __init__(self, api: Optional[FakeFigma] = None, host: str = DEFAULT_HOST, port: int = 0):
+        super().__init__((host, port), FakeFigmaHandler)
+        self.api = api or FakeFigma()
+        self._thread: Optional[threading.Thread] = None
+
+    @property
+    def url(self) -> str:
+        host, port = self.server_address[:2]
+        return f"http://{host}:{port}"
+
+    @property
+    def api_url(self) -> str:
+        """What FIGMA_API_URL (or FigmaClient(api_url=...)) should be set to."""
+        return f"{self.url}/v1"
+
+    def start(self) -> "FakeFigmaServer":
+        self._thread = threading.Thread(target=self.serve_forever, name="fake-figma", daemon=True)
+        self._thread.start()
+        return self
+
+    def stop(self) -> None:
+        if self._thread is not None:
+            self.shutdown()
+            self._thread.join()
+            self._thread = None
+        self.server_close()
+
+    def __enter__(self) -> "FakeFigmaServer":
+        return self.start()
+
+    def __exit__(self, *exc) -> None:
+        self.stop()
+
+
+def parse_args(argv=None):
+    parser = argparse.ArgumentParser(description="Serve a local stand-in for the Figma REST API")
+    parser.add_argument("--host", default=DEFAULT_HOST)
+    parser.add_argument("--port", type=int, default=DEFAULT_PORT)
+    parser.add_argument("--fixtures", type=Path, help="directory of <file_id>.json documents")
+    parser.add_argument("--latency", type=float, default=0.0, help="seconds added to every request")
+    return parser.parse_args(argv)
+
+
+def main(argv=None):
+    args = parse_args(argv)
+    logging.basicConfig(level=logging.INFO, format="%(asctime)s - %(levelname)s - %(message)s")
+    server = FakeFigmaServer(FakeFigma(args.fixtures, args.latency), args.host, args.port)
+    logging.info(f"Fake Figma API on {server.api_url}, set FIGMA_API_URL={server.api_url} to use it")
+    try:
+        server.serve_forever()
+    except KeyboardInterrupt:
+        logging.info(f"Fake Figma API stopped after {dict(server.api.requests)}")
+    finally:
+        server.server_close()
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -1,18 +1,31 @@
 """ Mk Utility 3 
     Convert the figma project to tkinter,
-    using subprocess and os we call the bash command line and input the token and url and output to the current dir.
+    by default in process through the native engine, or using subprocess to call the
+    `tkdesigner` command line with the token and url and output to the current dir.
 """
 import os
 import re
 import sys
 import time
-import json
 import logging
+import argparse
 import subprocess
 
 from datetime import datetime
 from pathlib import Path 
 
+from engine import (
+    ConversionResult, FigmaClient, extract_file_id, extract_node_ids, find_pages, page_frames,
+    convert as convert_native,
+)
+from cache import DocumentCache
+from asset_store import store_from_env, format_stats
+from profiles import ProfileStore
+from history import ConversionHistory
+from metrics import ConversionMetrics, MetricsRegistry, format_metrics, write_summary
+from app_logging import setup_logging
+from streaming import ConversionEvent, stream_in_thread, stream_subprocess, JOB_TIMEOUT, IDLE_TIMEOUT
+
 sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
 def get_project_root() -> Path:
     """Get the absolute path to the project root directory."""
@@ -26,38 +39,53 @@ def get_project_root() -> Path:
 PROJECT_ROOT = get_project_root()
 sys.path.append(str(PROJECT_ROOT))
 
-# Ensure data directory exists in user's home
-DATA_DIR = PROJECT_ROOT / ".figma-converter"
-DATA_DIR.mkdir(parents=True, exist_ok=True)
+# Data directory in the project root (created by init_app), FIGMA_DATA_DIR moves it elsewhere
+DATA_DIR = Path(os.environ.get("FIGMA_DATA_DIR") or PROJECT_ROOT / ".figma-converter")
 
 # Define paths
 PATHS = {
     'logs': DATA_DIR / 'logs' / 'app.log',
-    'config': DATA_DIR / 'config.json'
+    'config': DATA_DIR / 'config.json',
+    'documents': DATA_DIR / 'cache' / 'documents',
+    'assets': DATA_DIR / 'assets',
+    'icon': DATA_DIR / 'cache' / 'icon.png',
+    'history': DATA_DIR / 'history.db',
+    'metrics': DATA_DIR / 'metrics' / 'figma_converter.prom',
 }
 
-# Ensure logs directory exists
-PATHS['logs'].parent.mkdir(parents=True, exist_ok=True)
-
-# Configure logging
-logging.basicConfig(
-    level=logging.INFO,
-    format='%(asctime)s - %(levelname)s - %(message)s',
-    handlers=[
-        logging.FileHandler(str(PATHS['logs'])),
-        logging.StreamHandler()
-    ]
-)
+_initialized = False
+
+
+def init_app(json_logs=None):
+    """Create the data directories and configure logging.
+    Kept out of module import so the GUI can paint its window first, safe to call more than once.
+    Logging is asynchronous (see app_logging.py), json_logs also writes logs/app.jsonl.
+    """
+    global _initialized
+    if _initialized:
+        return
+    _initialized = True
+    # Ensure logs directory exists
+    PATHS['logs'].parent.mkdir(parents=True, exist_ok=True)
 
-logging.info(f"Current project root: {PROJECT_ROOT}")
+    # Configure logging: callers only enqueue, a listener thread writes and rotates app.log
+    setup_logging(PATHS['logs'], json_lines=json_logs)
+
+    logging.info(f"Current project root: {PROJECT_ROOT}")
 
 CONFIG_PATH = PATHS['config']
 
 
-def create_path():
+def create_path(name=None):
+    """Create the output directory. Without a name a new timestamped directory is used,
+    with a name the same directory is reused so incremental conversion can skip unchanged frames.
+    """
     try:
-        time_stamp = datetime.now().strftime("%Y-%m-%d_%H:%M:%S")
-        output_path = DATA_DIR / f"New_gui_{time_stamp}"
+        if name:
+            output_path = DATA_DIR / name
+        else:
+            time_stamp = datetime.now().strftime("%Y-%m-%d_%H:%M:%S")
+            output_path = DATA_DIR / f"New_gui_{time_stamp}"
         output_path.mkdir(parents=True, exist_ok=True)
         logging.info(f"Created output directory: {output_path}")
         return output_path
@@ -66,9 +94,10 @@ def create_path():
         raise
 
 
-def convert_url_to_file_format(url):
+def convert_url_to_file_format(url, node_ids=None):
     """Convert Figma URL to the required format.
-    Expected format: https://www.figma.com/file/FILEID
+    Expected format: https://www.figma.com/file/FILEID, with ?node-id=1-2,3-4 when the url
+    selects pages or frames. node_ids replaces the node-id of the url ([] for the whole file).
     """
     # Try to extract the file ID from various Figma URL formats
     try:
@@ -82,6 +111,11 @@ def convert_url_to_file_format(url):
                 if match := re.search(pattern, url):
                     file_id = match.group(1)
                     result = f'https://www.figma.com/file/{file_id}'
+                    if node_ids is None:
+                        node_ids = extract_node_ids(url)
+                    if node_ids:
+                        # links write node ids as 1-2, the API as 1:2
+                        result += '?node-id=' + ','.join(node_id.replace(':', '-') for node_id in node_ids)
                     logging.info(f"Converted URL to format: {result}")
                     return result
         
@@ -90,48 +124,192 @@ def convert_url_to_file_format(url):
         logging.error(f"Error while converting the URL pattern: {str(e)}")
         raise
 
-def converter(token, url, path):
-    """ using subprocess call the bash command run it to convert to the tkinter
+_document_cache = None
+_asset_store = None
+_profile_store = None
+_history = None
+_metrics = None
+
+
+def get_document_cache():
+    """Shared on-disk cache of document JSON under DATA_DIR."""
+    global _document_cache
+    if _document_cache is None:
+        _document_cache = DocumentCache(PATHS['documents'])
+    return _document_cache
+
+
+def get_asset_store():
+    """Shared content addressed asset store under DATA_DIR (None when disabled)."""
+    global _asset_store
+    if _asset_store is None:
+        _asset_store = store_from_env(PATHS['assets'])
+    return _asset_store
+
+
+def get_history():
+    """Shared SQLite history of finished conversions under DATA_DIR."""
+    global _history
+    if _history is None:
+        _history = ConversionHistory(PATHS['history'])
+    return _history
+
+
+def get_metrics():
+    """Shared Prometheus text-format counters of finished conversions under DATA_DIR."""
+    global _metrics
+    if _metrics is None:
+        _metrics = MetricsRegistry(PATHS['metrics'])
+    return _metrics
+
+
+def tkdesigner_command(token, file_url, path):
+    if extract_node_ids(file_url):
+        logging.warning("tkdesigner converts the whole file, the selected pages and frames are ignored")
+        file_url = file_url.split('?')[0]
+    # Correct order: file_url first, then token
+    return f"tkdesigner -o {path} {file_url} {token}".split()  # Split command into list for safer execution
+
+
+def tkdesigner_result(file_url, path, start, log="", metrics=None):
+    """Build the ConversionResult of a tkdesigner run from what it wrote to path."""
+    generated = sorted((Path(path) / "build").glob("gui*.py"))
+    metrics = metrics or ConversionMetrics()
+    metrics.add("tkdesigner", time.perf_counter() - start)  # its stages are not visible from outside
+    result = ConversionResult(
+        file_id=extract_file_id(file_url),
+        output_path=Path(path),
+        files=generated,
+        frame_count=len(generated),
+        duration=time.perf_counter() - start,
+        log=log,
+        metrics=metrics.to_dict(),
+    )
+    write_summary(result)
+    return result
+
+
+def converter(token, url, path, engine="native", pool=None, use_cache=True, refresh=False,
+              incremental=True, progress=None, cancel=None):
+    """ Convert the figma file to tkinter and return a ConversionResult.
+    engine="native" converts in process with the pooled session of engine.py,
+    engine="tkdesigner" uses subprocess to call the bash command instead.
+    When a worker_pool.ConverterPool is given the job is sent to one of its prewarmed workers.
+    use_cache reuses the stored document JSON while its version is current and places
+    assets from the shared asset store, refresh downloads the document again but still updates the cache.
+    incremental regenerates only the frames that changed since the last run into the same path.
+    progress and cancel are handed to the native engine (see stream_converter for live output).
+    The per-stage metrics end up in result.metrics and in a .figma-metrics.json next to the code.
     Command format: tkdesigner [-h] [-o OUTPUT] [-f] file_url token
     """
     
     try:
+        metrics = ConversionMetrics()
         # Convert URL to the required format
-        file_url = convert_url_to_file_format(url)
+        with metrics.stage("normalize_url"):
+            file_url = convert_url_to_file_format(url)
         logging.info(f"Converting Figma URL to: {file_url}")
-        
-        # Correct order: file_url first, then token
-        command = f"tkdesigner -o {path} {file_url} {token}"
-        logging.debug(f"Running command: {command}")
+
+        if pool is not None:
+            result = pool.convert(
+                token, file_url, path, use_cache=use_cache, refresh=refresh, incremental=incremental
+            )
+            logging.info(f"Conversion finished on worker: {result.summary()}")
+            return result
+
+        if engine == "native":
+            result = convert_native(
+                token, file_url, path,
+                cache=get_document_cache() if use_cache else None,
+                refresh=refresh,
+                incremental=incremental,
+                asset_store=get_asset_store() if use_cache else None,
+                progress=progress,
+                cancel=cancel,
+                metrics=metrics,
+            )
+            logging.info(f"Conversion finished: {result.summary()}")
+            write_summary(result)
+            return result
+
+        start = time.perf_counter()
+        command = tkdesigner_command(token, file_url, path)
+        logging.debug(f"Running command: {command[:-1]} ***")
         
         converter_output = subprocess.run(
-            command.split(),  # Split command into list for safer execution
+            command,
             stderr=subprocess.STDOUT, 
             stdout=subprocess.PIPE, 
             text=True
         )
         logging.info(f"Command output:\n{converter_output.stdout}")
+        return tkdesigner_result(file_url, path, start, converter_output.stdout, metrics)
     except subprocess.SubprocessError as e:
         logging.error(f"Error running tkdesigner command: {e}")
         raise
+    except Exception as e:
+        logging.error(f"Error while converting: {e}")
+        raise
+
+
+def stream_converter(token, url, path, engine="native", pool=None, cancel=None,
+                     timeout=JOB_TIMEOUT, idle_timeout=IDLE_TIMEOUT, **options):
+    """ Streaming version of converter(): yields ConversionEvent objects as the conversion runs,
+    log lines and progress first and a final "result" event carrying the ConversionResult.
+    Setting the cancel event (or running past timeout / idle_timeout seconds) stops the job,
+    killing the tkdesigner or worker process tree, and raises ConversionCancelled/ConversionTimeout.
+    """
+    metrics = ConversionMetrics()
+    with metrics.stage("normalize_url"):
+        file_url = convert_url_to_file_format(url)
+    logging.info(f"Converting Figma URL to: {file_url}")
+
+    if pool is not None:
+        yield from pool.stream(token, file_url, path, cancel, timeout, idle_timeout, **options)
+    elif engine == "native":
+        def run(progress, cancel_event):
+            return converter(token, file_url, path, progress=progress, cancel=cancel_event, **options)
+
+        yield from stream_in_thread(run, cancel, timeout, idle_timeout)
+    else:
+        start = time.perf_counter()
+        lines = []
+        for event in stream_subprocess(tkdesigner_command(token, file_url, path), cancel, timeout, idle_timeout):
+            lines.append(event.message)
+            yield event
+        yield ConversionEvent("result", result=tkdesigner_result(file_url, path, start, "\n".join(lines), metrics))
+
+
+def get_profile_store():
+    """Shared profile store in config.json (the old single slot config is migrated on first read)."""
+    global _profile_store
+    if _profile_store is None:
+        _profile_store = ProfileStore(CONFIG_PATH)
+    return _profile_store
+
+
+def load_config(profile=None):
+    """The settings and one profile (the active one by default) as a flat dict:
+    token, url, output_dir, options, auto_save, theme, last_used and the profile name.
+    Served from memory until config.json changes on disk.
+    """
+    store = get_profile_store()
+    name = profile or store.active
+    entry = store.get(name)
+    if not entry and not profile:
+        return {}
+    return {**store.settings(), **entry, 'profile': name}
+
 
-def load_config():
-    if CONFIG_PATH.exists():
-        with open(CONFIG_PATH, 'r') as f:
-            # if the json has nothing we need to ensure to return defaul values
-            return json.load(f)
-    return {}
-
-def save_config(token, url, auto_save="False", theme="light") -> None:
-    config = {
-        'token': token,
-        'url': url,
-        'auto_save': auto_save,
-        'theme': theme,
-        'last_used': datetime.now().strftime('%Y-%m-%d %H:%M:%S')
-    }
-    with open(CONFIG_PATH, 'w') as f:
-        json.dump(config, f, indent=4)
+def save_config(token, url, auto_save=None, theme=None, profile=None, output_dir=None, options=None) -> None:
+    """Save token and url into a profile (the active one by default) and make it active.
+    Values left as None keep what is stored.
+    """
+    store = get_profile_store()
+    store.save(profile, token=token, url=url,
+               output_dir=str(output_dir) if output_dir else None, options=options)
+    if auto_save is not None or theme is not None:
+        store.save_settings(auto_save=auto_save, theme=theme)
 
 def get_input(prompt, default=''):
     if default:
@@ -139,27 +317,220 @@ def get_input(prompt, default=''):
         return response if response else default
     return input(prompt).strip()
 
-def main():
-    output_path = create_path()
-    logging.info(f"Files will be saved to: {output_path}")
-    
+def parse_args(argv=None):
+    parser = argparse.ArgumentParser(description="Convert Figma designs to tkinter code.")
+    parser.add_argument("--token", help="Figma access token (defaults to the saved one)")
+    parser.add_argument("--engine", choices=["native", "tkdesigner"], default="native",
+                        help="conversion engine to use")
+    parser.add_argument("--no-cache", action="store_true",
+                        help="always download, bypassing the document cache and the asset store")
+    parser.add_argument("--refresh", action="store_true",
+                        help="download the document again and update the cache")
+    parser.add_argument("--full", action="store_true",
+                        help="regenerate every frame instead of only the changed ones")
+    parser.add_argument("--asset-stats", action="store_true",
+                        help="show the hit rate and size of the shared asset store and exit")
+    parser.add_argument("--batch", metavar="MANIFEST",
+                        help="convert every file listed in a manifest (.txt, .json or .csv)")
+    parser.add_argument("--workers", type=int, default=4, help="parallel conversions in batch mode")
+    parser.add_argument("--output",
+                        help="output directory (reused between runs), or the output root in batch mode")
+    parser.add_argument("--watch", metavar="SOURCE",
+                        help="follow a Figma url or every file of a manifest and reconvert on changes")
+    parser.add_argument("--interval", type=float, default=10,
+                        help="seconds between polls in watch mode right after a change")
+    parser.add_argument("--max-interval", type=float, default=60,
+                        help="longest wait between polls of an unchanged file in watch mode")
+    parser.add_argument("--daemon", metavar="ADDRESS",
+                        help="convert on a running conversion daemon (http://host:port or unix:/path)")
+    parser.add_argument("--profile",
+                        help="saved profile to use and update (defaults to the active one, or the one of the url)")
+    parser.add_argument("--list-profiles", action="store_true", help="show the saved profiles and exit")
+    parser.add_argument("--log-json", action="store_true", default=None,
+                        help="also write the log as JSON lines to logs/app.jsonl")
+    parser.add_argument("--history", nargs="?", const="", metavar="SEARCH",
+                        help="show the latest conversions (matching a file id or output path) and exit")
+    parser.add_argument("--node", action="append", metavar="NODE_ID",
+                        help="convert only this frame or page (1:2 or 1-2 as in the url's node-id, "
+                             "comma separated, repeatable)")
+    parser.add_argument("--page", action="append", metavar="PAGE",
+                        help="convert only the frames of this page (its name or id, repeatable)")
+    parser.add_argument("--whole-file", action="store_true",
+                        help="convert the whole file even when the url has a node-id")
+    parser.add_argument("--list-pages", action="store_true",
+                        help="show the pages of the file with their top level frames and exit")
+    return parser.parse_args(argv)
+
+
+def select_nodes(args, token, url):
+    """Node ids picked with --node, --page and --whole-file ([] for the whole file),
+    None to keep the node-id of the url.
+    """
+    if args.whole_file:
+        return []
+    node_ids = [node_id.strip().replace('-', ':')
+                for value in args.node or [] for node_id in value.split(',') if node_id.strip()]
+    if args.page:
+        # only the page names are needed, depth=1 leaves out their contents
+        pages = FigmaClient(token).get_pages(extract_file_id(url))
+        node_ids += [page['id'] for page in find_pages(pages, args.page)]
+    return list(dict.fromkeys(node_ids)) or None
+
+
+def list_pages(token, url):
+    """Print the pages and top level frames of the file with the ids --node and --page take."""
+    for page in FigmaClient(token).get_pages(extract_file_id(url), depth=2):
+        print(f"{page['id']:>10}  {page.get('name')}")
+        for frame in page_frames(page):
+            print(f"{frame['id']:>10}    {frame.get('name')}")
+    return 0
+
+
+def run_batch_mode(args, config):
+    from batch import load_manifest, run_batch
+
+    token = args.token or config.get('token', '')
+    if not token:
+        raise ValueError("A Figma token is required, pass --token or save one first")
+    jobs = load_manifest(args.batch)
+    for job in jobs:
+        job.options.setdefault('engine', args.engine)
+        job.options.setdefault('use_cache', not args.no_cache)
+        job.options.setdefault('refresh', args.refresh)
+        job.options.setdefault('incremental', not args.full)
+    report = run_batch(jobs, token, workers=args.workers, output_root=args.output)
+    return 0 if all(entry.status == "done" for entry in report) else 1
+
+
+def run_watch_mode(args, config):
+    from batch import BatchJob, load_manifest, normalize_jobs
+    from watch import Watcher, watched_files
+
+    token = args.token or config.get('token', '')
+    if not token:
+        raise ValueError("A Figma token is required, pass --token or save one first")
+    if Path(args.watch).is_file():
+        jobs = load_manifest(args.watch)
+    else:
+        jobs = [BatchJob(url=args.watch)]
+    for job in jobs:
+        job.options.setdefault('engine', args.engine)
+        job.options.setdefault('use_cache', not args.no_cache)
+        job.options.setdefault('incremental', not args.full)
+    jobs = normalize_jobs(jobs)
+    if not jobs:
+        raise ValueError(f"Nothing to watch in {args.watch}")
+    watcher = Watcher(token, watched_files(jobs, args.output), args.interval, args.max_interval,
+                      workers=args.workers)
+    try:
+        watcher.run()
+    except KeyboardInterrupt:
+        logging.info("Watch mode stopped")
+    return 0
+
+
+def run_daemon_job(args, token, url, output_path):
+    """Convert on a running conversion daemon and download the result into output_path."""
+    from daemon import DaemonClient
+
+    client = DaemonClient(args.daemon)
+    job = client.submit(token, url, use_cache=not args.no_cache, refresh=args.refresh,
+                        incremental=not args.full)
+    logging.info(f"Submitted job #{job['id']} to the daemon at {args.daemon}")
+    seen = [None]
+
+    def show(status):
+        if status['stage'] and status['stage'] != seen[0]:
+            seen[0] = status['stage']
+            logging.info(f"Job #{status['id']}: {status['stage']}")
+
+    status = client.wait(job['id'], on_status=show)
+    if status['state'] != 'done':
+        logging.error(f"Job #{status['id']} {status['state']}: {status['error']}")
+        return 1
+    client.download(job['id'], output_path)
+    logging.info(f"Conversion finished on the daemon: {status['result']['summary']}")
+    logging.info(f"Result downloaded to {output_path}")
+    return 0
+
+
+def main(argv=None):
+    args = parse_args(argv)
+    init_app(json_logs=args.log_json)
+
     # Load previous configuration if it exists
-    config = load_config()
+    config = load_config(args.profile)
     if config:
-        logging.info(f"Found previous configuration from {config.get('last_used', 'unknown date')}")
-    
+        logging.info(f"Using profile {config['profile']} saved on {config.get('last_used', 'unknown date')}")
+
+    if args.list_profiles:
+        store = get_profile_store()
+        for name in store.names():
+            marker = "*" if name == store.active else " "
+            print(f"{marker} {name}: {store.get(name).get('url', '')}")
+        return 0
+
+    if args.history is not None:
+        for entry in get_history().page(args.history):
+            finished = datetime.fromtimestamp(entry.finished).strftime('%Y-%m-%d %H:%M')
+            print(f"{finished}  {entry.status:<9} {entry.duration:7.2f}s  {entry.file_id}  {entry.output_path}")
+        return 0
+
+    if args.asset_stats:
+        store = get_asset_store()
+        print(format_stats(store.stats()) if store else "Asset store is disabled")
+        return 0
+
+    if args.batch:
+        return run_batch_mode(args, config)
+
+    if args.watch:
+        return run_watch_mode(args, config)
+
     while True:
-        token = get_input("Enter your figma token: ", config.get('token', ''))
         url = get_input("Please enter the url: ", config.get('url', ''))
-        
+        profile = args.profile or get_profile_store().find_by_url(url) or config.get('profile')
+        if profile and profile != config.get('profile'):
+            # another project: use its saved token and output directory
+            config = load_config(profile)
+            logging.info(f"Using profile {profile} of this file")
+        token = args.token or get_input("Enter your figma token: ", config.get('token', ''))
+
         if token and url:
+            if args.list_pages:
+                return list_pages(token, url)
             logging.info(f"Processing with token: {token[:4]}*** and URL: {url}")
             logging.info("Starting the converter...")
-            
+
+            output_dir = args.output or config.get('output_dir')
+            output_path = Path(output_dir) if output_dir else create_path()
+            output_path.mkdir(parents=True, exist_ok=True)
+            logging.info(f"Files will be saved to: {output_path}")
+
             # Save the new configuration
-            save_config(token, url)
-            
-            converter(token, url, output_path)
+            save_config(token, url, profile=profile, output_dir=args.output)
+
+            node_ids = select_nodes(args, token, url)
+            if node_ids is not None:
+                url = convert_url_to_file_format(url, node_ids)
+            if args.daemon:
+                return run_daemon_job(args, token, url, output_path)
+            start = time.perf_counter()
+            try:
+                result = converter(token, url, output_path, engine=args.engine,
+                                   use_cache=not args.no_cache, refresh=args.refresh, incremental=not args.full)
+            except Exception as e:
+                try:
+                    file_id = extract_file_id(url)
+                except ValueError:
+                    file_id = ""
+                get_history().record(file_id, output_path, "failed", time.perf_counter() - start,
+                                     file_url=url, error=str(e))
+                get_metrics().observe("failed", time.perf_counter() - start)
+                raise
+            get_history().record(result.file_id, output_path, "done", result.duration, result, file_url=url)
+            get_metrics().observe("done", result.duration, result.metrics)
+            logging.info(f"Stage timings:\n{format_metrics(result.metrics)}")
             break
         else:
             logging.warning("Missing required values. Please enter both token and URL.")
@@ -168,15 +539,10 @@ def main():
 
 if __name__ == "__main__":
     try:
-        main()
+        sys.exit(main())
     except KeyboardInterrupt:
         logging.info("System closed by user.")
         sys.exit(1)
     except Exception as e:
         logging.error(f"Unexpected error: {e}", exc_info=True)
         sys.exit(1)
-
-
-
-
-
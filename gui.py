@@ -8,9 +8,8 @@ import sys
 import json
 import logging
 import subprocess
-from threading import Thread
+from threading import Thread, Event
 from pathlib import Path
-from typing import Dict
 
 # Add application packages to Python path
 APP_LIB = Path("/opt/figma-converter/lib")
@@ -18,20 +17,47 @@ if APP_LIB.exists():
     sys.path.insert(0, str(APP_LIB))
 
 # Now import packages from virtual environment
-import requests
-import semver
-from PIL import Image
+# (requests, semver and Pillow are imported where they are used to keep startup fast)
 import customtkinter as ctk
 from tkinter import PhotoImage
 
 from figma import (
     create_path,
     convert_url_to_file_format,
+    get_history,
+    get_metrics,
+    get_profile_store,
     load_config,
     save_config,
-    converter,
+    stream_converter,
+    init_app,
     DATA_DIR,
-    CONFIG_PATH,
+    PATHS,
+)
+from worker_pool import get_default_pool
+from engine import FigmaClient, extract_file_id, extract_node_ids, page_frames
+from errors import ConversionCancelled, ConversionTimeout
+from scheduler import (
+    JobScheduler, DEFAULT_WORKERS, QUEUED, RUNNING, DONE, FAILED, CANCELLED, resolve_document_version,
+)
+from history import PAGE_SIZE
+from metrics import format_metrics
+from ui_queue import LogSink, UIQueue
+from installer import (
+    fetch_manifest,
+    install,
+    installable,
+    recover,
+    stage_from_manifest,
+    stage_from_zip,
+)
+from updater import (
+    UpdateChecker,
+    UpdateError,
+    download_asset,
+    expected_sha256,
+    pick_asset,
+    UPDATE_DIR,
 )
 
 
@@ -46,19 +72,8 @@ def get_project_root() -> Path:
 
 
 sys.path.append(str(get_project_root()))
-PATHS: Dict[str, Path] = {"logs": DATA_DIR / "logs" / "app.log"}
-PATHS["logs"].parent.mkdir(parents=True, exist_ok=True)
-
-logging.basicConfig(
-    level=logging.INFO,
-    format="%(asctime)s - %(levelname)s - %(message)s",
-    handlers=[
-        logging.FileHandler(
-            str(PATHS["logs"])
-        ),  # Convert Path to string for FileHandler
-        logging.StreamHandler(),
-    ],
-)
+
+STARTUP_DELAY_MS = 100  # deferred startup work runs once the window is painted
 
 
 class FigmaConverterApp(ctk.CTk):
@@ -70,26 +85,8 @@ class FigmaConverterApp(ctk.CTk):
         super().__init__()
         self.root = get_project_root()
         self.default_dir = DATA_DIR
-        self.default_dir.mkdir(parents=True, exist_ok=True)
         self.title("Figma to tkinter convertor")
-
-        # Set window icon (if available)
-        try:
-            icon_path = self.root / "figma-converter.ico"
-            if icon_path.exists():
-                # Create a temporary PNG file from the ICO
-                img = Image.open(icon_path)
-                png_path = self.root / "temp_icon.png"
-                img.save(png_path)
-
-                # Use the PNG file for the icon
-                self.iconphoto = PhotoImage(file=str(png_path))
-                self.wm_iconphoto(True, self.iconphoto)
-
-                # Clean up
-                png_path.unlink()
-        except Exception as e:
-            logging.warning(f"Could not set application icon: {e}")
+        self.set_window_icon()
         # Initialize variables
         self.original_token = ""
         self.original_url = ""
@@ -99,10 +96,32 @@ class FigmaConverterApp(ctk.CTk):
         # Create UI variables
         self.auto_save = ctk.BooleanVar(value=True)  # by default Save
         self.theme_var = ctk.StringVar(value="light")
+        self.profile_var = ctk.StringVar(value="")  # profile the entries are saved to
+        self.use_cache = ctk.BooleanVar(value=True)  # reuse cached documents
+        self.selected_nodes = []  # pages and frames picked for selection_file_id, [] converts it whole
+        self.selection_file_id = None  # without a pick the node-id of the url decides
         self.active_tooltip = None  # Track current tooltip
         self.tooltip_after_id = None  # Track scheduled tooltipe_after_id
         self.sidebar_width = 250
         self.update_available = False
+        self.converter_pool = None  # prewarmed workers, started after launch
+        # output lines and ui updates from worker threads are applied on the Tk thread
+        self.log_sink = LogSink(None)
+        self.ui = UIQueue(self, self.log_sink)
+        # conversions are queued and run on a bounded number of workers
+        self.job_rows = {}
+        self.jobs_refresh_pending = False
+        self.history_rows = []
+        self.history_before = None  # id of the last history entry shown, next page starts below
+        self.history_after_id = None  # pending filter reload
+        self.scheduler = JobScheduler(
+            self.run_conversion,
+            workers=DEFAULT_WORKERS,
+            on_change=self.schedule_jobs_refresh,
+            resolve_version=resolve_document_version,  # identical in-flight jobs share one conversion
+            history=get_history(),
+            metrics=get_metrics(),
+        )
         self.minsize(800, 800)  # Minimum window size
         self.grid_columnconfigure(1, weight=1)  # Make column 1 expandable
         self.grid_rowconfigure(5, weight=1)  # Make the last row expandable for output
@@ -246,6 +265,18 @@ class FigmaConverterApp(ctk.CTk):
             text="⚙️ Settings", font=ctk.CTkFont(size=16, weight="bold")
         )
 
+        # profile picker, typing a new name and saving creates that profile
+        self.profile_label = ctk.CTkLabel(self.settings_content, text="Profile:", anchor="w")
+        self.profile_label.grid(row=1, column=0, padx=20, pady=(5, 0), sticky="w")
+        self.profile_box = ctk.CTkComboBox(
+            self.settings_content,
+            variable=self.profile_var,
+            values=[],
+            command=self.select_profile,
+            width=180,
+        )
+        self.profile_box.grid(row=2, column=0, padx=20, pady=5)
+
         # auto save checkbox
         self.auto_save_cb = ctk.CTkCheckBox(
             self.settings_content,
@@ -295,28 +326,62 @@ class FigmaConverterApp(ctk.CTk):
         self.export_button.grid(row=8, column=0, padx=20, pady=5)
         self.apply_button_style(self.export_button, "primary")
 
+        # document cache checkbox
+        self.use_cache_cb = ctk.CTkCheckBox(
+            self.settings_content,
+            text="Use document cache",
+            variable=self.use_cache,
+        )
+        self.use_cache_cb.grid(row=9, column=0, padx=20, pady=5)
+
         # Add another separator
         self.separator2 = ctk.CTkFrame(self.sidebar_content, height=2)
         self.separator2.grid(row=8, column=0, padx=20, pady=(20, 10), sticky="ew")
 
-        # Recent conversions section
+        # Conversion history section
         self.recent_label = ctk.CTkLabel(
             self.sidebar_content,
-            text="🕒 Recent Conversions",
+            text="🕒 Conversion History",
             font=ctk.CTkFont(size=16, weight="bold"),
         )
         self.recent_label.grid(row=9, column=0, padx=20, pady=(10, 5))
 
-        # List to show recent conversions
-        self.recent_list = ctk.CTkTextbox(self.sidebar_content, height=150, width=200)
-        self.recent_list.grid(row=10, column=0, padx=20, pady=5)
-        self.recent_list.configure(state="disabled")  # Make it read-only
+        # filter, lazily paged list and more button of the history
+        self.history_panel = ctk.CTkFrame(self.sidebar_content, fg_color="transparent")
+        self.history_panel.grid(row=10, column=0, padx=20, pady=5)
+        self.history_search = ctk.CTkEntry(
+            self.history_panel, placeholder_text="Filter by file id or path", width=200
+        )
+        self.history_search.grid(row=0, column=0, pady=(0, 5))
+        self.history_search.bind("<KeyRelease>", self.schedule_history_reload)
+        self.history_status = ctk.CTkOptionMenu(
+            self.history_panel,
+            values=["all", "done", "failed", "cancelled"],
+            command=lambda value: self.reload_history(),
+            width=200,
+            height=24,
+        )
+        self.history_status.grid(row=1, column=0, pady=(0, 5))
+        self.history_list = ctk.CTkScrollableFrame(self.history_panel, height=150, width=180)
+        self.history_list.grid(row=2, column=0)
+        self.history_list.grid_columnconfigure(0, weight=1)
+        self.history_more = ctk.CTkButton(
+            self.history_panel,
+            text="Load more",
+            command=self.load_history_page,
+            height=24,
+            state="disabled",
+        )
+        self.history_more.grid(row=3, column=0, pady=(5, 0))
+        self.apply_button_style(self.history_more, "secondary")
 
         # show tool tip
         for widget, text in [
-            (self.save_button, "Save current token and URL"),
-            (self.clear_button, "Clear all saved settings"),
+            (self.save_button, "Save current token and URL to the profile"),
+            (self.clear_button, "Clear the entries and delete the profile"),
+            (self.profile_box, "Pick a saved project or type a new profile name"),
             (self.auto_save_cb, "Automatically save settings after conversion"),
+            (self.use_cache_cb, "Untick to download the document again (refresh the cache)"),
         ]:
             widget.bind("<Enter>", lambda e, t=text: self.show_tooltip(t))
             widget.bind("<Leave>", lambda e: self.cancel_tooltip())
@@ -343,15 +408,6 @@ class FigmaConverterApp(ctk.CTk):
         )
         self.theme_switch.grid(row=12, column=0, padx=20, pady=5)
 
-        # Load saved theme or use default
-        try:
-            config = load_config()
-            if config and "theme" in config:
-                self.theme_var.set(config["theme"])
-                ctk.set_appearance_mode(config["theme"])
-        except Exception as e:
-            self.out(f"Error loading theme: {str(e)}")
-
         # Main content frame
         self.main_frame = ctk.CTkFrame(self)
         self.main_frame.grid(
@@ -373,10 +429,24 @@ class FigmaConverterApp(ctk.CTk):
         self.url_label = ctk.CTkLabel(self.main_frame, text="Figma URL:", anchor="w")
         self.url_label.grid(row=2, column=0, padx=20, pady=(10, 0), sticky="w")
 
+        # url entry with the page and frame picker next to it
+        self.url_row = ctk.CTkFrame(self.main_frame, fg_color="transparent")
+        self.url_row.grid(row=3, column=0, padx=20, pady=(5, 20), sticky="ew")
+        self.url_row.grid_columnconfigure(0, weight=1)
+
         self.url_entry = ctk.CTkEntry(
-            self.main_frame, placeholder_text="Enter your figma url"
+            self.url_row, placeholder_text="Enter your figma url"
+        )
+        self.url_entry.grid(row=0, column=0, sticky="ew")
+
+        self.pick_button = ctk.CTkButton(
+            self.url_row,
+            text="Pick Frames...",
+            command=self.pick_nodes,
+            width=120,
         )
-        self.url_entry.grid(row=3, column=0, padx=20, pady=(5, 20), sticky="ew")
+        self.pick_button.grid(row=0, column=1, padx=(10, 0))
+        self.apply_button_style(self.pick_button, "secondary")
 
         # Convert button
         self.convert_button = ctk.CTkButton(
@@ -385,7 +455,25 @@ class FigmaConverterApp(ctk.CTk):
             command=self.convert_design,
             height=32,
         )
-        self.convert_button.grid(row=4, column=0, padx=20, pady=(0, 20), sticky="ew")
+        self.convert_button.grid(row=4, column=0, padx=20, pady=(0, 10), sticky="ew")
+
+        # Cancel button (enabled while conversions are queued or running)
+        self.cancel_button = ctk.CTkButton(
+            self.main_frame,
+            text="Cancel All",
+            command=self.cancel_conversion,
+            height=28,
+            state="disabled",
+        )
+        self.cancel_button.grid(row=5, column=0, padx=20, pady=(0, 10), sticky="ew")
+        self.apply_button_style(self.cancel_button, "danger")
+
+        # Job queue panel
+        self.jobs_label = ctk.CTkLabel(self.main_frame, text="Jobs:", anchor="w")
+        self.jobs_label.grid(row=6, column=0, padx=20, pady=(0, 0), sticky="w")
+        self.jobs_frame = ctk.CTkScrollableFrame(self.main_frame, height=110)
+        self.jobs_frame.grid(row=7, column=0, padx=20, pady=(5, 20), sticky="ew")
+        self.jobs_frame.grid_columnconfigure(0, weight=1)
 
         # Output textbox at the bottom
         self.output_textbox = ctk.CTkTextbox(
@@ -394,6 +482,8 @@ class FigmaConverterApp(ctk.CTk):
         )
         self.output_textbox.grid(row=5, column=1, padx=20, pady=(0, 20), sticky="nsew")
         self.output_textbox.configure(state="disabled")
+        self.log_sink.textbox = self.output_textbox
+        self.ui.start()
 
         # bottom bar frame
         self.bottom_bar = ctk.CTkFrame(
@@ -518,80 +608,111 @@ class FigmaConverterApp(ctk.CTk):
         }
         button.configure(**styles[style])
 
-    def add_recent_conversion(self, output_path: Path):
-        """Add a conversion to recent list"""
-
-        def open_path(path):
-            try:
-                if sys.platform == "win32":
-                    os.startfile(path)
-                elif sys.platform == "darwin":
-                    subprocess.run(["open", path], check=False)
-                else:  # linux
-                    subprocess.run(["xdg-open", str(path)], check=False)
-            except Exception as e:
-                self.out(f"Failed to open path: {e}")
-                self.show_alert("Error", f"Could not open file: {e}", "error")
-
-        def open_containing_folder(path):
-            try:
-                if sys.platform == "win32":
-                    subprocess.run(["explorer", "/select,", str(path)], check=False)
-                elif sys.platform == "darwin":
-                    subprocess.run(["open", "-R", str(path)], check=False)
-                else:  # linux
-                    subprocess.run(["xdg-open", str(path.parent)], check=False)
-            except Exception as e:
-                self.out(f"Failed to open containing folder: {e}")
-                self.show_alert("Error", f"Could not open folder: {e}", "error")
+    def open_path(self, path):
+        try:
+            if sys.platform == "win32":
+                os.startfile(path)
+            elif sys.platform == "darwin":
+                subprocess.run(["open", path], check=False)
+            else:  # linux
+                subprocess.run(["xdg-open", str(path)], check=False)
+        except Exception as e:
+            self.out(f"Failed to open path: {e}")
+            self.show_alert("Error", f"Could not open file: {e}", "error")
 
-        def show_context_menu(event, path):
-            context_menu = ctk.CTkFrame(self, fg_color=("gray85", "gray20"))
+    def open_containing_folder(self, path):
+        try:
+            if sys.platform == "win32":
+                subprocess.run(["explorer", "/select,", str(path)], check=False)
+            elif sys.platform == "darwin":
+                subprocess.run(["open", "-R", str(path)], check=False)
+            else:  # linux
+                subprocess.run(["xdg-open", str(path.parent)], check=False)
+        except Exception as e:
+            self.out(f"Failed to open containing folder: {e}")
+            self.show_alert("Error", f"Could not open folder: {e}", "error")
 
-            open_btn = ctk.CTkButton(
-                context_menu,
-                text="Open File",
-                command=lambda: [context_menu.destroy(), open_path(path)],
-                height=25,
-            )
-            open_btn.pack(padx=5, pady=2, fill="x")
+    def show_context_menu(self, event, path):
+        context_menu = ctk.CTkFrame(self, fg_color=("gray85", "gray20"))
 
-            open_folder_btn = ctk.CTkButton(
-                context_menu,
-                text="Show in Folder",
-                command=lambda: [context_menu.destroy(), open_containing_folder(path)],
-                height=25,
-            )
-            open_folder_btn.pack(padx=5, pady=2, fill="x")
+        open_btn = ctk.CTkButton(
+            context_menu,
+            text="Open File",
+            command=lambda: [context_menu.destroy(), self.open_path(path)],
+            height=25,
+        )
+        open_btn.pack(padx=5, pady=2, fill="x")
 
-            def close_menu(e=None):
-                context_menu.destroy()
+        open_folder_btn = ctk.CTkButton(
+            context_menu,
+            text="Show in Folder",
+            command=lambda: [context_menu.destroy(), self.open_containing_folder(path)],
+            height=25,
+        )
+        open_folder_btn.pack(padx=5, pady=2, fill="x")
 
-            # Close menu when clicking outside
-            context_menu.bind("<Leave>", lambda e: self.after(1000, close_menu))
+        def close_menu(e=None):
+            context_menu.destroy()
 
-            # Position menu at cursor
-            context_menu.place(
-                x=event.x_root - self.winfo_rootx(), y=event.y_root - self.winfo_rooty()
-            )
+        # Close menu when clicking outside
+        context_menu.bind("<Leave>", lambda e: self.after(1000, close_menu))
 
-        self.recent_list.configure(state="normal")
-        self.recent_list.insert("1.0", f"➜ {output_path.name}\n")
-        self.recent_list.tag_add("link", "1.0", "1.end")
-        self.recent_list.tag_config("link", foreground="blue", underline=True)
-        self.recent_list.tag_bind(
-            "link", "<Button-1>", lambda e, p=output_path: open_path(p)
-        )
-        self.recent_list.tag_bind(
-            "link", "<Button-3>", lambda e, p=output_path: show_context_menu(e, p)
+        # Position menu at cursor
+        context_menu.place(
+            x=event.x_root - self.winfo_rootx(), y=event.y_root - self.winfo_rooty()
         )
 
-        # Keep only last 5 conversions
-        content = self.recent_list.get("1.0", "end")
-        if content.count("\n") > 5:
-            last_newline = content.find("\n", content.find("\n") + 1)
-            self.recent_list.delete("6.0", "end")
-        self.recent_list.configure(state="disabled")
+    def schedule_history_reload(self, event=None):
+        """Filter the history once typing pauses"""
+        if self.history_after_id:
+            self.after_cancel(self.history_after_id)
+        self.history_after_id = self.after(250, self.reload_history)
+
+    def reload_history(self):
+        """Show the first page of the history matching the filter"""
+        self.history_after_id = None
+        for widget in self.history_rows:
+            widget.destroy()
+        self.history_rows = []
+        self.history_before = None
+        self.load_history_page()
+
+    def load_history_page(self):
+        """Append the next page of the history, only PAGE_SIZE rows are read at a time"""
+        status = self.history_status.get()
+        try:
+            entries = get_history().page(
+                self.history_search.get().strip(),
+                None if status == "all" else status,
+                before=self.history_before,
+            )
+        except Exception as e:
+            self.out(f"Could not read the conversion history: {e}")
+            return
+        icons = {DONE: "✓", FAILED: "❌", CANCELLED: "⨯"}
+        for entry in entries:
+            label = ctk.CTkLabel(
+                self.history_list,
+                text=f"{icons.get(entry.status, '•')} {entry.path.name}  {entry.duration:.1f}s",
+                anchor="w",
+                cursor="hand2",
+                text_color=("blue", "light sky blue") if entry.status == DONE else ("gray40", "gray60"),
+            )
+            label.grid(row=len(self.history_rows), column=0, sticky="ew")
+            label.bind("<Button-1>", lambda e, p=entry.path: self.open_path(p))
+            label.bind("<Button-3>", lambda e, p=entry.path: self.show_context_menu(e, p))
+            label.bind(
+                "<Enter>",
+                lambda e, entry=entry: self.show_tooltip(
+                    f"{entry.file_id} {entry.status}, {entry.assets} asset(s), "
+                    f"{entry.bytes / 1024:.0f} KB\n{entry.output_path}"
+                ),
+            )
+            label.bind("<Leave>", lambda e: self.cancel_tooltip())
+            self.history_rows.append(label)
+        if entries:
+            self.history_before = entries[-1].id
+        self.history_more.configure(state="normal" if len(entries) == PAGE_SIZE else "disabled")
 
     def show_tooltip(self, text):
         """Show tooltip when hovering over elements"""
@@ -622,6 +743,32 @@ class FigmaConverterApp(ctk.CTk):
             self.active_tooltip.destroy()
             self.active_tooltip = None
 
+    def set_window_icon(self):
+        """Set the window icon from a PNG, converting the .ico only once into the data directory"""
+        try:
+            png_path = self.root / "figma-converter.png"
+            if not png_path.exists():
+                icon_path = self.root / "figma-converter.ico"
+                if not icon_path.exists():
+                    return
+                png_path = PATHS["icon"]
+                if not png_path.exists() or png_path.stat().st_mtime < icon_path.stat().st_mtime:
+                    from PIL import Image
+
+                    png_path.parent.mkdir(parents=True, exist_ok=True)
+                    Image.open(icon_path).save(png_path)
+            self.iconphoto = PhotoImage(file=str(png_path))
+            self.wm_iconphoto(True, self.iconphoto)
+        except Exception as e:
+            logging.warning(f"Could not set application icon: {e}")
+
+    def finish_startup(self):
+        """Work kept off the first-paint path: data directories, logging and the saved settings"""
+        init_app()
+        self.default_dir.mkdir(parents=True, exist_ok=True)
+        self.load_settings()
+        self.reload_history()
+
     def toggle_sidebar(self):
         if self.sidebar_expanded:
             # Collapse sidebar
@@ -645,21 +792,19 @@ class FigmaConverterApp(ctk.CTk):
             f"Auto save {'enabled' if state else 'disabled'}"
         )  # we use simple one liners to finish off
 
-    def out(self, message, clear=False):
+    def out(self, message, clear=False, log=True):
         """- Helper method to update output textbox
                 Args:
                         message: text to display
                         clear: whether to clear previous output
+                        log: also write it to app.log (False for streamed converter lines, already logged)
         its convinenet to say out instead of long naming!
+        Safe from any thread: lines are queued and written in batches on the Tk thread.
         """
-        self.output_textbox.configure(state="normal")
-        if clear:
-            self.output_textbox.delete("0.0", "end")
-        self.output_textbox.insert("end", f"{message}\n")
-        self.output_textbox.configure(state="disabled")
-        self.output_textbox.see("end")  # make sure to show the latest output
+        self.log_sink.write(message, clear)
         # log every output using logger here
-        logging.info(message)
+        if log:
+            logging.info(message)
 
     # alert system modal
     def show_alert(self, title, message, level="info", callback=None):
@@ -737,20 +882,16 @@ class FigmaConverterApp(ctk.CTk):
         )
         self.out(f"Theme switched to {new_theme} mode")
 
-        if save_settings and hasattr(self, "token_entry"):
+        if save_settings:
             try:
-                save_config(
-                    self.token_entry.get().strip(),
-                    self.url_entry.get().strip(),
-                    str(self.auto_save.get()),
-                    new_theme,
-                )
+                get_profile_store().save_settings(theme=new_theme)
             except Exception as e:
                 self.out(f"Error saving config: {str(e)}")
         self.out(f"Theme switched to {new_theme} mode")
 
     def show_progress(self):
         """Show progress during conversion"""
+        self.progress_bar.configure(mode="indeterminate")
         self.progress_bar.grid()
         self.progress_bar.set(0)  # reset to start
         self.progress_bar.start()  # speed of animation
@@ -776,8 +917,17 @@ class FigmaConverterApp(ctk.CTk):
                 )
                 return
 
-            save_config(token, url, auto_save, theme)
-            self.out("SUCCESS: Configs saved!")
+            profile = self.profile_var.get().strip() or None
+            save_config(
+                token,
+                url,
+                auto_save,
+                theme,
+                profile=profile,
+                options={"use_cache": self.use_cache.get()},
+            )
+            self.refresh_profiles()
+            self.out(f"SUCCESS: Configs saved to profile {self.profile_var.get()}!")
             self.show_alert("Saved", "Settings saved successfully")
 
             # Update original values
@@ -791,10 +941,23 @@ class FigmaConverterApp(ctk.CTk):
                 "Save Error", f"Error while saving settings: {str(e)}", "warning"
             )
 
-    def load_settings(self):
+    def refresh_profiles(self):
+        """Fill the profile picker and select the active profile"""
+        store = get_profile_store()
+        self.profile_box.configure(values=store.names())
+        self.profile_var.set(store.active if store.names() else "")
+
+    def select_profile(self, name):
+        """Load the profile picked in the combo box"""
+        if name in get_profile_store().names():
+            get_profile_store().set_active(name)
+            self.load_settings(name)
+
+    def load_settings(self, profile=None):
         """Allow the user to load the saved settings"""
         try:
-            config = load_config()
+            config = load_config(profile)
+            self.refresh_profiles()
             if config:
                 # Store original values
                 self.original_token = config.get("token", "")
@@ -813,30 +976,30 @@ class FigmaConverterApp(ctk.CTk):
                 self.auto_save.set(self.original_auto_save.lower() == "true")
                 self.theme_var.set(self.original_theme)
                 self.toggle_theme(save_settings=False)  # Apply theme without saving
+                self.use_cache.set(config.get("options", {}).get("use_cache", True))
 
-                self.out("Success: Loaded previous config")
+                self.out(f"Success: Loaded profile {config['profile']}")
                 if config.get("last_used"):
                     self.out(f"Info: Settings last saved on {config.get('last_used')}")
         except Exception as e:
             self.out(f"ERROR: Error while loading settings: {str(e)}")
             self.show_alert("Load Error", f"{str(e)}", "warning")
 
-    def delete_config_file(self):
-        """Delete the configuration file from disk"""
+    def delete_profile(self):
+        """Delete the selected profile from the config file"""
+        name = self.profile_var.get().strip()
         try:
-            if CONFIG_PATH.exists():
-                CONFIG_PATH.unlink()
-                self.out("Configuration file deleted successfully")
-                self.show_alert("Success", "Configuration file deleted successfully")
+            if name and get_profile_store().delete(name):
+                self.refresh_profiles()
+                self.out(f"Profile {name} deleted successfully")
+                self.show_alert("Success", f"Profile {name} deleted successfully")
                 return True
             else:
-                self.out("No configuration file found")
+                self.out("No saved profile selected")
                 return False
         except Exception as e:
-            self.out(f"Error deleting configuration file: {str(e)}")
-            self.show_alert(
-                "Error", f"Failed to delete configuration file: {str(e)}", "error"
-            )
+            self.out(f"Error deleting profile: {str(e)}")
+            self.show_alert("Error", f"Failed to delete profile: {str(e)}", "error")
             return False
 
     def clear_settings(self):
@@ -854,9 +1017,9 @@ class FigmaConverterApp(ctk.CTk):
         self.original_auto_save = "false"
 
         try:
-            # Delete the config file instead of saving empty values
-            self.delete_config_file()
-            self.out("Settings cleared and config file deleted")
+            # Delete the profile instead of saving empty values
+            self.delete_profile()
+            self.out("Settings cleared and profile deleted")
         except Exception as e:
             self.out(f"Error clearing settings: {str(e)}")
 
@@ -871,11 +1034,19 @@ class FigmaConverterApp(ctk.CTk):
             }
 
             def continue_export() -> None:
-                with open(CONFIG_PATH, "w") as f:
+                from tkinter import filedialog
+
+                target = filedialog.asksaveasfilename(
+                    initialdir=self.default_dir,
+                    initialfile=f"{self.profile_var.get() or 'settings'}.json",
+                    defaultextension=".json",
+                )
+                if not target:
+                    return
+                with open(target, "w") as f:
                     json.dump(settings, f, indent=4)
                 self.show_alert("Success", "Settings exported successfully!", "info")
-                self.out(f"Settings exported to {CONFIG_PATH}")
-                self.out(f"Settings exported to {CONFIG_PATH}")
+                self.out(f"Settings exported to {target}")
 
             # Check if essential settings are empty
             if not settings["token"] or not settings["url"]:
@@ -894,15 +1065,111 @@ class FigmaConverterApp(ctk.CTk):
             self.out(f"Settings export failed: {str(e)}")
 
     # -------------------------------------CORE METHODS----------------------------------------
-    def select_output_directory(self):
+    def select_output_directory(self, initial=None):
         """Allow user to select output directory"""
         from tkinter import filedialog
 
-        directory = filedialog.askdirectory()
+        directory = filedialog.askdirectory(initialdir=initial) if initial else filedialog.askdirectory()
         if directory:
             return Path(directory)
         return None
 
+    def pick_nodes(self):
+        """Load the pages and frames of the url's file on a separate thread and open the picker"""
+        token = self.token_entry.get().strip()
+        url = self.url_entry.get().strip()
+        if not token or not url:
+            self.show_alert("Warning", "Enter the token and url to pick pages or frames", "warning")
+            return
+        try:
+            file_id = extract_file_id(url)
+        except ValueError as e:
+            self.out(str(e))
+            self.show_alert("Pick Error", "Try to check your Figma url!")
+            return
+        self.pick_button.configure(state="disabled")
+        self.out(f"Loading the pages of {file_id} ...")
+
+        def load():
+            try:
+                # depth=2 lists the pages and their top level frames, none of their contents
+                pages = FigmaClient(token).get_pages(file_id, depth=2)
+                self.ui.call(self.show_node_picker, file_id, pages, extract_node_ids(url))
+            except Exception as e:
+                self.out(f"Could not load the pages: {e}")
+            finally:
+                self.ui.call(lambda: self.pick_button.configure(state="normal"))
+
+        Thread(target=load, daemon=True).start()
+
+    def show_node_picker(self, file_id, pages, url_nodes):
+        """Checkboxes for the pages of a file and their top level frames
+        Args:
+                pages: the pages as get_pages(depth=2) returns them
+                url_nodes: node ids of the url, ticked when nothing was picked for this file yet
+        """
+        ticked = set(self.selected_nodes if self.selection_file_id == file_id else url_nodes)
+        dialog = ctk.CTkToplevel(self)
+        dialog.title("Pick Pages and Frames")
+        dialog.geometry("420x500")
+        dialog.transient(self)
+        dialog.grab_set()
+
+        label = ctk.CTkLabel(
+            dialog,
+            text="Tick whole pages or single frames, only those are converted",
+            wraplength=380,
+        )
+        label.pack(padx=10, pady=(15, 5))
+
+        tree = ctk.CTkScrollableFrame(dialog)
+        tree.pack(fill="both", expand=True, padx=10, pady=5)
+        variables = {}
+        for page in pages:
+            frames = list(page_frames(page))
+            variables[page["id"]] = ctk.BooleanVar(value=page["id"] in ticked)
+            ctk.CTkCheckBox(
+                tree,
+                text=f"{page.get('name')} ({len(frames)} frames)",
+                variable=variables[page["id"]],
+                font=ctk.CTkFont(weight="bold"),
+            ).pack(anchor="w", pady=(8, 2))
+            for frame in frames:
+                variables[frame["id"]] = ctk.BooleanVar(value=frame["id"] in ticked)
+                ctk.CTkCheckBox(
+                    tree, text=frame.get("name", frame["id"]), variable=variables[frame["id"]]
+                ).pack(anchor="w", padx=(25, 0), pady=2)
+
+        def choose(node_ids):
+            self.set_node_selection(file_id, node_ids)
+            dialog.destroy()
+
+        btn_frame = ctk.CTkFrame(dialog, fg_color="transparent")
+        btn_frame.pack(fill="x", padx=10, pady=10)
+        use_btn = ctk.CTkButton(
+            btn_frame,
+            text="Use Selection",
+            command=lambda: choose([node_id for node_id, var in variables.items() if var.get()]),
+            width=120,
+        )
+        use_btn.pack(side="left", padx=5)
+        whole_btn = ctk.CTkButton(
+            btn_frame, text="Whole File", command=lambda: choose([]), width=120
+        )
+        whole_btn.pack(side="right", padx=5)
+        self.apply_button_style(whole_btn, "secondary")
+
+    def set_node_selection(self, file_id, node_ids):
+        """Convert only node_ids (pages or frames) of file_id from now on, [] for the whole file"""
+        self.selection_file_id = file_id
+        self.selected_nodes = node_ids
+        if node_ids:
+            self.pick_button.configure(text=f"{len(node_ids)} Selected")
+            self.out(f"Converting {len(node_ids)} selected page(s)/frame(s) of {file_id}")
+        else:
+            self.pick_button.configure(text="Whole File")
+            self.out(f"Converting the whole file {file_id}")
+
     def convert_design(self):
         """- Handle the design conversion process."""
         # Clear previous output
@@ -912,58 +1179,165 @@ class FigmaConverterApp(ctk.CTk):
             # Get input values
             token = self.token_entry.get().strip()
             url = self.url_entry.get().strip()
+            # a url of a saved project selects its profile (and token when none is entered)
+            profile = get_profile_store().find_by_url(url) or self.profile_var.get().strip() or None
+            config = load_config(profile) if profile else {}
+            if profile and profile != self.profile_var.get():
+                self.profile_var.set(profile)
+                self.out(f"Using profile {profile} of this file")
+            if not token and config.get("token"):
+                token = config["token"]
+                self.token_entry.insert(0, token)
             if not token or not url:
                 self.out("Error: Please enter both token and URL")
                 self.show_alert("Warning", "Please Enter the values", "error")
                 return
 
             # Ask user for output directory
-            output_path = self.select_output_directory()
+            output_path = self.select_output_directory(config.get("output_dir"))
             if output_path is None:
                 output_path = create_path()  # Use default if user cancels
 
             self.out(f"SUCCESS: Using output directory: {output_path}")
 
-            file_url = convert_url_to_file_format(url)
+            # frames picked for this file replace the node-id of the url
+            picked = self.selection_file_id == extract_file_id(url)
+            file_url = convert_url_to_file_format(url, self.selected_nodes if picked else None)
             self.out(f"Converted URL format: {file_url}")
             if self.auto_save.get():
-                save_config(token, url)
+                save_config(
+                    token,
+                    url,
+                    profile=profile,
+                    output_dir=output_path,
+                    options={"use_cache": self.use_cache.get()},
+                )
+                self.refresh_profiles()
                 self.out("Saved configuration for next time.")
 
             if file_url:
-                self.out("Running converter..")
-                self.show_progress()
-                conversion_thread = Thread(
-                    target=self.run_conversion, args=(token, file_url, output_path)
+                job = self.scheduler.submit(
+                    token, file_url, output_path, refresh=not self.use_cache.get()
                 )
-                conversion_thread.daemon = True
-                conversion_thread.start()
-                self.update_status("Done", ("green", "dark orange"))
+                self.out(f"Queued job #{job.id}")
+                self.refresh_jobs()
 
             else:
                 self.out("Empty url, can't convert empty url")
                 self.out("Please check yor url!")
-                self.hide_progress()
                 self.update_status("Stopped", ("red", "dark orange"))
 
         except Exception as e:
             self.out(f"Error while converting Error: {str(e)}")
             self.show_alert("Convert Error", "Try to check your Figma url!")
 
-    def run_conversion(self, token, file_url, output_path):
-        """- Run conversion in a seprate thead"""
+    def run_conversion(self, job):
+        """- Run a queued job on a scheduler worker, streaming its output to the output box"""
+        tag = f"[#{job.id}]"  # output of concurrent jobs is interleaved
         try:
-            converter(token, file_url, output_path)
-            # use after() to safely update ui from thread
-            self.after(0, lambda: self.out("✓ Conversion completed successfully!"))
-            self.after(0, lambda: self.out(f"✓ Output saved to: {output_path}"))
-            self.after(0, lambda: self.add_recent_conversion(output_path))
-            self.out("Conversion completed successfully!")
-        except subprocess.SubprocessError as error:
-            self.after(0, lambda: self.out(f"❌ Converter error: {str(error)}"))
-            self.out(f"Converter error: {str(error)}")
-        finally:
-            self.after(0, self.hide_progress)
+            result = None
+            for event in stream_converter(
+                job.token,
+                job.file_url,
+                job.output_path,
+                pool=self.converter_pool,
+                cancel=job.cancel,
+                **job.options,
+            ):
+                # out() is thread safe, other ui updates go through the ui queue
+                if event.kind == "log":
+                    self.out(f"{tag} {event.message}", log=False)
+                elif event.kind == "progress":
+                    self.scheduler.set_stage(job, f"{event.stage} {event.done}/{event.total}")
+                elif event.kind == "result":
+                    result = event.result
+            self.out(f"{tag} ✓ Conversion completed successfully!")
+            self.out(f"{tag} ✓ {result.summary()}")
+            for line in format_metrics(result.metrics).splitlines():
+                self.out(f"{tag}   {line}")
+            self.out(f"{tag} ✓ Output saved to: {job.output_path}")
+            return result
+        except ConversionTimeout as error:
+            self.out(f"{tag} ❌ Conversion timed out: {str(error)}")
+            raise
+        except ConversionCancelled:
+            self.out(f"{tag} Conversion cancelled")
+            raise
+        except Exception as error:
+            self.out(f"{tag} ❌ Converter error: {str(error)}")
+            raise
+
+    def cancel_conversion(self):
+        """Stop every queued and running conversion (kills the converter process trees)"""
+        if any(job.active for job in self.scheduler.jobs()):
+            self.scheduler.cancel_all()
+            self.out("Cancelling conversions...")
+            self.update_status("Cancelling...", ("orange", "dark orange"))
+
+    def schedule_jobs_refresh(self, job=None):
+        """Redraw the job panel on the next ui tick, however many jobs changed until then"""
+        if job is not None and not job.active:
+            self.ui.call(self.reload_history)  # the scheduler recorded the finished job
+        if not self.jobs_refresh_pending:
+            self.jobs_refresh_pending = True
+            self.ui.call(self.refresh_jobs)
+
+    def refresh_jobs(self):
+        """Redraw the job queue panel, the status and the progress bar from the scheduler"""
+        self.jobs_refresh_pending = False
+        jobs = self.scheduler.jobs()
+        for job_id in list(self.job_rows):
+            if job_id not in {job.id for job in jobs}:
+                for widget in self.job_rows.pop(job_id):
+                    widget.destroy()
+
+        for row, job in enumerate(reversed(jobs)):  # newest first
+            if job.id not in self.job_rows:
+                label = ctk.CTkLabel(self.jobs_frame, anchor="w")
+                button = ctk.CTkButton(self.jobs_frame, width=60, height=22)
+                self.job_rows[job.id] = (label, button)
+            label, button = self.job_rows[job.id]
+            details = job.stage if job.state == RUNNING else job.error
+            duration = f"{job.duration:.1f}s" if job.started else ""
+            label.configure(
+                text=f"#{job.id} {job.file_id}  {job.state}  {duration}  {details}".rstrip()
+            )
+            label.grid(row=row, column=0, padx=5, pady=1, sticky="ew")
+            if job.active:
+                button.configure(text="Cancel", command=lambda i=job.id: self.scheduler.cancel(i))
+                button.grid(row=row, column=1, padx=5, pady=1)
+            elif job.state in (FAILED, CANCELLED):
+                button.configure(text="Retry", command=lambda i=job.id: self.scheduler.retry(i))
+                button.grid(row=row, column=1, padx=5, pady=1)
+            else:
+                button.grid_remove()
+
+        counts = self.scheduler.counts()
+        if counts[RUNNING] or counts[QUEUED]:
+            self.update_status(
+                f"Running {counts[RUNNING]}, queued {counts[QUEUED]}", ("orange", "dark orange")
+            )
+            self.cancel_button.configure(state="normal")
+            if not self.progress_bar.winfo_ismapped():
+                self.show_progress()
+        else:
+            if counts[FAILED]:
+                self.update_status(f"Done, {counts[FAILED]} failed", ("red", "dark orange"))
+            else:
+                self.update_status("Done", ("green", "dark orange"))
+            self.cancel_button.configure(state="disabled")
+            self.hide_progress()
+
+    def start_worker_pool(self) -> None:
+        """Prewarm the converter worker pool on a separate thread"""
+
+        def start():
+            try:
+                self.converter_pool = get_default_pool()
+            except Exception as e:
+                logging.warning(f"Could not start converter pool, converting in process: {e}")
+
+        Thread(target=start, daemon=True).start()
 
     def run_check_update(self) -> None:
         """Run the check for update system on separate thread to prevent blocking"""
@@ -974,121 +1348,110 @@ class FigmaConverterApp(ctk.CTk):
         except Exception as e:
             self.out(f"There was error running the check update {str(e)}")
 
-    def check_for_updates(self):
-        """Check for new releases on GitHub"""
+    def check_for_updates(self, force=False):
+        """Check for new releases on GitHub (cached, see updater.UpdateChecker)"""
+        checker = UpdateChecker(self.GITHUB_REPO, self.CURRENT_VERSION)
+        online = force or not checker.is_fresh()
         try:
-            self.out("Checking for update... ")
-            self.show_progress()
-            repo_url = f"{self.GITHUB_API_URL}{self.GITHUB_REPO}"
-            repo_response: requests.Response = requests.get(repo_url, timeout=5)
-
-            if repo_response.status_code == 404:
-                self.out("Repository not found, skipping update check")
-                return
-
-            # If repository exists, check for releases
-            releases_url = f"{repo_url}/releases/latest"
-            response = requests.get(releases_url, timeout=5)
-
-            if response.status_code == 200:
-                release_data = response.json()
-                latest_version = release_data["tag_name"].lstrip("v")
-                try:
-                    if semver.compare(latest_version, self.CURRENT_VERSION) > 0:
-                        self.update_available = True
-                        self.show_update_notification(
-                            latest_version, release_data["body"], release_data["assets"]
-                        )
-                except ValueError:
-                    self.out("Invalid version format in GitHub release")
-            elif response.status_code == 404:
+            if online:
+                self.out("Checking for update... ")
+                self.ui.call(self.show_progress)
+            release = checker.latest_release(force)
+            if release is None:
                 self.out("No releases found in repository")
-            else:
-                self.out(f"Failed to check releases: {response.status_code}")
-        except requests.RequestException as e:
-            self.out(f"Network error checking for updates: {e}")
-        except requests.Timeout:
-            self.out("Timeout checking for updates")
-        except ConnectionError:
-            self.out("Connection error checking for updates")
+            elif checker.is_newer(release):
+                self.update_available = True
+                self.ui.call(
+                    self.show_update_notification,
+                    release["tag_name"].lstrip("v"),
+                    release["body"],
+                    release["assets"],
+                )
+        except UpdateError as e:
+            self.out(str(e))
         except Exception as e:
             self.out(f"Failed to check for updates: {e}")
         finally:
-            self.hide_progress()
+            if online:
+                self.ui.call(self.hide_progress)
+
+    def download_and_install_update(self, asset, assets=None):
+        """Download the update in the background (resumable and checksum verified), then install it"""
+        cancel = Event()
+
+        # Create progress dialog
+        progress_dialog = ctk.CTkToplevel(self)
+        progress_dialog.title("Downloading Update")
+        progress_dialog.geometry("400x170")
+        progress_dialog.transient(self)
+
+        # Progress label and bar
+        progress_label = ctk.CTkLabel(progress_dialog, text="Preparing download...")
+        progress_label.pack(pady=10)
+
+        progress_bar = ctk.CTkProgressBar(progress_dialog)
+        progress_bar.pack(pady=10, padx=20, fill="x")
+        progress_bar.set(0)
+
+        cancel_button = ctk.CTkButton(progress_dialog, text="Cancel", command=cancel.set)
+        cancel_button.pack(pady=5)
+        self.apply_button_style(cancel_button, "danger")
+
+        def show_download_progress(downloaded, total):
+            if total:
+                progress_bar.set(downloaded / total)
+                progress_label.configure(
+                    text=f"Downloading: {int(downloaded / total * 100)}% "
+                    f"({downloaded / 1024 ** 2:.1f} of {total / 1024 ** 2:.1f} MB)"
+                )
+            else:
+                progress_label.configure(text=f"Downloading: {downloaded / 1024 ** 2:.1f} MB")
 
-    def download_and_install_update(self, download_url):
-        """Download and install the update"""
-        try:
-            # Create progress dialog
-            progress_dialog = ctk.CTkToplevel(self)
-            progress_dialog.title("Downloading Update")
-            progress_dialog.geometry("400x150")
-            progress_dialog.transient(self)
-            progress_dialog.grab_set()
-
-            # Progress label and bar
-            progress_label = ctk.CTkLabel(progress_dialog, text="Preparing download...")
-            progress_label.pack(pady=10)
-
-            progress_bar = ctk.CTkProgressBar(progress_dialog)
-            progress_bar.pack(pady=10, padx=20, fill="x")
-            progress_bar.set(0)
-
-            # Download with progress tracking
-            response = requests.get(download_url, stream=True)
-            total_size = int(response.headers.get("content-length", 0))
-
-            if response.status_code == 200:
-                # Prepare download path
-                download_path = self.root / "update.zip"
-                block_size = 8192
-                downloaded = 0
-
-                with open(download_path, "wb") as f:
-                    for data in response.iter_content(block_size):
-                        downloaded += len(data)
-                        f.write(data)
-                        if total_size:
-                            progress = downloaded / total_size
-                            progress_bar.set(progress)
-                            progress_label.configure(
-                                text=f"Downloading: {int(progress * 100)}%"
-                            )
-                            progress_dialog.update()
-
-                progress_label.configure(text="Installing update...")
-                progress_bar.set(1)
-
-                # Extract update
-                import zipfile
-
-                with zipfile.ZipFile(download_path, "r") as zip_ref:
-                    zip_ref.extractall(self.root)
-
-                # Clean up
-                download_path.unlink()
-                progress_dialog.destroy()
-
-                # Show success message
+        def show_installing():
+            progress_label.configure(text="Installing update...")
+            progress_bar.set(1)
+            cancel_button.configure(state="disabled")
+
+        def finished(error=None):
+            progress_dialog.destroy()
+            if error is None:
                 self.show_alert(
                     "Update Complete",
                     "The update has been installed successfully. The application will now restart.",
                     "info",
                     self.restart_application,
                 )
-            else:
-                progress_dialog.destroy()
-                self.show_alert(
-                    "Update Failed",
-                    "Failed to download the update. Please try again later.",
-                    "error",
-                )
+            elif not cancel.is_set():
+                self.show_alert("Update Failed", f"Failed to install the update: {error}", "error")
 
-        except Exception as e:
-            self.out(f"Failed to download/install update: {e}")
-            self.show_alert(
-                "Update Failed", f"Failed to install the update: {str(e)}", "error"
-            )
+        def work():
+            try:
+                show = lambda done, total: self.ui.call(show_download_progress, done, total)
+                manifest = fetch_manifest(assets)
+                if manifest is not None:
+                    # only the files that changed since the installed version
+                    staged = stage_from_manifest(manifest, self.root, progress=show, cancel=cancel)
+                else:
+                    download_path = download_asset(
+                        asset["browser_download_url"],
+                        UPDATE_DIR / asset["name"],
+                        expected_sha256(asset, assets),
+                        progress=show,
+                        cancel=cancel,
+                    )
+                    staged = stage_from_zip(download_path, self.root)
+                    download_path.unlink()
+                self.ui.call(show_installing)
+                install(staged, self.root)
+                self.ui.call(finished)
+            except Exception as e:
+                if cancel.is_set():
+                    self.out("Update download cancelled, it will resume next time")
+                else:
+                    self.out(f"Failed to download/install update: {e}")
+                self.ui.call(finished, e)
+
+        Thread(target=work, daemon=True).start()
 
     def restart_application(self):
         """Restart the application after update"""
@@ -1100,9 +1463,9 @@ class FigmaConverterApp(ctk.CTk):
 
         def handle_download():
             dialog.destroy()
-            if assets and len(assets) > 0:
-                download_url = assets[0]["browser_download_url"]
-                self.download_and_install_update(download_url)
+            asset = pick_asset(assets)
+            if installable(assets):
+                self.download_and_install_update(asset, assets)
             else:
                 # Fallback to release page if no assets
                 open_release_page()
@@ -1130,7 +1493,7 @@ class FigmaConverterApp(ctk.CTk):
         btn_frame = ctk.CTkFrame(dialog, fg_color="transparent")
         btn_frame.pack(fill="x", padx=10, pady=10)
 
-        if assets and len(assets) > 0:
+        if installable(assets):
             update_btn = ctk.CTkButton(
                 btn_frame, text="Download & Install", command=handle_download
             )
@@ -1146,14 +1509,18 @@ class FigmaConverterApp(ctk.CTk):
         later_btn.pack(side="right", padx=5)
 
 
-if __name__ == "__main__":
+def main():
     try:
+        recover()  # roll back an update that was interrupted while it was being installed
         app = FigmaConverterApp()
-        app.after(500, app.load_settings)
+        app.after(STARTUP_DELAY_MS, app.finish_startup)
+        app.after(1000, app.start_worker_pool)
         app.after(2000, app.run_check_update)
         app.mainloop()
     except KeyboardInterrupt:
         print("/ Programm killed by user")
         sys.exit(1)
 
-        sys.exit(1)
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,188 @@
+""" Conversion history.
+    Every finished conversion (done, failed or cancelled) is recorded in a SQLite database
+    under DATA_DIR with its file id, version, output path, duration, asset count and size,
+    so earlier outputs can be found and conversion times compared without scanning the
+    output directories. Pages are read with keyset pagination, newest first.
+"""
+import time
+import sqlite3
+import logging
+import threading
+
+from dataclasses import dataclass
+from pathlib import Path
+from typing import Dict, List, Optional
+
+PAGE_SIZE = 20
+SCHEMA_VERSION = 1
+
+_SCHEMA = """
+CREATE TABLE IF NOT EXISTS conversions (
+    id INTEGER PRIMARY KEY AUTOINCREMENT,
+    file_id TEXT NOT NULL,
+    file_url TEXT NOT NULL DEFAULT '',
+    version TEXT,
+    output_path TEXT NOT NULL,
+    status TEXT NOT NULL,
+    duration REAL NOT NULL DEFAULT 0,
+    frames INTEGER NOT NULL DEFAULT 0,
+    assets INTEGER NOT NULL DEFAULT 0,
+    bytes INTEGER NOT NULL DEFAULT 0,
+    error TEXT NOT NULL DEFAULT '',
+    finished REAL NOT NULL
+);
+CREATE INDEX IF NOT EXISTS conversions_file_id ON conversions (file_id, id);
+CREATE INDEX IF NOT EXISTS conversions_status ON conversions (status, id);
+CREATE INDEX IF NOT EXISTS conversions_finished ON conversions (finished);
+"""
+
+
+@dataclass
+class HistoryEntry:
+    """One recorded conversion."""
+    id: int
+    file_id: str
+    file_url: str
+    version: Optional[str]
+    output_path: str
+    status: str
+    duration: float
+    frames: int
+    assets: int
+    bytes: int
+    error: str
+    finished: float
+
+    @property
+    def path(self) -> Path:
+        return Path(self.output_path)
+
+
+def output_size(result) -> int:
+    """Bytes written by a conversion (its generated files and assets)."""
+    total = 0
+    for path in list(getattr(result, "files", [])) + list(getattr(result, "assets", [])):
+        try:
+            total += Path(path).stat().st_size
+        except OSError:
+            pass
+    return total
+
+
+class ConversionHistory:
+    """SQLite index of finished conversions, safe to share between threads.
+    Args:
+            path: the database file (created on first use)
+    """
+
+    def __init__(self, path):
+        self.path = Path(path)
+        self._lock = threading.Lock()
+        self._conn = None
+
+    def _connect(self) -> sqlite3.Connection:
+        if self._conn is None:
+            self.path.parent.mkdir(parents=True, exist_ok=True)
+            conn = sqlite3.connect(str(self.path), timeout=10, check_same_thread=False)
+            conn.row_factory = sqlite3.Row
+            conn.execute("PRAGMA journal_mode=WAL")  # readers do not block the writing process
+            conn.execute("PRAGMA synchronous=NORMAL")
+            if conn.execute("PRAGMA user_version").fetchone()[0] < SCHEMA_VERSION:
+                conn.executescript(_SCHEMA)
+                conn.execute(f"PRAGMA user_version = {SCHEMA_VERSION}")
+            self._conn = conn
+        return self._conn
+
+    def record(self, file_id: str, output_path, status: str, duration: float = 0.0, result=None,
+               file_url: str = "", version: Optional[str] = None, error: str = "",
+               frames: int = 0, assets: int = 0, size: int = 0) -> int:
+        """Add a finished conversion.
+        Args:
+                result: its ConversionResult when there is one, frames / assets / size are read from it
+                frames / assets / size: counts of a result that only exists in another process
+        """
+        if result is not None:
+            frames, assets, size = result.frame_count, len(result.assets), output_size(result)
+        row = (
+            file_id, file_url, version, str(output_path), status, float(duration or 0),
+            frames, assets, size, error or "", time.time(),
+        )
+        try:
+            with self._lock:
+                conn = self._connect()
+                with conn:
+                    cursor = conn.execute(
+                        "INSERT INTO conversions (file_id, file_url, version, output_path, status, duration,"
+                        " frames, assets, bytes, error, finished) VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?)", row)
+                return cursor.lastrowid
+        except sqlite3.Error as e:
+            # the history is a convenience, never fail a conversion because of it
+            logging.warning(f"Could not record the conversion of {file_id} in the history: {e}")
+            return 0
+
+    def record_job(self, job) -> int:
+        """Record a finished scheduler.ConversionJob."""
+        try:
+            file_id = job.file_id
+        except ValueError:
+            file_id = ""
+        return self.record(file_id, job.output_path, job.state, job.duration, job.result,
+                           job.file_url, job.version, job.error)
+
+    @staticmethod
+    def _where(search: str = "", status: Optional[str] = None, before: Optional[int] = None):
+        clauses, params = [], []
+        if search:
+            clauses.append("(file_id LIKE ? ESCAPE '\\' OR output_path LIKE ? ESCAPE '\\')")
+            pattern = "%" + search.replace("\\", "\\\\").replace("%", "\\%").replace("_", "\\_") + "%"
+            params += [pattern, pattern]
+        if status:
+            clauses.append("status = ?")
+            params.append(status)
+        if before:
+            clauses.append("id < ?")
+            params.append(before)
+        return (" WHERE " + " AND ".join(clauses)) if clauses else "", params
+
+    def page(self, search: str = "", status: Optional[str] = None, before: Optional[int] = None,
+             limit: int = PAGE_SIZE) -> List[HistoryEntry]:
+        """Newest entries matching search (file id or output path) and status.
+        Pass the id of the last entry of a page as before to get the next one.
+        """
+        where, params = self._where(search, status, before)
+        with self._lock:
+            rows = self._connect().execute(
+                f"SELECT * FROM conversions{where} ORDER BY id DESC LIMIT ?", params + [limit]).fetchall()
+        return [HistoryEntry(**dict(row)) for row in rows]
+
+    def count(self, search: str = "", status: Optional[str] = None) -> int:
+        where, params = self._where(search, status)
+        with self._lock:
+            return self._connect().execute(f"SELECT COUNT(*) FROM conversions{where}", params).fetchone()[0]
+
+    def latest_output(self, file_id: str) -> Optional[Path]:
+        """Output directory of the last successful conversion of a file."""
+        with self._lock:
+            row = self._connect().execute(
+                "SELECT output_path FROM conversions WHERE file_id = ? AND status = 'done' ORDER BY id DESC LIMIT 1",
+                (file_id,)).fetchone()
+        return Path(row[0]) if row else None
+
+    def trends(self, file_id: Optional[str] = None, days: int = 30) -> List[Dict]:
+        """Daily count and mean / max duration of successful conversions over the last days."""
+        query = ("SELECT date(finished, 'unixepoch', 'localtime') AS day, COUNT(*) AS conversions,"
+                 " AVG(duration) AS mean_duration, MAX(duration) AS max_duration"
+                 " FROM conversions WHERE status = 'done' AND finished >= ?")
+        params: list = [time.time() - days * 86400]
+        if file_id:
+            query += " AND file_id = ?"
+            params.append(file_id)
+        with self._lock:
+            rows = self._connect().execute(query + " GROUP BY day ORDER BY day", params).fetchall()
+        return [dict(row) for row in rows]
+
+    def close(self) -> None:
+        with self._lock:
+            if self._conn is not None:
+                self._conn.close()
+                self._conn = None
@@ -0,0 +1,114 @@
+""" Incremental conversion support.
+    Keeps a per-output manifest of Merkle style subtree hashes so a re-conversion only
+    regenerates the frames (and frame assets) whose hash changed.
+"""
+import json
+import hashlib
+import logging
+
+from pathlib import Path
+from typing import Dict, Optional
+
+MANIFEST_NAME = ".figma-manifest.json"
+MANIFEST_VERSION = 1
+
+
+def subtree_hash(node: Dict, hashes: Optional[Dict[str, str]] = None) -> str:
+    """Hash a node from its own properties and the hashes of its children.
+    When a dict is passed in, the hash of every visited subtree is stored in it by node id.
+    """
+    children = node.get("children") or []
+    own = {key: value for key, value in node.items() if key != "children"}
+    digest = hashlib.sha256(json.dumps(own, sort_keys=True, separators=(",", ":")).encode())
+    for child in children:
+        digest.update(subtree_hash(child, hashes).encode())
+    value = digest.hexdigest()
+    if hashes is not None and "id" in node:
+        hashes[node["id"]] = value
+    return value
+
+
+def frame_entry(frame: Dict, script: str, assets_dir: str) -> Dict:
+    """Manifest entry of a frame: its hash, where it was written and its direct child hashes."""
+    hashes: Dict[str, str] = {}
+    frame_hash = subtree_hash(frame, hashes)
+    return {
+        "hash": frame_hash,
+        "script": script,
+        "assets": assets_dir,
+        # the position is part of the entry because asset file names are positional
+        "children": {
+            child["id"]: [position, hashes[child["id"]]]
+            for position, child in enumerate(frame.get("children", []), start=1)
+            if "id" in child
+        },
+    }
+
+
+class OutputManifest:
+    """The manifest stored in a build directory."""
+
+    def __init__(self, build_dir):
+        self.path = Path(build_dir) / MANIFEST_NAME
+        self.frames: Dict[str, Dict] = {}
+        if self.path.exists():
+            try:
+                data = json.loads(self.path.read_text(encoding="utf-8"))
+                if data.get("version") == MANIFEST_VERSION:
+                    self.frames = data.get("frames", {})
+            except (OSError, ValueError) as e:
+                logging.warning(f"Ignoring unreadable manifest {self.path}: {e}")
+
+    def is_current(self, frame_id: str, entry: Dict) -> bool:
+        """True if the frame is unchanged and its generated script and asset folder are still on disk."""
+        previous = self.frames.get(frame_id)
+        return (
+            previous is not None
+            and previous["hash"] == entry["hash"]
+            and previous["script"] == entry["script"]
+            and previous["assets"] == entry["assets"]
+            and (self.path.parent / entry["script"]).exists()
+            and (self.path.parent / "assets" / entry["assets"]).is_dir()
+        )
+
+    def unchanged_children(self, frame_id: str, entry: Dict) -> set:
+        """Ids of the direct children whose subtree did not change since the last run."""
+        previous = self.frames.get(frame_id)
+        if previous is None or previous["assets"] != entry["assets"]:
+            return set()
+        old = previous.get("children", {})
+        return {child_id for child_id, value in entry["children"].items() if old.get(child_id) == value}
+
+    def remove_stale(self, current: Dict[str, Dict]) -> None:
+        """Delete the scripts and asset folders of the previous run that are no longer produced."""
+        used_scripts = {entry["script"] for entry in current.values()}
+        used_assets = {entry["assets"] for entry in current.values()}
+        for frame_id, entry in self.frames.items():
+            script = self.path.parent / entry["script"]
+            if entry["script"] not in used_scripts and script.exists():
+                script.unlink()
+                logging.info(f"Removed stale script {script.name} of frame {frame_id}")
+            assets = self.path.parent / "assets" / entry["assets"]
+            if entry["assets"] not in used_assets and assets.is_dir():
+                for asset in assets.iterdir():
+                    asset.unlink()
+                assets.rmdir()
+
+    def merged(self, current: Dict[str, Dict]) -> Dict[str, Dict]:
+        """current plus the frames of the previous run it does not replace, for partial runs.
+        A previous frame whose script or asset folder was reused by current is dropped, its files
+        were overwritten.
+        """
+        used_scripts = {entry["script"] for entry in current.values()}
+        used_assets = {entry["assets"] for entry in current.values()}
+        kept = {
+            frame_id: entry for frame_id, entry in self.frames.items()
+            if frame_id not in current and entry["script"] not in used_scripts and entry["assets"] not in used_assets
+        }
+        return {**kept, **current}
+
+    def save(self, frames: Dict[str, Dict]) -> None:
+        self.frames = frames
+        tmp = self.path.with_suffix(".tmp")
+        tmp.write_text(json.dumps({"version": MANIFEST_VERSION, "frames": frames}), encoding="utf-8")
+        tmp.replace(self.path)
@@ -0,0 +1,262 @@
+""" Staged update installation.
+    A release ships a manifest.json with the sha256 of every application file. Only the files
+    whose hash differs from the installed copy are downloaded (or taken from the release zip),
+    verified and staged in a side directory, then swapped in under a journal so an interrupted
+    install is rolled back on the next start instead of leaving a mixed tree.
+
+    python installer.py <app dir> --version 1.2.0 --base-url <url>   # write the release manifest
+"""
+import os
+import sys
+import json
+import shutil
+import hashlib
+import logging
+import zipfile
+import argparse
+import tempfile
+
+from dataclasses import dataclass, field
+from pathlib import Path
+from typing import Dict, List, Optional
+
+from updater import UPDATE_DIR, UpdateError, file_sha256, pick_asset
+
+MANIFEST_NAME = "manifest.json"
+JOURNAL_PATH = UPDATE_DIR / "install.json"
+# never part of an update: user data, caches and version control
+EXCLUDED = {".figma-converter", "__pycache__", ".git", ".venv", "venv", "build", "dist"}
+
+
+@dataclass
+class StagedUpdate:
+    """Verified files of an update waiting to be swapped in."""
+    version: str
+    staging: Path
+    manifest: Dict
+    files: List[str] = field(default_factory=list)  # relative paths, changed or new
+    deleted: List[str] = field(default_factory=list)  # relative paths no longer shipped
+
+
+def app_files(root: Path) -> List[str]:
+    """Relative paths of the application files under root."""
+    root = Path(root)
+    paths = []
+    for path in sorted(root.rglob("*")):
+        relative = path.relative_to(root)
+        if path.is_file() and not EXCLUDED.intersection(relative.parts) and path.name != MANIFEST_NAME:
+            paths.append(relative.as_posix())
+    return paths
+
+
+def build_manifest(root: Path, version: str, base_url: Optional[str] = None) -> Dict:
+    """Manifest of every application file under root (written next to them by the release script)."""
+    root = Path(root)
+    manifest = {"version": version, "files": {}}
+    if base_url:
+        manifest["base_url"] = base_url.rstrip("/")
+    for relative in app_files(root):
+        path = root / relative
+        manifest["files"][relative] = {"sha256": file_sha256(path), "size": path.stat().st_size}
+    return manifest
+
+
+def load_installed_manifest(root: Path) -> Dict:
+    try:
+        return json.loads((Path(root) / MANIFEST_NAME).read_text())
+    except (OSError, ValueError):
+        return {}
+
+
+def plan(manifest: Dict, root: Path):
+    """Files of manifest that differ from root, and installed files the new version dropped."""
+    root = Path(root)
+    changed = []
+    for relative, entry in manifest["files"].items():
+        target = root / relative
+        if not target.is_file() or file_sha256(target) != entry["sha256"]:
+            changed.append(relative)
+    previous = load_installed_manifest(root).get("files", {})
+    deleted = [relative for relative in previous if relative not in manifest["files"]]
+    return changed, deleted
+
+
+def installable(assets) -> bool:
+    """True when a release ships a manifest or a zip the updater can install."""
+    return pick_asset(assets) is not None or any(asset["name"] == MANIFEST_NAME for asset in assets or [])
+
+
+def fetch_manifest(assets) -> Optional[Dict]:
+    """The manifest.json attached to a release, None for releases that only ship a zip."""
+    asset = next((asset for asset in assets or [] if asset["name"] == MANIFEST_NAME), None)
+    if asset is None:
+        return None
+    import requests
+
+    response = requests.get(asset["browser_download_url"], timeout=30)
+    response.raise_for_status()
+    return response.json()
+
+
+def _staging_dir(version: str) -> Path:
+    staging = UPDATE_DIR / f"staging-{version}"
+    shutil.rmtree(staging, ignore_errors=True)
+    staging.mkdir(parents=True)
+    return staging
+
+
+def _checked_path(base: Path, relative: str) -> Path:
+    """base / relative, refusing paths that would leave base."""
+    path = (base / relative).resolve()
+    try:
+        path.relative_to(base.resolve())
+    except ValueError:
+        raise UpdateError(f"Refusing to install outside the application: {relative}") from None
+    return path
+
+
+def stage_from_manifest(manifest: Dict, root: Path, progress=None, cancel=None) -> StagedUpdate:
+    """Download and verify only the files that changed.
+    Args:
+            progress: called with (bytes done, bytes total) of the changed files
+            cancel: threading.Event, stops the download
+    """
+    import requests
+
+    changed, deleted = plan(manifest, root)
+    staged = StagedUpdate(manifest["version"], _staging_dir(manifest["version"]), manifest, changed, deleted)
+    total = sum(manifest["files"][relative].get("size", 0) for relative in changed)
+    done = 0
+    logging.info(f"Update {staged.version}: {len(changed)} changed file(s), {total} bytes to download")
+    session = requests.Session()
+    for relative in changed:
+        if cancel is not None and cancel.is_set():
+            raise UpdateError("Download cancelled")
+        entry = manifest["files"][relative]
+        url = entry.get("url") or f"{manifest['base_url']}/{relative}"
+        response = session.get(url, timeout=60)
+        response.raise_for_status()
+        if hashlib.sha256(response.content).hexdigest() != entry["sha256"]:
+            raise UpdateError(f"Checksum mismatch for {relative}")
+        target = _checked_path(staged.staging, relative)
+        target.parent.mkdir(parents=True, exist_ok=True)
+        target.write_bytes(response.content)
+        done += len(response.content)
+        if progress is not None:
+            progress(done, total)
+    return staged
+
+
+def stage_from_zip(zip_path: Path, root: Path) -> StagedUpdate:
+    """Stage the files of a full release zip that differ from root.
+    A manifest.json inside the zip is used to verify the files.
+    """
+    UPDATE_DIR.mkdir(parents=True, exist_ok=True)
+    with zipfile.ZipFile(zip_path) as archive, tempfile.TemporaryDirectory(dir=UPDATE_DIR) as extracted:
+        for member in archive.namelist():
+            _checked_path(Path(extracted), member)
+        archive.extractall(extracted)
+        shipped = load_installed_manifest(extracted)
+        manifest = build_manifest(extracted, shipped.get("version", Path(zip_path).stem))
+        for relative, entry in shipped.get("files", {}).items():
+            if manifest["files"].get(relative, {}).get("sha256") != entry["sha256"]:
+                raise UpdateError(f"Checksum mismatch for {relative} in {Path(zip_path).name}")
+        changed, deleted = plan(manifest, root)
+        staged = StagedUpdate(manifest["version"], _staging_dir(manifest["version"]), manifest, changed, deleted)
+        for relative in changed:
+            target = staged.staging / relative
+            target.parent.mkdir(parents=True, exist_ok=True)
+            shutil.copy2(Path(extracted) / relative, target)
+    return staged
+
+
+def _write_journal(journal: Dict) -> None:
+    JOURNAL_PATH.parent.mkdir(parents=True, exist_ok=True)
+    fd, tmp = tempfile.mkstemp(dir=JOURNAL_PATH.parent, suffix=".tmp")
+    with os.fdopen(fd, "w") as f:
+        json.dump(journal, f, indent=2)
+        f.flush()
+        os.fsync(f.fileno())
+    os.replace(tmp, JOURNAL_PATH)
+
+
+def _place(source: Path, target: Path) -> None:
+    """Atomically put source at target (the staging dir may be on another filesystem)."""
+    target.parent.mkdir(parents=True, exist_ok=True)
+    try:
+        os.replace(source, target)
+    except OSError:
+        tmp = target.with_name(target.name + ".update-tmp")
+        shutil.copy2(source, tmp)
+        os.replace(tmp, target)
+
+
+def install(staged: StagedUpdate, root: Path) -> None:
+    """Swap the staged files into root under a journal, then record the new manifest."""
+    root = Path(root)
+    backup = UPDATE_DIR / f"backup-{staged.version}"
+    shutil.rmtree(backup, ignore_errors=True)
+    backup.mkdir(parents=True)
+    touched = staged.files + staged.deleted
+    for relative in touched:
+        current = root / relative
+        if current.is_file():
+            (backup / relative).parent.mkdir(parents=True, exist_ok=True)
+            shutil.copy2(current, backup / relative)
+    manifest_path = root / MANIFEST_NAME
+    if manifest_path.is_file():
+        shutil.copy2(manifest_path, backup / MANIFEST_NAME)
+
+    journal = {"version": staged.version, "root": str(root), "backup": str(backup),
+               "files": staged.files, "deleted": staged.deleted}
+    _write_journal(journal)
+    for relative in staged.files:
+        _place(staged.staging / relative, _checked_path(root, relative))
+    for relative in staged.deleted:
+        (root / relative).unlink(missing_ok=True)
+    fd, tmp = tempfile.mkstemp(dir=root, suffix=".tmp")
+    with os.fdopen(fd, "w") as f:
+        json.dump(staged.manifest, f, indent=2)
+    os.replace(tmp, manifest_path)
+
+    JOURNAL_PATH.unlink()  # the install is complete from here on
+    shutil.rmtree(backup, ignore_errors=True)
+    shutil.rmtree(staged.staging, ignore_errors=True)
+    logging.info(f"Installed update {staged.version}: {len(staged.files)} file(s) replaced, "
+                 f"{len(staged.deleted)} removed")
+
+
+def recover() -> bool:
+    """Roll back an install that was interrupted while swapping; True when one was rolled back."""
+    try:
+        journal = json.loads(JOURNAL_PATH.read_text())
+    except (OSError, ValueError):
+        return False
+    root, backup = Path(journal["root"]), Path(journal["backup"])
+    for relative in journal["files"] + journal["deleted"] + [MANIFEST_NAME]:
+        saved = backup / relative
+        if saved.is_file():
+            _place(saved, root / relative)
+        elif relative not in journal["deleted"]:
+            (root / relative).unlink(missing_ok=True)  # new in the interrupted version
+    JOURNAL_PATH.unlink()
+    shutil.rmtree(backup, ignore_errors=True)
+    logging.warning(f"Rolled back the interrupted install of version {journal['version']}")
+    return True
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Write the update manifest of a release")
+    parser.add_argument("root", help="application directory of the release")
+    parser.add_argument("--version", required=True)
+    parser.add_argument("--base-url", help="url the files are served from, e.g. "
+                        "https://raw.githubusercontent.com/<owner>/<repo>/<tag>")
+    args = parser.parse_args(argv)
+    manifest = build_manifest(Path(args.root), args.version, args.base_url)
+    (Path(args.root) / MANIFEST_NAME).write_text(json.dumps(manifest, indent=2))
+    print(f"Wrote {MANIFEST_NAME} with {len(manifest['files'])} file(s)")
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,203 @@
+""" Conversion metrics.
+    A conversion records the duration, byte count and request count of every stage it goes
+    through (url normalization, metadata fetch, document fetch, JSON parse, image export,
+    asset download, code generation and file write). The per-job numbers travel with the
+    ConversionResult as a JSON-able dict, and finished jobs are added to cumulative counters
+    in a Prometheus text-format file that node_exporter's textfile collector (or the daemon's
+    /metrics endpoint) can serve.
+"""
+import os
+import re
+import json
+import time
+import logging
+import tempfile
+import threading
+
+from contextlib import contextmanager
+from pathlib import Path
+from typing import Dict, Optional
+
+from locking import file_lock
+
+# stages in the order a native conversion goes through them
+STAGES = (
+    "normalize_url",
+    "metadata",
+    "document_fetch",
+    "parse",
+    "image_export",
+    "asset_download",
+    "codegen",
+    "file_write",
+)
+PREFIX = "figma_converter"
+SUMMARY_NAME = ".figma-metrics.json"  # per-job summary written next to the generated code
+
+_COUNTERS = {
+    # metric: (help, key in the per-stage numbers)
+    "stage_seconds_total": ("Time spent in each conversion stage.", "seconds"),
+    "stage_bytes_total": ("Bytes downloaded, parsed or written in each conversion stage.", "bytes"),
+    "stage_requests_total": ("HTTP requests made in each conversion stage.", "requests"),
+}
+_SAMPLE = re.compile(r'^(\w+)(?:\{(\w+)="([^"]*)"\})?\s+(\S+)$')
+
+
+class ConversionMetrics:
+    """Per-stage numbers of one conversion, safe to update from the download threads."""
+
+    def __init__(self):
+        self.stages: Dict[str, Dict[str, float]] = {}
+        self._lock = threading.Lock()
+
+    def add(self, stage: str, seconds: float = 0.0, bytes: int = 0, requests: int = 0) -> None:
+        with self._lock:
+            entry = self.stages.setdefault(stage, {"seconds": 0.0, "bytes": 0, "requests": 0})
+            entry["seconds"] += seconds
+            entry["bytes"] += bytes
+            entry["requests"] += requests
+
+    @contextmanager
+    def stage(self, name: str, client=None):
+        """Time a block; with a FigmaClient its requests and downloaded bytes are counted too."""
+        requests_before = client.request_count if client is not None else 0
+        bytes_before = client.bytes_downloaded if client is not None else 0
+        start = time.perf_counter()
+        try:
+            yield self
+        finally:
+            self.add(
+                name,
+                time.perf_counter() - start,
+                client.bytes_downloaded - bytes_before if client is not None else 0,
+                client.request_count - requests_before if client is not None else 0,
+            )
+
+    def to_dict(self) -> Dict[str, Dict[str, float]]:
+        """The stages in conversion order, with seconds rounded to microseconds."""
+        with self._lock:
+            order = sorted(self.stages, key=lambda name: STAGES.index(name) if name in STAGES else len(STAGES))
+            return {name: {**self.stages[name], "seconds": round(self.stages[name]["seconds"], 6)}
+                    for name in order}
+
+
+def format_metrics(stages: Dict[str, Dict[str, float]]) -> str:
+    """One line per stage, for logs and the GUI output."""
+    lines = []
+    for name, entry in stages.items():
+        line = f"{name:<15}{entry['seconds'] * 1000:9.1f} ms"
+        if entry.get("requests"):
+            line += f"  {entry['requests']} request(s)"
+        if entry.get("bytes"):
+            line += f"  {entry['bytes'] / 1024:.1f} KB"
+        lines.append(line)
+    return "\n".join(lines)
+
+
+def job_summary(result) -> Dict:
+    """JSON summary of a ConversionResult: totals and the per-stage numbers."""
+    return {
+        "file_id": result.file_id,
+        "output_path": str(result.output_path),
+        "finished": time.time(),
+        "duration": round(result.duration, 6),
+        "frames": result.frame_count,
+        "skipped": result.skipped,
+        "assets": len(result.assets),
+        "requests": result.request_count,
+        "bytes_downloaded": result.bytes_downloaded,
+        "stages": result.metrics,
+    }
+
+
+def write_summary(result) -> Optional[Path]:
+    """Write the job summary into the output directory of result."""
+    path = Path(result.output_path) / SUMMARY_NAME
+    try:
+        path.write_text(json.dumps(job_summary(result), indent=2), encoding="utf-8")
+    except OSError as e:
+        logging.warning(f"Could not write the metrics summary {path}: {e}")
+        return None
+    return path
+
+
+def _format_value(value: float) -> str:
+    return str(int(value)) if float(value).is_integer() else f"{value:.6f}".rstrip("0")
+
+
+class MetricsRegistry:
+    """Cumulative counters of finished conversions in a Prometheus text-format file.
+    Every process adds its jobs to the file under a lock, so the counters keep growing
+    across the GUI, CLI, batch and daemon runs that share the data directory.
+    Args:
+            path: the .prom file (written atomically)
+    """
+
+    def __init__(self, path):
+        self.path = Path(path)
+        self.lock_path = self.path.with_name(self.path.name + ".lock")
+        self._lock = threading.Lock()
+
+    def read(self) -> Dict[tuple, float]:
+        """Samples of the file by (metric, label value)."""
+        samples = {}
+        try:
+            text = self.path.read_text()
+        except OSError:
+            return samples
+        for line in text.splitlines():
+            match = _SAMPLE.match(line)
+            if match:
+                name, _, label, value = match.groups()
+                try:
+                    samples[(name, label)] = float(value)
+                except ValueError:
+                    pass
+        return samples
+
+    def observe(self, status: str, duration: float = 0.0, stages: Optional[Dict] = None) -> None:
+        """Add a finished conversion (done, failed or cancelled) and its stage numbers."""
+        try:
+            with self._lock, file_lock(self.lock_path):
+                samples = self.read()
+                key = (f"{PREFIX}_conversions_total", status)
+                samples[key] = samples.get(key, 0) + 1
+                key = (f"{PREFIX}_conversion_seconds_total", None)
+                samples[key] = samples.get(key, 0) + duration
+                for stage, entry in (stages or {}).items():
+                    for metric, (_, field) in _COUNTERS.items():
+                        key = (f"{PREFIX}_{metric}", stage)
+                        samples[key] = samples.get(key, 0) + entry.get(field, 0)
+                self._write(samples)
+        except OSError as e:
+            logging.warning(f"Could not update the metrics file {self.path}: {e}")
+
+    def render(self, samples: Optional[Dict[tuple, float]] = None) -> str:
+        samples = self.read() if samples is None else samples
+        help_texts = {
+            f"{PREFIX}_conversions_total": ("Finished conversions by status.", "status"),
+            f"{PREFIX}_conversion_seconds_total": ("Total time of finished conversions.", None),
+            **{f"{PREFIX}_{metric}": (text, "stage") for metric, (text, _) in _COUNTERS.items()},
+        }
+        lines = []
+        for name, (text, label) in help_texts.items():
+            values = sorted((key[1] or "", value) for key, value in samples.items() if key[0] == name)
+            if not values:
+                continue
+            lines += [f"# HELP {name} {text}", f"# TYPE {name} counter"]
+            for label_value, value in values:
+                labels = f'{{{label}="{label_value}"}}' if label else ""
+                lines.append(f"{name}{labels} {_format_value(value)}")
+        return "\n".join(lines) + "\n"
+
+    def _write(self, samples: Dict[tuple, float]) -> None:
+        self.path.parent.mkdir(parents=True, exist_ok=True)
+        fd, tmp = tempfile.mkstemp(dir=self.path.parent, suffix=".tmp")
+        with os.fdopen(fd, "w") as f:
+            f.write(self.render(samples))
+        os.chmod(tmp, 0o644)  # readable by a textfile collector running as another user
+        os.replace(tmp, self.path)
+
+    def observe_job(self, job) -> None:
+        """Add a finished scheduler.ConversionJob."""
+        self.observe(job.state, job.duration, getattr(job.result, "metrics", None))
@@ -0,0 +1,188 @@
+""" Profile store.
+    Keeps many named projects (token, url, output directory and conversion options) in one
+    JSON file next to the app wide settings. Reads are served from memory until the file's
+    mtime changes, writes go through a lock file and a temp file renamed over the old one,
+    so several processes can share the store without corrupting it.
+"""
+import os
+import json
+import logging
+import tempfile
+import threading
+
+from contextlib import contextmanager
+from datetime import datetime
+from pathlib import Path
+from typing import Dict, List, Optional
+
+from engine import extract_file_id
+from locking import file_lock
+
+DEFAULT_PROFILE = "default"
+DEFAULT_SETTINGS = {"auto_save": "False", "theme": "light"}
+PROFILE_FIELDS = ("token", "url", "output_dir", "options")
+
+
+def _empty() -> Dict:
+    return {"active": DEFAULT_PROFILE, "settings": dict(DEFAULT_SETTINGS), "profiles": {}}
+
+
+def _migrate(data: Dict) -> Dict:
+    """Turn the old single slot config.json (token, url, auto_save, theme) into a store."""
+    if "profiles" in data:
+        return data
+    store = _empty()
+    for key in DEFAULT_SETTINGS:
+        if key in data:
+            store["settings"][key] = data[key]
+    if data.get("token") or data.get("url"):
+        store["profiles"][DEFAULT_PROFILE] = {
+            "token": data.get("token", ""),
+            "url": data.get("url", ""),
+            "last_used": data.get("last_used"),
+        }
+    return store
+
+
+class ProfileStore:
+    """Named profiles and app settings in one JSON file.
+    Args:
+            path: the JSON file (an old single slot config is migrated on first read)
+    """
+
+    def __init__(self, path):
+        self.path = Path(path)
+        self.lock_path = self.path.with_name(self.path.name + ".lock")
+        self._lock = threading.RLock()
+        self._stamp = None  # (mtime_ns, size, inode) of the file the cache was read from
+        self._data = _empty()
+        self._by_file_id: Dict[str, str] = {}
+
+    def _stat(self):
+        try:
+            st = self.path.stat()
+        except FileNotFoundError:
+            return None
+        return st.st_mtime_ns, st.st_size, st.st_ino
+
+    def _load(self, data: Dict, stamp) -> None:
+        self._data = data
+        self._stamp = stamp
+        self._by_file_id = {}
+        for name, profile in data["profiles"].items():
+            try:
+                self._by_file_id.setdefault(extract_file_id(profile.get("url") or ""), name)
+            except ValueError:
+                pass
+
+    def data(self) -> Dict:
+        """The whole store, re-read only when the file changed on disk."""
+        with self._lock:
+            stamp = self._stat()
+            if stamp != self._stamp:
+                data = _empty()
+                if stamp is not None:
+                    try:
+                        data = self._read()
+                    except ValueError as e:
+                        logging.error(f"Ignoring unreadable profile store {self.path}: {e}")
+                self._load(data, stamp)
+            return self._data
+
+    def _read(self) -> Dict:
+        """The store on disk, ValueError when it is not a JSON object."""
+        data = json.loads(self.path.read_text() or "{}")
+        if not isinstance(data, dict):
+            raise ValueError(f"expected a JSON object, found {type(data).__name__}")
+        return _migrate(data)
+
+    def _set_aside_unreadable(self) -> None:
+        """Move an unreadable store to <name>.corrupt (call under the file lock), so the next write
+        starts a new store without destroying the saved profiles.
+        """
+        if self._stat() is None:
+            return
+        try:
+            self._read()
+            return
+        except ValueError as e:
+            error = e
+        aside = self.path.with_name(self.path.name + ".corrupt")
+        if aside.exists():
+            aside = self.path.with_name(f"{self.path.name}.{datetime.now():%Y%m%d-%H%M%S}.corrupt")
+        os.replace(self.path, aside)
+        logging.warning(f"Profile store {self.path} is unreadable ({error}), moved it to {aside.name}")
+
+    @contextmanager
+    def _update(self):
+        """Read the current file under the lock, let the caller change it and write it back atomically."""
+        with self._lock, file_lock(self.lock_path):
+            self._stamp = None  # another process may have written since the last read
+            self._set_aside_unreadable()
+            data = json.loads(json.dumps(self.data()))  # changed copy, the cache stays intact on errors
+            yield data
+            fd, tmp = tempfile.mkstemp(dir=self.path.parent, suffix=".tmp")
+            try:
+                with os.fdopen(fd, "w") as f:
+                    json.dump(data, f, indent=4)
+                    f.flush()
+                    os.fsync(f.fileno())
+                os.replace(tmp, self.path)
+            except BaseException:
+                Path(tmp).unlink(missing_ok=True)
+                raise
+            self._load(data, self._stat())
+
+    def names(self) -> List[str]:
+        return sorted(self.data()["profiles"])
+
+    @property
+    def active(self) -> str:
+        return self.data().get("active") or DEFAULT_PROFILE
+
+    def get(self, name: Optional[str] = None) -> Dict:
+        """Copy of a profile (the active one by default), empty when it does not exist."""
+        return dict(self.data()["profiles"].get(name or self.active, {}))
+
+    def settings(self) -> Dict:
+        return {**DEFAULT_SETTINGS, **self.data()["settings"]}
+
+    def find_by_file_id(self, file_id: str) -> Optional[str]:
+        """Name of the profile whose url points at file_id."""
+        self.data()
+        return self._by_file_id.get(file_id)
+
+    def find_by_url(self, url: str) -> Optional[str]:
+        try:
+            return self.find_by_file_id(extract_file_id(url))
+        except ValueError:
+            return None
+
+    def save(self, name: Optional[str] = None, activate: bool = True, **fields) -> Dict:
+        """Create or update a profile; fields left out (or None) keep their stored value."""
+        with self._update() as data:
+            name = name or data.get("active") or DEFAULT_PROFILE
+            profile = data["profiles"].setdefault(name, {})
+            profile.update({key: value for key, value in fields.items() if key in PROFILE_FIELDS and value is not None})
+            profile["last_used"] = datetime.now().strftime("%Y-%m-%d %H:%M:%S")
+            if activate:
+                data["active"] = name
+        return dict(profile)
+
+    def save_settings(self, **settings) -> None:
+        with self._update() as data:
+            data["settings"].update({key: value for key, value in settings.items() if value is not None})
+
+    def set_active(self, name: str) -> None:
+        if name not in self.data()["profiles"]:
+            raise KeyError(f"No profile named {name!r}")
+        with self._update() as data:
+            data["active"] = name
+
+    def delete(self, name: str) -> bool:
+        """Remove a profile, True when it existed."""
+        with self._update() as data:
+            existed = data["profiles"].pop(name, None) is not None
+            if data.get("active") == name:
+                data["active"] = next(iter(sorted(data["profiles"])), DEFAULT_PROFILE)
+        return existed
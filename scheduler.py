@@ -0,0 +1,229 @@
+""" Conversion job scheduler.
+    Queues conversion jobs, runs them on a bounded number of worker threads, tracks the
+    state of every job and dedupes identical jobs (same file id, selected nodes, version and output).
+"""
+import time
+import queue
+import logging
+import itertools
+import threading
+
+from dataclasses import dataclass, field
+from pathlib import Path
+from typing import Callable, Dict, List, Optional
+
+from engine import FigmaClient, extract_file_id, extract_node_ids
+from errors import ConversionCancelled, ConversionTimeout
+
+QUEUED = "queued"
+RUNNING = "running"
+DONE = "done"
+FAILED = "failed"
+CANCELLED = "cancelled"
+
+DEFAULT_WORKERS = 2
+MAX_FINISHED_JOBS = 50  # finished jobs kept for the queue panel
+
+
+@dataclass
+class ConversionJob:
+    """A conversion request and its progress."""
+    id: int
+    token: str
+    file_url: str
+    output_path: Path
+    options: Dict = field(default_factory=dict)
+    state: str = QUEUED
+    stage: str = ""
+    attempts: int = 0
+    version: Optional[str] = None
+    submitted: float = field(default_factory=time.time)
+    started: Optional[float] = None
+    finished: Optional[float] = None
+    error: str = ""
+    result: object = None
+    cancel: threading.Event = field(default_factory=threading.Event, repr=False)
+    done_event: threading.Event = field(default_factory=threading.Event, repr=False)
+
+    @property
+    def file_id(self) -> str:
+        return extract_file_id(self.file_url)
+
+    @property
+    def node_ids(self) -> List[str]:
+        """Pages and frames the job is limited to, [] for the whole file."""
+        return extract_node_ids(self.file_url)
+
+    @property
+    def duration(self) -> float:
+        if self.started is None:
+            return 0.0
+        return (self.finished or time.time()) - self.started
+
+    @property
+    def active(self) -> bool:
+        return self.state in (QUEUED, RUNNING)
+
+
+def resolve_document_version(job: ConversionJob) -> Optional[str]:
+    """Document version of a job from a cheap metadata request (a resolve_version for JobScheduler)."""
+    return FigmaClient(job.token).get_file_meta(job.file_id)["version"]
+
+
+class JobScheduler:
+    """Bounded pool of worker threads running conversion jobs.
+    Args:
+            run_job: called with the job on a worker thread, returns the ConversionResult or raises
+            workers: number of jobs that may run at the same time
+            on_change: called with the job whenever its state changes (from any thread)
+            resolve_version: optional callable(job) returning the document version, used to
+                    share one run between identical in-flight jobs
+            history: optional history.ConversionHistory every finished job is recorded in
+            metrics: optional metrics.MetricsRegistry every finished job is counted in
+    """
+
+    def __init__(self, run_job: Callable[[ConversionJob], object], workers: int = DEFAULT_WORKERS,
+                 on_change: Optional[Callable[[ConversionJob], None]] = None,
+                 resolve_version: Optional[Callable[[ConversionJob], Optional[str]]] = None,
+                 history=None, metrics=None):
+        self.run_job = run_job
+        self.history = history
+        self.metrics = metrics
+        self.on_change = on_change or (lambda job: None)
+        self.resolve_version = resolve_version
+        self._queue: "queue.Queue[ConversionJob]" = queue.Queue()
+        self._jobs: Dict[int, ConversionJob] = {}
+        self._running: Dict[tuple, ConversionJob] = {}
+        self._ids = itertools.count(1)
+        self._lock = threading.Lock()
+        for index in range(max(1, workers)):
+            threading.Thread(target=self._work, name=f"scheduler-{index}", daemon=True).start()
+
+    def submit(self, token: str, file_url: str, output_path, **options) -> ConversionJob:
+        """Queue a conversion; an identical job that is still queued is returned instead."""
+        output_path = Path(output_path)
+        with self._lock:
+            for job in self._jobs.values():
+                if job.state == QUEUED and job.file_url == file_url and job.output_path == output_path:
+                    logging.info(f"Job #{job.id} already queued for {job.file_id}, not adding another")
+                    return job
+            job = ConversionJob(next(self._ids), token, file_url, output_path, dict(options))
+            self._jobs[job.id] = job
+            self._trim()
+        self._queue.put(job)
+        self.on_change(job)
+        return job
+
+    def retry(self, job_id: int) -> Optional[ConversionJob]:
+        """Queue a finished job again."""
+        job = self._jobs.get(job_id)
+        if job is None or job.active:
+            return None
+        with self._lock:
+            job.state, job.error, job.stage = QUEUED, "", ""
+            job.started = job.finished = None
+            job.cancel = threading.Event()
+            job.done_event = threading.Event()
+        self._queue.put(job)
+        self.on_change(job)
+        return job
+
+    def cancel(self, job_id: int) -> None:
+        job = self._jobs.get(job_id)
+        if job is not None and job.active:
+            job.cancel.set()
+            if job.state == QUEUED:
+                self._finish(job, CANCELLED)
+
+    def cancel_all(self) -> None:
+        for job in self.jobs():
+            self.cancel(job.id)
+
+    def jobs(self) -> List[ConversionJob]:
+        with self._lock:
+            return sorted(self._jobs.values(), key=lambda job: job.id)
+
+    def counts(self) -> Dict[str, int]:
+        counts = {QUEUED: 0, RUNNING: 0, DONE: 0, FAILED: 0, CANCELLED: 0}
+        for job in self.jobs():
+            counts[job.state] += 1
+        return counts
+
+    def set_stage(self, job: ConversionJob, stage: str) -> None:
+        job.stage = stage
+        self.on_change(job)
+
+    def _trim(self) -> None:
+        finished = [job for job in self._jobs.values() if not job.active]
+        for job in sorted(finished, key=lambda job: job.id)[:-MAX_FINISHED_JOBS]:
+            del self._jobs[job.id]
+
+    def _finish(self, job: ConversionJob, state: str, error: str = "") -> None:
+        job.state, job.error = state, error
+        job.finished = time.time()
+        if self.history is not None:
+            self.history.record_job(job)
+        if self.metrics is not None:
+            self.metrics.observe_job(job)
+        job.done_event.set()
+        self.on_change(job)
+
+    def _work(self) -> None:
+        while True:
+            job = self._queue.get()
+            if job.state != QUEUED:
+                continue  # cancelled while waiting
+            job.state, job.started = RUNNING, time.time()
+            job.attempts += 1
+            self.on_change(job)
+
+            key = None
+            if self.resolve_version is not None:
+                try:
+                    job.version = self.resolve_version(job)
+                    key = (job.file_id, tuple(job.node_ids), job.version, job.output_path)
+                except Exception as e:
+                    logging.warning(f"Could not resolve the version of job #{job.id}: {e}")
+
+            if not self._claim(job, key):
+                continue
+
+            try:
+                job.result = self.run_job(job)
+                state, error = DONE, ""
+            except ConversionTimeout as e:
+                state, error = FAILED, str(e)  # ran out of time, nobody cancelled it
+            except ConversionCancelled as e:
+                state, error = CANCELLED, str(e)
+            except Exception as e:
+                state, error = FAILED, str(e)
+            if key:
+                with self._lock:
+                    self._running.pop(key, None)  # before the waiters see done_event
+            self._finish(job, state, error)
+
+    def _claim(self, job: ConversionJob, key: Optional[tuple]) -> bool:
+        """Make job the run of key, or wait for the twin already running it.
+        False when the job was finished meanwhile: cancelled, or given the twin's outcome.
+        A twin that was cancelled does not cancel its waiters, one of them converts instead.
+        """
+        while key:
+            with self._lock:
+                twin = self._running.setdefault(key, job)
+            if twin is job:
+                return True
+            # same file, selection, version and output is already converting: share its result
+            job.stage = f"waiting for #{twin.id}"
+            self.on_change(job)
+            while not twin.done_event.wait(0.2):
+                if job.cancel.is_set():
+                    break
+            if job.cancel.is_set():
+                self._finish(job, CANCELLED)
+                return False
+            if twin.state != CANCELLED:
+                job.result = twin.result
+                self._finish(job, twin.state, twin.error)
+                return False
+            job.stage = ""
+        return True
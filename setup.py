@@ -13,6 +13,8 @@ setup(
     entry_points={
         'console_scripts': [
             'figma-converter=gui:main',
+            'figma-convert=figma:main',
+            'figma-daemon=daemon:main',
         ],
     },
     author="MPS",
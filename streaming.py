@@ -0,0 +1,174 @@
+""" Streaming conversion support.
+    Runs a conversion while yielding its output lines and progress as events, with
+    cancellation (killing the child process tree) and wall-clock / idle timeouts.
+"""
+import os
+import sys
+import time
+import queue
+import signal
+import logging
+import threading
+import subprocess
+
+from dataclasses import dataclass
+from typing import Callable, Iterator, List, Optional
+
+from errors import ConversionCancelled, ConversionTimeout
+
+JOB_TIMEOUT = 30 * 60  # seconds a conversion may run in total
+IDLE_TIMEOUT = 5 * 60  # seconds a conversion may run without any output or progress
+POLL_INTERVAL = 0.2
+
+
+@dataclass
+class ConversionEvent:
+    """Something that happened during a conversion.
+    kind is one of "log", "progress" or "result".
+    """
+    kind: str
+    message: str = ""
+    stage: str = ""
+    done: int = 0
+    total: int = 0
+    result: object = None
+
+
+class JobFinished:
+    """Last item a running job puts on its event queue."""
+
+    def __init__(self, result=None, error: Optional[BaseException] = None):
+        self.result = result
+        self.error = error
+
+
+def kill_process_tree(pid: int, reap: Optional[Callable[[], object]] = None) -> None:
+    """Kill a process and everything it started (it must lead its own process group/session).
+    reap (Popen.poll, or Process.join with a 0 timeout) collects the exit status of our own child,
+    which otherwise stays in the group as a zombie until the 2s grace period is over.
+    """
+    try:
+        if sys.platform == "win32":
+            subprocess.run(["taskkill", "/T", "/F", "/PID", str(pid)], capture_output=True, check=False)
+            return
+        pgid = os.getpgid(pid)
+        os.killpg(pgid, signal.SIGTERM)
+        for _ in range(40):
+            time.sleep(0.05)
+            if reap is not None:
+                reap()
+            os.killpg(pgid, 0)  # raises once the group is gone
+        os.killpg(pgid, signal.SIGKILL)
+    except (ProcessLookupError, PermissionError):
+        pass
+    except OSError as e:
+        logging.warning(f"Could not kill process tree {pid}: {e}")
+
+
+def new_session_kwargs() -> dict:
+    """Popen arguments that put the child in its own group so its whole tree can be killed."""
+    if sys.platform == "win32":
+        return {"creationflags": subprocess.CREATE_NEW_PROCESS_GROUP}
+    return {"start_new_session": True}
+
+
+def drain_events(events: "queue.Queue", cancel: Optional[threading.Event], abort: Callable[[], None],
+                 timeout: Optional[float] = JOB_TIMEOUT,
+                 idle_timeout: Optional[float] = IDLE_TIMEOUT) -> Iterator[ConversionEvent]:
+    """Yield the events of a running job until it finishes.
+    abort() is called when the job is cancelled or times out, then the matching exception is raised.
+    """
+    start = last_event = time.monotonic()
+    while True:
+        try:
+            item = events.get(timeout=POLL_INTERVAL)
+        except queue.Empty:
+            item = None
+        now = time.monotonic()
+        if cancel is not None and cancel.is_set():
+            abort()
+            raise ConversionCancelled("Conversion cancelled")
+        if timeout and now - start > timeout:
+            abort()
+            raise ConversionTimeout(f"Conversion exceeded its {timeout:g}s time limit")
+        if item is None:
+            if idle_timeout and now - last_event > idle_timeout:
+                abort()
+                raise ConversionTimeout(f"Conversion produced no output for {idle_timeout:g}s")
+            continue
+        last_event = now
+        if isinstance(item, JobFinished):
+            if item.error is not None:
+                raise item.error
+            if item.result is not None:
+                yield ConversionEvent("result", result=item.result)
+            return
+        yield item
+
+
+def stream_subprocess(command: List[str], cancel: Optional[threading.Event] = None,
+                      timeout: Optional[float] = JOB_TIMEOUT,
+                      idle_timeout: Optional[float] = IDLE_TIMEOUT) -> Iterator[ConversionEvent]:
+    """Run a command and yield its output lines as they are printed."""
+    process = subprocess.Popen(
+        command,
+        stdout=subprocess.PIPE,
+        stderr=subprocess.STDOUT,
+        text=True,
+        bufsize=1,
+        **new_session_kwargs(),
+    )
+    events: "queue.Queue" = queue.Queue()
+
+    def read_output():
+        for line in process.stdout:
+            events.put(ConversionEvent("log", message=line.rstrip("\n")))
+        returncode = process.wait()
+        error = subprocess.CalledProcessError(returncode, command[0]) if returncode else None
+        events.put(JobFinished(error=error))
+
+    threading.Thread(target=read_output, daemon=True).start()
+    yield from drain_events(events, cancel, lambda: kill_process_tree(process.pid, process.poll), timeout,
+                            idle_timeout)
+
+
+class _ThreadLogHandler(logging.Handler):
+    """Forwards the log records of one thread (and the pools named after it) as log events."""
+
+    def __init__(self, emit_event: Callable[[ConversionEvent], None], thread_name: str):
+        super().__init__(logging.INFO)
+        self.emit_event = emit_event
+        self.thread_name = thread_name
+
+    def emit(self, record):
+        if record.threadName == self.thread_name or record.threadName.startswith(f"{self.thread_name}-"):
+            self.emit_event(ConversionEvent("log", message=record.getMessage()))
+
+
+def stream_in_thread(run: Callable, cancel: Optional[threading.Event] = None,
+                     timeout: Optional[float] = JOB_TIMEOUT,
+                     idle_timeout: Optional[float] = IDLE_TIMEOUT) -> Iterator[ConversionEvent]:
+    """Run run(progress, cancel) on a thread and yield its log lines, progress and result.
+    Cancelling is cooperative: the cancel event is set and the engine stops at its next check.
+    """
+    cancel = cancel or threading.Event()
+    events: "queue.Queue" = queue.Queue()
+    name = f"conversion-{id(events)}"
+    handler = _ThreadLogHandler(events.put, name)
+
+    def progress(stage, done, total):
+        events.put(ConversionEvent("progress", stage=stage, done=done, total=total))
+
+    def target():
+        try:
+            events.put(JobFinished(result=run(progress, cancel)))
+        except BaseException as e:
+            events.put(JobFinished(error=e))
+
+    logging.getLogger().addHandler(handler)
+    try:
+        threading.Thread(target=target, name=name, daemon=True).start()
+        # the thread cannot be killed, aborting asks the engine to stop at its next check
+        yield from drain_events(events, cancel, cancel.set, timeout, idle_timeout)
+    finally:
+        logging.getLogger().removeHandler(handler)
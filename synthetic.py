@@ -0,0 +1,248 @@
+""" Synthetic Figma documents for scale testing.
+    Generates file JSON shaped like the Figma API's: pages of frames holding auto-layout
+    containers nested down to a chosen depth, with text, vector icons, rectangles, buttons
+    and image fills sharing a pool of imageRefs. The same DocumentSpec (seed included)
+    always gives the same document, so the scaling limits of large production files can be
+    reproduced without sharing the designs.
+
+    python synthetic.py --nodes 100000 --depth 8 --image-fills 500 --image-refs 20 -o big.json
+"""
+import sys
+import json
+import math
+import zlib
+import random
+import argparse
+
+from collections import Counter
+from dataclasses import asdict, dataclass
+from pathlib import Path
+from typing import Dict, List
+
+LAYOUT_MODES = ("VERTICAL", "HORIZONTAL")
+FONT_SIZES = (12, 14, 16, 20, 24, 32)
+BUTTON_SHARE = 0.1  # of the rectangles, named "Button ..." so the engine exports them as buttons
+
+
+@dataclass
+class DocumentSpec:
+    """What to generate.
+    Args:
+            pages / frames: pages of the file and top level frames per page
+            nodes: nodes per frame, the frame included
+            extra_nodes: nodes spread over the first frames to reach an exact total
+            depth: deepest nesting of auto-layout containers inside a frame
+            container_ratio: chance that a child (past the first) is a container rather than a leaf
+            text_ratio / vector_ratio: share of the leaves that are TEXT / VECTOR, the rest are rectangles
+            image_fills: rectangles given an IMAGE fill, across the whole file
+            image_refs: distinct imageRefs those fills share
+            seed: the same spec and seed always give the same document
+    """
+    pages: int = 1
+    frames: int = 10
+    nodes: int = 50
+    extra_nodes: int = 0
+    depth: int = 3
+    container_ratio: float = 0.15
+    text_ratio: float = 0.3
+    vector_ratio: float = 0.3
+    image_fills: int = 0
+    image_refs: int = 1
+    seed: int = 0
+
+    @classmethod
+    def for_nodes(cls, total: int, nodes: int = 50, frames_per_page: int = 20, **options) -> "DocumentSpec":
+        """A spec of exactly total nodes (at least 4: document, page, frame and one child)."""
+        total = max(total, 4)
+        frame_count = max(1, round((total - 1) / (nodes + 1 / frames_per_page)))
+        pages = math.ceil(frame_count / frames_per_page)
+        frames = math.ceil(frame_count / pages)
+        per_frame, extra = divmod(total - 1 - pages, pages * frames)
+        return cls(pages=pages, frames=frames, nodes=per_frame, extra_nodes=extra, **options)
+
+    @property
+    def total_nodes(self) -> int:
+        return 1 + self.pages + self.pages * self.frames * self.nodes + self.extra_nodes
+
+
+class _Generator:
+    def __init__(self, spec: DocumentSpec):
+        self.spec = spec
+        self.rng = random.Random(spec.seed)
+        self.next_id = 0
+        self.rectangles: List[Dict] = []
+
+    def node_id(self, page: int) -> str:
+        self.next_id += 1
+        return f"{page}:{self.next_id}"
+
+    def solid(self) -> List[Dict]:
+        rng = self.rng
+        return [{"type": "SOLID", "blendMode": "NORMAL",
+                 "color": {"r": round(rng.random(), 4), "g": round(rng.random(), 4), "b": round(rng.random(), 4), "a": 1}}]
+
+    def leaf(self, page: int, box: Dict, index: int) -> Dict:
+        rng, spec = self.rng, self.spec
+        draw = rng.random()
+        width, height = rng.randint(16, max(16, int(box["width"]))), rng.randint(12, max(12, int(box["height"])))
+        node = {"id": self.node_id(page), "absoluteBoundingBox": {
+            "x": box["x"] + rng.randint(0, max(0, int(box["width"]) - width)),
+            "y": box["y"] + rng.randint(0, max(0, int(box["height"]) - height)),
+            "width": float(width), "height": float(height)}}
+        if draw < spec.text_ratio:
+            words = " ".join(f"word{rng.randint(1, 999)}" for _ in range(rng.randint(1, 8)))
+            node.update(name=f"Text {index}", type="TEXT", characters=words, fills=self.solid(),
+                        style={"fontFamily": "Inter", "fontWeight": 400, "fontSize": rng.choice(FONT_SIZES)})
+        elif draw < spec.text_ratio + spec.vector_ratio:
+            node.update(name=f"Icon {index}", type="VECTOR", fills=self.solid(), strokes=[],
+                        strokeWeight=1.0)
+        else:
+            name = f"Button {index}" if rng.random() < BUTTON_SHARE else f"Rectangle {index}"
+            node.update(name=name, type="RECTANGLE", fills=self.solid(), cornerRadius=rng.choice((0, 4, 8)))
+            self.rectangles.append(node)
+        return node
+
+    def container(self, page: int, box: Dict, index: int) -> Dict:
+        rng = self.rng
+        return {
+            "id": self.node_id(page), "name": f"Stack {index}", "type": "FRAME",
+            "absoluteBoundingBox": {**box, "width": max(32.0, box["width"] * 0.8),
+                                    "height": max(24.0, box["height"] * 0.8)},
+            "fills": [], "layoutMode": rng.choice(LAYOUT_MODES), "itemSpacing": rng.choice((0, 4, 8, 16)),
+            "paddingLeft": 8, "paddingRight": 8, "paddingTop": 8, "paddingBottom": 8,
+            "primaryAxisSizingMode": "AUTO", "counterAxisSizingMode": "FIXED", "children": [],
+        }
+
+    def fill(self, parent: Dict, page: int, budget: int, level: int) -> None:
+        """Add budget nodes below parent. The first child of every level is a container while
+        depth allows, so each frame reaches the full depth.
+        """
+        spec, rng = self.spec, self.rng
+        box = parent["absoluteBoundingBox"]
+        index = 0
+        while budget > 0:
+            index += 1
+            nest = level < spec.depth and budget >= 2 and (index == 1 or rng.random() < spec.container_ratio)
+            if not nest:
+                parent["children"].append(self.leaf(page, box, index))
+                budget -= 1
+                continue
+            container = self.container(page, box, index)
+            parent["children"].append(container)
+            if index == 1:
+                # the deep path gets enough nodes to reach the full depth and leaves room beside it
+                inner = max(rng.randint((budget - 1) // 4, (budget - 1) // 2), min(budget - 1, spec.depth - level))
+            else:
+                inner = rng.randint(1, max(1, (budget - 1) // 2))
+            self.fill(container, page, inner, level + 1)
+            budget -= inner + 1
+
+    def image_fills(self) -> None:
+        spec, rng = self.spec, self.rng
+        refs = [f"{rng.getrandbits(160):040x}" for _ in range(max(1, spec.image_refs))]
+        chosen = rng.sample(self.rectangles, min(spec.image_fills, len(self.rectangles)))
+        for position, node in enumerate(chosen):
+            node["name"] = f"Photo {position + 1}"
+            node["fills"] = [{"type": "IMAGE", "scaleMode": "FILL", "imageRef": refs[position % len(refs)]}]
+
+    def document(self) -> Dict:
+        spec = self.spec
+        pages = []
+        frame_number = 0
+        for page_index in range(1, spec.pages + 1):
+            page = {"id": f"0:{page_index}", "name": f"Page {page_index}", "type": "CANVAS",
+                    "backgroundColor": {"r": 0.96, "g": 0.96, "b": 0.96, "a": 1}, "children": []}
+            for frame_index in range(spec.frames):
+                nodes = spec.nodes + (1 if frame_number < spec.extra_nodes else 0)
+                frame_number += 1
+                frame = {
+                    "id": self.node_id(page_index), "name": f"Screen {frame_number}", "type": "FRAME",
+                    "absoluteBoundingBox": {"x": frame_index * 1600.0, "y": 0.0, "width": 1440.0, "height": 1024.0},
+                    "fills": self.solid(), "children": [],
+                }
+                self.fill(frame, page_index, nodes - 1, 0)
+                page["children"].append(frame)
+            pages.append(page)
+        self.image_fills()
+        return {"id": "0:0", "name": "Document", "type": "DOCUMENT", "children": pages}
+
+
+def generate(spec: DocumentSpec) -> Dict:
+    """The file JSON (as GET /v1/files/<id> answers it) described by spec."""
+    return {
+        "name": f"Synthetic {spec.total_nodes} nodes (seed {spec.seed})",
+        "version": str(zlib.crc32(json.dumps(asdict(spec), sort_keys=True).encode())),
+        "lastModified": "2024-01-01T00:00:00Z",
+        "role": "owner",
+        "editorType": "figma",
+        "document": _Generator(spec).document(),
+        "components": {},
+        "styles": {},
+        "schemaVersion": 0,
+    }
+
+
+def image_refs(document: Dict) -> List[str]:
+    """The distinct imageRefs of the image fills of a document, in order of appearance."""
+    refs: Dict[str, None] = {}
+    stack = [document.get("document", document)]
+    while stack:
+        node = stack.pop()
+        for fill in node.get("fills") or []:
+            if fill.get("type") == "IMAGE" and fill.get("imageRef"):
+                refs.setdefault(fill["imageRef"])
+        stack.extend(reversed(node.get("children", [])))
+    return list(refs)
+
+
+def stats(document: Dict) -> Dict:
+    """Node count by type, deepest level and image fill counts of a file."""
+    types: Counter = Counter()
+    deepest = 0
+    fills = 0
+    stack = [(document.get("document", document), 0)]
+    while stack:
+        node, level = stack.pop()
+        types[node.get("type")] += 1
+        deepest = max(deepest, level)
+        fills += sum(1 for fill in node.get("fills") or [] if fill.get("type") == "IMAGE")
+        stack.extend((child, level + 1) for child in node.get("children", []))
+    return {"nodes": sum(types.values()), "depth": deepest, "types": dict(types),
+            "image_fills": fills, "image_refs": len(image_refs(document))}
+
+
+def parse_args(argv=None):
+    defaults = DocumentSpec()
+    parser = argparse.ArgumentParser(description="Generate a synthetic Figma file JSON")
+    parser.add_argument("--nodes", type=int, default=1000, help="total node count of the file")
+    parser.add_argument("--frame-nodes", type=int, default=defaults.nodes, help="nodes per frame")
+    parser.add_argument("--depth", type=int, default=defaults.depth, help="deepest auto-layout nesting in a frame")
+    parser.add_argument("--text-ratio", type=float, default=defaults.text_ratio, help="share of TEXT leaves")
+    parser.add_argument("--vector-ratio", type=float, default=defaults.vector_ratio, help="share of VECTOR leaves")
+    parser.add_argument("--image-fills", type=int, default=defaults.image_fills, help="rectangles with an image fill")
+    parser.add_argument("--image-refs", type=int, default=defaults.image_refs, help="distinct imageRefs they share")
+    parser.add_argument("--seed", type=int, default=defaults.seed)
+    parser.add_argument("-o", "--output", type=Path, help="write the JSON here instead of stdout")
+    return parser.parse_args(argv)
+
+
+def spec_from_args(args) -> DocumentSpec:
+    return DocumentSpec.for_nodes(
+        args.nodes, nodes=args.frame_nodes, depth=args.depth, text_ratio=args.text_ratio,
+        vector_ratio=args.vector_ratio, image_fills=args.image_fills, image_refs=args.image_refs, seed=args.seed,
+    )
+
+
+def main(argv=None):
+    args = parse_args(argv)
+    document = generate(spec_from_args(args))
+    if args.output is None:
+        json.dump(document, sys.stdout)
+        return 0
+    args.output.write_text(json.dumps(document), encoding="utf-8")
+    print(json.dumps(stats(document)), file=sys.stderr)
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,81 @@
+""" Shared fixtures: the repo root on sys.path, and a FigmaClient talking to fake_figma.py
+    through a small urllib based stand-in for requests.Session.
+"""
+import sys
+import json
+import urllib.error
+import urllib.parse
+import urllib.request
+
+from pathlib import Path
+
+import pytest
+
+sys.path.insert(0, str(Path(__file__).resolve().parent.parent))
+
+from engine import FigmaClient  # noqa: E402
+from fake_figma import FakeFigma, FakeFigmaServer  # noqa: E402
+
+
+class Response:
+    def __init__(self, status_code, headers, content):
+        self.status_code = status_code
+        self.headers = headers
+        self.content = content
+        self.text = content.decode("utf-8", "replace")
+
+    def json(self):
+        return json.loads(self.content)
+
+    def raise_for_status(self):
+        if self.status_code >= 400:
+            raise OSError(f"HTTP {self.status_code}")
+
+    def iter_content(self, size):
+        for start in range(0, len(self.content), size):
+            yield self.content[start:start + size]
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        pass
+
+
+class UrllibSession:
+    """The part of requests.Session the engine uses."""
+
+    def get(self, url, params=None, headers=None, timeout=None, stream=False):
+        if params:
+            url += "?" + urllib.parse.urlencode(params)
+        request = urllib.request.Request(url, headers=headers or {})
+        try:
+            with urllib.request.urlopen(request, timeout=timeout) as response:
+                return Response(response.status, dict(response.headers), response.read())
+        except urllib.error.HTTPError as e:
+            return Response(e.code, dict(e.headers), e.read())
+
+
+@pytest.fixture
+def fake_api():
+    with FakeFigmaServer(FakeFigma()) as server:
+        yield server
+
+
+@pytest.fixture
+def client_factory(fake_api):
+    return lambda: FigmaClient("test-token", UrllibSession(), fake_api.api_url)
+
+
+@pytest.fixture(autouse=True)
+def data_dir(tmp_path, monkeypatch):
+    """Keep the shared history, metrics, caches and config of figma.py out of the real DATA_DIR."""
+    import figma
+
+    root = tmp_path / "data"
+    paths = {name: root / path.relative_to(figma.DATA_DIR) for name, path in figma.PATHS.items()}
+    monkeypatch.setattr(figma, "DATA_DIR", root)
+    monkeypatch.setattr(figma, "PATHS", paths)
+    for name in ("_document_cache", "_asset_store", "_profile_store", "_history", "_metrics"):
+        monkeypatch.setattr(figma, name, None)
+    return root
@@ -0,0 +1,48 @@
+import os
+import sys
+import logging
+
+import pytest
+
+from app_logging import AsyncLogging
+
+
+@pytest.fixture
+def async_logging(tmp_path):
+    root = logging.getLogger()
+    level, handlers = root.level, list(root.handlers)
+    log = AsyncLogging(tmp_path / "app.log", console=False)
+    yield log
+    log.stop()
+    for handler in root.handlers[:]:
+        if handler not in handlers:
+            root.removeHandler(handler)
+    root.setLevel(level)
+
+
+@pytest.mark.skipif(not hasattr(os, "fork"), reason="needs fork")
+def test_forked_children_log_through_the_parent(async_logging, tmp_path):
+    logging.info("parent before fork")
+    pids = []
+    for n in range(3):
+        pid = os.fork()
+        if pid == 0:
+            try:
+                assert async_logging.listener is None
+                logging.info(f"child {n}")
+            finally:
+                os._exit(0)
+        pids.append(pid)
+    for pid in pids:
+        assert os.waitpid(pid, 0)[1] == 0
+    logging.info("parent after fork")
+    async_logging.stop()
+    lines = (tmp_path / "app.log").read_text(encoding="utf-8").splitlines()
+    messages = [line.split(" - ", 2)[2] for line in lines]
+    assert sorted(messages) == sorted(["parent before fork", "parent after fork", "child 0", "child 1", "child 2"])
+
+
+def test_records_are_written_by_the_listener(async_logging, tmp_path):
+    logging.getLogger("x").warning("hello %s", "world")
+    async_logging.stop()
+    assert "WARNING - hello world" in (tmp_path / "app.log").read_text(encoding="utf-8")
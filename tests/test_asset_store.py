@@ -0,0 +1,166 @@
+import copy
+import shutil
+
+import pytest
+
+import assets
+import asset_store
+from assets import AssetRequest, download_assets
+from asset_store import AssetStore, image_fill, render_key
+
+
+def box(x, y, width=20.0, height=20.0):
+    return {"x": x, "y": y, "width": width, "height": height}
+
+
+def rectangle(node_id, x, y):
+    return {"id": node_id, "name": "Swatch", "type": "RECTANGLE", "absoluteBoundingBox": box(x, y),
+            "fills": [{"type": "SOLID", "color": {"r": 1, "g": 0, "b": 0, "a": 1}}]}
+
+
+def group(node_id, x, y, children):
+    return {"id": node_id, "name": "Group", "type": "GROUP", "absoluteBoundingBox": box(x, y, 100, 100),
+            "children": children}
+
+
+def test_vectors_get_no_key():
+    icon = {"id": "1:2", "name": "Icon", "type": "VECTOR", "absoluteBoundingBox": box(0, 0), "fills": []}
+    assert render_key(icon, "file") is None
+    assert render_key(group("1:1", 0, 0, [icon]), "file") is None
+
+
+def test_different_nodes_with_the_same_content_do_not_share():
+    assert render_key(rectangle("1:2", 0, 0), "file") != render_key(rectangle("1:3", 0, 0), "file")
+    assert render_key(rectangle("1:2", 0, 0), "file") != render_key(rectangle("1:2", 0, 0), "other")
+
+
+def test_child_layout_is_part_of_the_key():
+    left = group("1:1", 0, 0, [rectangle("1:2", 0, 0), rectangle("1:3", 30, 0)])
+    right = group("1:1", 0, 0, [rectangle("1:2", 0, 0), rectangle("1:3", 60, 0)])
+    assert render_key(left, "file") != render_key(right, "file")
+
+
+def test_moving_the_whole_node_keeps_the_key():
+    node = group("1:1", 0, 0, [rectangle("1:2", 0, 0), rectangle("1:3", 30, 0)])
+    moved = copy.deepcopy(node)
+    for each in [moved] + moved["children"]:
+        each["absoluteBoundingBox"]["x"] += 500
+    assert render_key(node, "file") == render_key(moved, "file")
+
+
+def test_store_places_what_was_put(tmp_path):
+    store = AssetStore(tmp_path / "store")
+    source = tmp_path / "a.png"
+    source.write_bytes(b"png")
+    key = render_key(rectangle("1:2", 0, 0), "file")
+    assert not store.fetch(key, tmp_path / "out" / "b.png")
+    store.put(key, source)
+    assert store.fetch(key, tmp_path / "out" / "b.png")
+    assert (tmp_path / "out" / "b.png").read_bytes() == b"png"
+
+
+def test_eviction_keeps_the_store_under_its_quota(tmp_path):
+    store = AssetStore(tmp_path / "store", quota_bytes=10)
+    for index in range(4):
+        source = tmp_path / f"{index}.png"
+        source.write_bytes(b"x" * 4)
+        store.put(f"{index:064x}", source)
+    assert store.evict() == 2
+    assert store.size() <= 10
+
+
+def test_eviction_skips_entries_removed_by_another_process(tmp_path, monkeypatch):
+    store = AssetStore(tmp_path / "store", quota_bytes=8)
+    for index in range(4):
+        source = tmp_path / f"{index}.png"
+        source.write_bytes(b"x" * 4)
+        store.put(f"{index:064x}", source)
+    entries = store._entries
+
+    def racing():
+        found = entries()
+        found[0][0].unlink()  # gone between the listing and the eviction
+        return found
+
+    monkeypatch.setattr(store, "_entries", racing)
+    store.evict()
+    monkeypatch.undo()
+    assert store.size() <= 8
+
+
+def photo(node_id, ref, **props):
+    return {"id": node_id, "name": "Photo", "type": "RECTANGLE", "absoluteBoundingBox": box(0, 0, 40, 30),
+            "fills": [{"type": "IMAGE", "scaleMode": "FILL", "imageRef": ref}], **props}
+
+
+def test_only_plain_image_fills_are_made_from_the_raw_image():
+    assert image_fill(photo("1:2", "ab" * 20))["imageRef"] == "ab" * 20
+    assert image_fill(photo("1:2", "ab" * 20, cornerRadius=4)) is None
+    assert image_fill(photo("1:2", "ab" * 20, strokes=[{"type": "SOLID"}])) is None
+    assert image_fill(photo("1:2", "ab" * 20, effects=[{"type": "DROP_SHADOW", "visible": False}])) is not None
+    tiled = photo("1:2", "ab" * 20)
+    tiled["fills"][0]["scaleMode"] = "TILE"
+    assert image_fill(tiled) is None
+    assert image_fill(rectangle("1:2", 0, 0)) is None
+
+
+class FillClient:
+    """The image endpoints of FigmaClient, counting the downloads."""
+
+    request_count = bytes_downloaded = 0
+    api_url = "http://figma.test/v1"
+
+    def __init__(self, refs):
+        self.refs = refs
+        self.downloads = []
+
+    def get_image_fills(self, file_id):
+        return {ref: f"http://figma.test/fills/{ref}" for ref in self.refs}
+
+    def get_image_urls(self, file_id, ids, fmt="png", scale=1):
+        return {node_id: f"http://figma.test/render/{file_id}/{node_id}" for node_id in ids}
+
+    def download(self, url):
+        self.downloads.append(url)
+        return url.encode()
+
+
+@pytest.fixture
+def fill_images(monkeypatch):
+    """Pretend Pillow is installed: fitting an image just copies it."""
+    def fit(source, target, size, scale_mode="FILL"):
+        target.parent.mkdir(parents=True, exist_ok=True)
+        shutil.copyfile(source, target)
+
+    monkeypatch.setattr(assets, "can_fit_images", lambda: True)
+    monkeypatch.setattr(assets, "fit_image", fit)
+    monkeypatch.setattr(asset_store, "fit_image", fit)
+
+
+def fill_request(tmp_path, node, file_id):
+    request = AssetRequest(node["id"], tmp_path / file_id / f"{node['id']}.png", key=render_key(node, file_id))
+    request.image_ref, request.size = image_fill(node)["imageRef"], (40, 30)
+    return request
+
+
+def test_image_fill_is_downloaded_once_for_every_node_and_file(tmp_path, fill_images):
+    ref = "ab" * 20
+    store = AssetStore(tmp_path / "store")
+    client = FillClient([ref])
+    first = [fill_request(tmp_path, photo(node_id, ref), "file") for node_id in ("1:2", "1:3")]
+    assert len(download_assets(client, "file", first, store=store)) == 2
+    assert client.downloads == [f"http://figma.test/fills/{ref}"]
+
+    other = [fill_request(tmp_path, photo("9:9", ref), "other")]
+    assert download_assets(client, "other", other, store=store) == [other[0].path]
+    assert len(client.downloads) == 1  # another node of another file, placed from the store
+    assert other[0].path.read_bytes() == f"http://figma.test/fills/{ref}".encode()
+    assert store.stats()["hits"] == 1
+
+
+def test_image_fill_without_a_url_is_rendered(tmp_path, fill_images):
+    store = AssetStore(tmp_path / "store")
+    client = FillClient([])
+    request = fill_request(tmp_path, photo("1:2", "cd" * 20), "file")
+    assert download_assets(client, "file", [request], store=store) == [request.path]
+    assert client.downloads == ["http://figma.test/render/file/1:2"]
@@ -0,0 +1,30 @@
+from batch import BatchJob, job_output, normalize_jobs
+
+URL = "https://www.figma.com/design/AbC123/Name"
+
+
+def test_normalize_keeps_selections_apart_and_drops_duplicates():
+    jobs = normalize_jobs([
+        BatchJob(url=URL),
+        BatchJob(url=f"{URL}?node-id=1-2&t=x"),
+        BatchJob(url=f"{URL}?node-id=1-2"),
+        BatchJob(url=f"{URL}?node-id=1-3"),
+        BatchJob(url="not a figma url"),
+    ])
+    assert [job.url for job in jobs] == [
+        "https://www.figma.com/file/AbC123",
+        "https://www.figma.com/file/AbC123?node-id=1-2",
+        "https://www.figma.com/file/AbC123?node-id=1-3",
+    ]
+
+
+def test_default_outputs_differ_per_selection(tmp_path):
+    jobs = normalize_jobs([BatchJob(url=URL), BatchJob(url=f"{URL}?node-id=1-2"), BatchJob(url=f"{URL}?node-id=1-3")])
+    outputs = [job_output(job, tmp_path) for job in jobs]
+    assert outputs[0] == tmp_path / "AbC123"
+    assert len(set(outputs)) == 3
+
+
+def test_explicit_output_wins(tmp_path):
+    job = BatchJob(url=URL, output=str(tmp_path / "mine"))
+    assert job_output(job, tmp_path / "root") == tmp_path / "mine"
@@ -0,0 +1,85 @@
+import os
+import json
+import sys
+
+import pytest
+
+from cache import DocumentCache
+from engine import fetch_document, load_document
+
+DOCUMENT = {"document": {"children": [{"id": "0:1", "children": []}]}}
+
+
+class StubClient:
+    """get_file_meta and download_file of FigmaClient, counting the downloads."""
+
+    def __init__(self, version):
+        self.version = version
+        self.downloads = 0
+        self.request_count = self.bytes_downloaded = 0
+
+    def get_file_meta(self, file_id):
+        return {"version": self.version}
+
+    def download_file(self, file_id, path):
+        self.downloads += 1
+        with open(path, "w", encoding="utf-8") as f:
+            json.dump(DOCUMENT, f)
+
+
+@pytest.mark.parametrize("version", ["", None])
+def test_no_version_is_never_cached(tmp_path, version):
+    cache = DocumentCache(tmp_path)
+    assert cache.put("f", version, b"{}") is None
+    assert cache.get("f", version) is None
+    assert cache.open("f", version) is None
+    with pytest.raises(ValueError):
+        with cache.store("f", version):
+            pass
+    assert not list(tmp_path.glob("*.json"))
+
+
+def test_document_without_version_is_downloaded_every_time(tmp_path):
+    cache = DocumentCache(tmp_path)
+    client = StubClient("")
+    assert load_document(client, "f", cache) == DOCUMENT
+    assert load_document(client, "f", cache) == DOCUMENT
+    assert client.downloads == 2
+    assert not list(tmp_path.glob("*.json"))
+
+
+def test_versioned_document_is_reused(tmp_path):
+    cache = DocumentCache(tmp_path)
+    client = StubClient("42")
+    assert load_document(client, "f", cache) == DOCUMENT
+    assert load_document(client, "f", cache) == DOCUMENT
+    assert client.downloads == 1
+
+
+def test_evicted_entry_is_a_miss(tmp_path):
+    cache = DocumentCache(tmp_path)
+    cache.put("f", "1", b"{}")
+    cache.path_for("f", "1").unlink()  # evicted by another process
+    assert cache.get("f", "1") is None
+    assert cache.open("f", "1") is None
+
+
+@pytest.mark.skipif(sys.platform == "win32", reason="open files cannot be removed on Windows")
+def test_hit_stays_readable_when_evicted_meanwhile(tmp_path):
+    cache = DocumentCache(tmp_path)
+    client = StubClient("1")
+    load_document(client, "f", cache)
+    with fetch_document(client, "f", cache) as document:
+        for entry in tmp_path.glob("*.json"):
+            entry.unlink()
+        assert json.load(document) == DOCUMENT
+    assert client.downloads == 1
+
+
+def test_eviction_keeps_the_newest_entry(tmp_path):
+    cache = DocumentCache(tmp_path, max_bytes=10)
+    cache.put("a", "1", b"x" * 8)
+    os.utime(cache.path_for("a", "1"), (1, 1))
+    cache.put("b", "1", b"y" * 20)  # larger than the whole cache on its own
+    assert not cache.path_for("a", "1").exists()
+    assert cache.path_for("b", "1").read_bytes() == b"y" * 20
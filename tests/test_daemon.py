@@ -0,0 +1,77 @@
+import io
+import os
+import time
+import zipfile
+import threading
+
+import pytest
+
+import daemon
+from daemon import ConversionService, archive
+from scheduler import resolve_document_version
+
+URL = "https://www.figma.com/design/AbC123/Name"
+
+
+@pytest.fixture
+def service(tmp_path):
+    return ConversionService(workers=1, root=tmp_path / "daemon")
+
+
+@pytest.mark.parametrize("output", ["/tmp/secret", "../secret", "a/../../secret", "~/secret", "."])
+def test_output_outside_the_daemon_root_is_refused(service, output):
+    with pytest.raises(ValueError):
+        service.output_dir(output)
+
+
+def test_output_through_a_symlink_is_refused(service, tmp_path):
+    service.root.mkdir(parents=True)
+    (service.root / "link").symlink_to(tmp_path)
+    with pytest.raises(ValueError):
+        service.output_dir("link/secret")
+
+
+def test_default_and_relative_outputs_stay_inside(service, monkeypatch):
+    monkeypatch.setattr(service.scheduler, "_queue", type("Q", (), {"put": lambda self, job: None})())
+    job = service.submit({"token": "t", "url": f"{URL}?node-id=1-2"})
+    assert job.output_path == (service.root / "AbC123_1-2").resolve()
+    job = service.submit({"token": "t", "url": URL, "output": "client/a"})
+    assert job.output_path == (service.root / "client" / "a").resolve()
+
+
+def test_archive_holds_only_the_build_directory(tmp_path):
+    output = tmp_path / "out"
+    (output / "build" / "assets").mkdir(parents=True)
+    (output / "build" / "gui.py").write_text("code")
+    (output / "build" / "assets" / "image_1.png").write_bytes(b"png")
+    (output / "id_rsa").write_text("secret")
+    (tmp_path / "other").write_text("secret")
+    os.symlink(tmp_path / "other", output / "build" / "leak.txt")
+
+    names = zipfile.ZipFile(io.BytesIO(archive(output))).namelist()
+    assert sorted(names) == ["build/assets/image_1.png", "build/gui.py"]
+
+
+def test_identical_jobs_in_flight_share_one_conversion(tmp_path, monkeypatch):
+    assert ConversionService(workers=1, root=tmp_path).scheduler.resolve_version is resolve_document_version
+    monkeypatch.setattr(daemon, "resolve_document_version", lambda job: "v1")
+    release, runs = threading.Event(), []
+
+    def run_job(self, job):
+        runs.append(job.id)
+        release.wait(5)
+        return None
+
+    monkeypatch.setattr(ConversionService, "run_job", run_job)
+    service = ConversionService(workers=2, root=tmp_path / "daemon")
+    first = service.submit({"token": "t", "url": URL})
+    deadline = time.time() + 5
+    while first.state != "running" and time.time() < deadline:
+        time.sleep(0.01)
+    second = service.submit({"token": "t", "url": URL})
+    assert second is not first
+    time.sleep(0.3)
+    release.set()
+    assert second.done_event.wait(5)
+    assert runs == [first.id]
+    assert first.state == second.state == "done"
@@ -0,0 +1,45 @@
+import json
+
+import pytest
+
+from docstream import DocumentReader, iter_pages
+
+PAGES = [
+    {"id": "0:1", "name": "Page é", "children": [{"id": "1:1", "type": "FRAME", "children": []}]},
+    {"id": "0:2", "name": "Empty", "children": []},
+    {"id": "0:3", "name": "Nested", "children": [{"id": "2:1", "children": [{"id": "2:2", "text": "[{\\"}]}]},
+]
+
+
+@pytest.fixture
+def document(tmp_path):
+    path = tmp_path / "file.json"
+    content = {"name": "File", "version": "1", "document": {"id": "0:0", "children": PAGES},
+               "components": {"c": {"name": "]}"}}}
+    path.write_text(json.dumps(content, indent=1, ensure_ascii=False), encoding="utf-8")
+    return path
+
+
+@pytest.mark.parametrize("chunk_size", [1, 3, 7, 4096])
+def test_pages_with_small_chunks(document, chunk_size):
+    with DocumentReader(document, chunk_size=chunk_size, use_ijson=False) as reader:
+        assert list(reader.pages()) == PAGES
+        assert reader.bytes_read == reader.size
+
+
+def test_pages_from_an_open_file(document):
+    with open(document, "rb") as f:
+        with DocumentReader(f, chunk_size=5, use_ijson=False) as reader:
+            assert list(reader.pages()) == PAGES
+        assert not f.closed  # a borrowed file is left open
+
+
+def test_iter_pages(document):
+    assert [page["id"] for page in iter_pages(document, use_ijson=False)] == ["0:1", "0:2", "0:3"]
+
+
+def test_truncated_document(tmp_path):
+    path = tmp_path / "broken.json"
+    path.write_text('{"document": {"children": [{"id": "0:1"', encoding="utf-8")
+    with pytest.raises(ValueError):
+        list(iter_pages(path, use_ijson=False))
@@ -0,0 +1,91 @@
+import json
+
+from incremental import MANIFEST_NAME, OutputManifest, frame_entry, subtree_hash
+
+
+def frame(frame_id, *children, **props):
+    return {"id": frame_id, "type": "FRAME", **props, "children": list(children)}
+
+
+def build(tmp_path, frames):
+    """Write the scripts and asset folders of frames (frame id -> entry) like a conversion would."""
+    for entry in frames.values():
+        (tmp_path / entry["script"]).write_text("# generated")
+        assets = tmp_path / "assets" / entry["assets"]
+        assets.mkdir(parents=True, exist_ok=True)
+        (assets / "image_1.png").write_bytes(b"png")
+
+
+def test_subtree_hash_follows_the_children():
+    a = frame("1:1", {"id": "2:1", "name": "a"}, {"id": "2:2", "name": "b"})
+    b = frame("1:1", {"id": "2:1", "name": "a"}, {"id": "2:2", "name": "c"})
+    hashes = {}
+    assert subtree_hash(a, hashes) != subtree_hash(b)
+    assert subtree_hash(a) == subtree_hash(json.loads(json.dumps(a)))
+    assert set(hashes) == {"1:1", "2:1", "2:2"}
+
+
+def test_unchanged_children_keep_their_position(tmp_path):
+    manifest = OutputManifest(tmp_path)
+    old = frame_entry(frame("1:1", {"id": "2:1", "x": 1}, {"id": "2:2", "x": 2}), "gui.py", "frame0")
+    manifest.save({"1:1": old})
+
+    edited = frame_entry(frame("1:1", {"id": "2:1", "x": 1}, {"id": "2:2", "x": 3}), "gui.py", "frame0")
+    assert OutputManifest(tmp_path).unchanged_children("1:1", edited) == {"2:1"}
+    reordered = frame_entry(frame("1:1", {"id": "2:2", "x": 2}, {"id": "2:1", "x": 1}), "gui.py", "frame0")
+    assert OutputManifest(tmp_path).unchanged_children("1:1", reordered) == set()
+    moved = frame_entry(frame("1:1", {"id": "2:1", "x": 1}, {"id": "2:2", "x": 2}), "gui.py", "frame1")
+    assert OutputManifest(tmp_path).unchanged_children("1:1", moved) == set()
+
+
+def test_is_current_needs_the_script_and_assets_on_disk(tmp_path):
+    entry = frame_entry(frame("1:1"), "gui.py", "frame0")
+    OutputManifest(tmp_path).save({"1:1": entry})
+    assert not OutputManifest(tmp_path).is_current("1:1", entry)
+    (tmp_path / "gui.py").write_text("# generated")
+    assert not OutputManifest(tmp_path).is_current("1:1", entry)  # the asset folder was deleted
+    (tmp_path / "assets" / "frame0").mkdir(parents=True)
+    assert OutputManifest(tmp_path).is_current("1:1", entry)
+    assert not OutputManifest(tmp_path).is_current("1:1", frame_entry(frame("1:1", name="x"), "gui.py", "frame0"))
+
+
+def test_remove_stale_deletes_frames_no_longer_produced(tmp_path):
+    frames = {"1:1": frame_entry(frame("1:1"), "gui0.py", "frame0"),
+              "1:2": frame_entry(frame("1:2"), "gui1.py", "frame1")}
+    build(tmp_path, frames)
+    manifest = OutputManifest(tmp_path)
+    manifest.save(frames)
+    current = {"1:1": frames["1:1"]}
+    OutputManifest(tmp_path).remove_stale(current)
+    assert (tmp_path / "gui0.py").exists() and (tmp_path / "assets" / "frame0").is_dir()
+    assert not (tmp_path / "gui1.py").exists() and not (tmp_path / "assets" / "frame1").exists()
+
+
+def test_partial_run_keeps_the_other_frames(tmp_path):
+    frames = {"1:1": frame_entry(frame("1:1"), "gui_1-1.py", "frame_1-1"),
+              "1:2": frame_entry(frame("1:2"), "gui_1-2.py", "frame_1-2")}
+    build(tmp_path, frames)
+    OutputManifest(tmp_path).save(frames)
+
+    manifest = OutputManifest(tmp_path)
+    current = {"1:2": frame_entry(frame("1:2", name="edited"), "gui_1-2.py", "frame_1-2")}
+    merged = manifest.merged(current)
+    manifest.remove_stale(merged)
+    manifest.save(merged)
+
+    assert (tmp_path / "gui_1-1.py").exists() and (tmp_path / "assets" / "frame_1-1").is_dir()
+    assert OutputManifest(tmp_path).frames == {"1:1": frames["1:1"], "1:2": current["1:2"]}
+
+
+def test_merged_drops_frames_whose_files_were_overwritten(tmp_path):
+    manifest = OutputManifest(tmp_path)
+    manifest.save({"1:1": frame_entry(frame("1:1"), "gui.py", "frame0")})
+    current = {"1:2": frame_entry(frame("1:2"), "gui.py", "frame0")}
+    assert OutputManifest(tmp_path).merged(current) == current
+
+
+def test_unreadable_or_old_manifest_is_ignored(tmp_path):
+    (tmp_path / MANIFEST_NAME).write_text("{not json")
+    assert OutputManifest(tmp_path).frames == {}
+    (tmp_path / MANIFEST_NAME).write_text(json.dumps({"version": 0, "frames": {"1:1": {}}}))
+    assert OutputManifest(tmp_path).frames == {}
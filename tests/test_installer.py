@@ -0,0 +1,111 @@
+import json
+import zipfile
+
+import pytest
+
+import installer
+from installer import build_manifest, install, recover, stage_from_zip
+from updater import UpdateError
+
+
+@pytest.fixture(autouse=True)
+def update_dir(tmp_path, monkeypatch):
+    updates = tmp_path / "updates"
+    monkeypatch.setattr(installer, "UPDATE_DIR", updates)
+    monkeypatch.setattr(installer, "JOURNAL_PATH", updates / "install.json")
+    return updates
+
+
+def write_tree(root, files):
+    for relative, content in files.items():
+        path = root / relative
+        path.parent.mkdir(parents=True, exist_ok=True)
+        path.write_text(content)
+
+
+def release_zip(tmp_path, files, version="2.0.0", manifest=True):
+    source = tmp_path / f"release-{version}"
+    write_tree(source, files)
+    if manifest:
+        (source / "manifest.json").write_text(json.dumps(build_manifest(source, version)))
+    path = tmp_path / f"app-{version}.zip"
+    with zipfile.ZipFile(path, "w") as archive:
+        for file in source.rglob("*"):
+            if file.is_file():
+                archive.write(file, file.relative_to(source).as_posix())
+    return path
+
+
+@pytest.fixture
+def app(tmp_path):
+    root = tmp_path / "app"
+    write_tree(root, {"figma.py": "v1", "gui.py": "same", "old.py": "dropped",
+                      ".figma-converter/config.json": "{}"})
+    (root / "manifest.json").write_text(json.dumps(build_manifest(root, "1.0.0")))
+    return root
+
+
+def test_manifest_skips_user_data(app):
+    assert set(build_manifest(app, "1.0.0")["files"]) == {"figma.py", "gui.py", "old.py"}
+
+
+def test_only_changed_files_are_staged_and_swapped_in(tmp_path, app, update_dir):
+    zip_path = release_zip(tmp_path, {"figma.py": "v2", "gui.py": "same", "new/module.py": "new"})
+    staged = stage_from_zip(zip_path, app)
+    assert sorted(staged.files) == ["figma.py", "new/module.py"]
+    assert staged.deleted == ["old.py"]
+
+    install(staged, app)
+    assert (app / "figma.py").read_text() == "v2"
+    assert (app / "new" / "module.py").read_text() == "new"
+    assert not (app / "old.py").exists()
+    assert (app / ".figma-converter" / "config.json").exists()
+    assert json.loads((app / "manifest.json").read_text())["version"] == "2.0.0"
+    assert not (update_dir / "install.json").exists()
+    assert recover() is False
+
+
+def test_interrupted_install_is_rolled_back(tmp_path, app, monkeypatch):
+    staged = stage_from_zip(release_zip(tmp_path, {"figma.py": "v2", "gui.py": "same", "new.py": "new"}), app)
+    place = installer._place
+    calls = []
+
+    def crash(source, target):
+        calls.append(target)
+        if len(calls) == 2:
+            raise KeyboardInterrupt  # killed halfway through the swap
+        place(source, target)
+
+    monkeypatch.setattr(installer, "_place", crash)
+    with pytest.raises(KeyboardInterrupt):
+        install(staged, app)
+    monkeypatch.setattr(installer, "_place", place)
+
+    assert recover() is True
+    assert (app / "figma.py").read_text() == "v1"
+    assert (app / "old.py").read_text() == "dropped"
+    assert not (app / "new.py").exists()
+    assert json.loads((app / "manifest.json").read_text())["version"] == "1.0.0"
+
+
+def test_zip_escaping_the_app_is_refused(tmp_path, app):
+    path = tmp_path / "evil.zip"
+    with zipfile.ZipFile(path, "w") as archive:
+        archive.writestr("../outside.py", "x")
+    with pytest.raises(UpdateError):
+        stage_from_zip(path, app)
+    assert not (tmp_path / "outside.py").exists()
+
+
+def test_zip_with_a_wrong_checksum_is_refused(tmp_path, app):
+    source = tmp_path / "release"
+    write_tree(source, {"figma.py": "v2"})
+    manifest = build_manifest(source, "2.0.0")
+    manifest["files"]["figma.py"]["sha256"] = "0" * 64
+    path = tmp_path / "app.zip"
+    with zipfile.ZipFile(path, "w") as archive:
+        archive.writestr("figma.py", "v2")
+        archive.writestr("manifest.json", json.dumps(manifest))
+    with pytest.raises(UpdateError, match="figma.py"):
+        stage_from_zip(path, app)
+    assert (app / "figma.py").read_text() == "v1"
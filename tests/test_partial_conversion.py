@@ -0,0 +1,106 @@
+import json
+
+import pytest
+
+import engine
+
+
+URL = "https://www.figma.com/file/gen1000"
+
+
+def scripts(output):
+    return sorted(path.name for path in (output / "build").glob("gui*.py"))
+
+
+def test_node_id_conversion_fetches_only_the_selected_frame(tmp_path, fake_api, client_factory):
+    pages = client_factory().get_pages("gen1000", depth=2)
+    frame_id = pages[0]["children"][3]["id"]
+
+    result = engine.convert("t", f"{URL}?node-id={frame_id.replace(':', '-')}", tmp_path, client=client_factory())
+
+    assert result.frame_count == 1
+    assert scripts(tmp_path) == [f"gui_{engine.safe_node_id(frame_id)}.py"]
+    assert fake_api.api.requests["nodes"] == 1
+    assert fake_api.api.requests["files"] == 1  # only the depth=2 listing above
+
+
+def test_partial_conversion_keeps_the_other_frames(tmp_path, client_factory):
+    full = engine.convert("t", URL, tmp_path, client=client_factory())
+    before = scripts(tmp_path)
+    assert len(before) == full.frame_count == 20
+
+    frame_ids = [frame["id"] for frame in client_factory().get_pages("gen1000", depth=2)[0]["children"][:2]]
+    selection = ",".join(frame_id.replace(":", "-") for frame_id in frame_ids)
+    partial = engine.convert("t", f"{URL}?node-id={selection}", tmp_path, client=client_factory())
+
+    assert partial.frame_count == 2
+    assert partial.skipped == 2  # unchanged since the full conversion, and still under their old names
+    assert scripts(tmp_path) == before
+    manifest = json.loads((tmp_path / "build" / ".figma-manifest.json").read_text())
+    assert len(manifest["frames"]) == 20
+
+
+def test_selection_in_a_fresh_directory_is_named_after_the_frames(tmp_path, client_factory):
+    frame_ids = [frame["id"] for frame in client_factory().get_pages("gen1000", depth=2)[0]["children"][:2]]
+    selection = ",".join(frame_id.replace(":", "-") for frame_id in frame_ids)
+    engine.convert("t", f"{URL}?node-id={selection}", tmp_path, client=client_factory())
+    names = [f"gui_{engine.safe_node_id(frame_id)}.py" for frame_id in frame_ids]
+    assert scripts(tmp_path) == sorted(names)
+
+    # a later full conversion replaces the selection
+    full = engine.convert("t", URL, tmp_path, client=client_factory())
+    assert scripts(tmp_path) == sorted(f"gui{index}.py" for index in range(full.frame_count))
+
+
+def screen(frame_id, x):
+    return {"id": frame_id, "name": f"Screen {frame_id}", "type": "FRAME",
+            "absoluteBoundingBox": {"x": x, "y": 0.0, "width": 400.0, "height": 300.0}, "children": []}
+
+
+def single_frame_file(version, *frames):
+    return {"name": "Single", "version": version, "lastModified": "2024-01-01T00:00:00Z",
+            "document": {"id": "0:0", "type": "DOCUMENT",
+                         "children": [{"id": "0:1", "name": "Page 1", "type": "CANVAS", "children": list(frames)}]}}
+
+
+def test_partial_run_never_overwrites_the_gui_py_of_a_full_run(tmp_path, fake_api, client_factory):
+    url = "https://www.figma.com/file/single"
+    fake_api.api.add("single", single_frame_file("1", screen("1:1", 0.0)))
+    engine.convert("t", url, tmp_path, client=client_factory())
+    assert scripts(tmp_path) == ["gui.py"]
+    full_script = (tmp_path / "build" / "gui.py").read_text()
+
+    fake_api.api.add("single", single_frame_file("2", screen("1:1", 0.0), screen("1:2", 500.0)))
+    engine.convert("t", f"{url}?node-id=1-2", tmp_path, client=client_factory())
+
+    assert scripts(tmp_path) == ["gui.py", "gui_1-2.py"]
+    assert (tmp_path / "build" / "gui.py").read_text() == full_script
+    manifest = json.loads((tmp_path / "build" / ".figma-manifest.json").read_text())
+    assert {frame_id: entry["script"] for frame_id, entry in manifest["frames"].items()} == {
+        "1:1": "gui.py", "1:2": "gui_1-2.py"}
+
+
+def test_missing_node_is_an_error(tmp_path, client_factory):
+    with pytest.raises(engine.FigmaAPIError):
+        engine.convert("t", f"{URL}?node-id=9-999", tmp_path, client=client_factory())
+
+
+def test_output_name_depends_on_the_selection():
+    whole = engine.output_name(URL)
+    first = engine.output_name(f"{URL}?node-id=1-2")
+    second = engine.output_name(f"{URL}?node-id=1-3")
+    assert whole == "gen1000"
+    assert len({whole, first, second}) == 3
+    many = engine.output_name(f"{URL}?node-id=" + ",".join(f"1-{n}" for n in range(50)))
+    assert len(many) < 40
+
+
+def test_watched_selections_get_their_own_directory_and_state(tmp_path):
+    from batch import BatchJob
+    from watch import watched_files
+
+    jobs = [BatchJob(url=URL), BatchJob(url=f"{URL}?node-id=1-2"), BatchJob(url=f"{URL}?node-id=1-3")]
+    files = watched_files(jobs, str(tmp_path))
+    assert len({watched.output for watched in files}) == 3
+    assert len({watched.key for watched in files}) == 3
+    assert files[0].key == "gen1000"  # whole file state keeps its old key
@@ -0,0 +1,31 @@
+import json
+
+from profiles import ProfileStore
+
+
+def test_profiles_round_trip_and_migrate(tmp_path):
+    path = tmp_path / "config.json"
+    path.write_text(json.dumps({"token": "t", "url": "https://www.figma.com/file/abc", "theme": "dark"}))
+    store = ProfileStore(path)
+    assert store.get()["token"] == "t"
+    assert store.settings()["theme"] == "dark"
+    store.save("work", url="https://www.figma.com/file/xyz", token="w")
+    assert ProfileStore(path).find_by_url("https://www.figma.com/design/xyz/Name") == "work"
+
+
+def test_unreadable_store_is_set_aside_before_a_write(tmp_path, caplog):
+    path = tmp_path / "config.json"
+    broken = '{"profiles": {"default": {"token": "keep me"'
+    path.write_text(broken)
+    store = ProfileStore(path)
+    assert store.names() == []
+
+    store.save("new", token="t")
+    assert (tmp_path / "config.json.corrupt").read_text() == broken
+    assert ProfileStore(path).names() == ["new"]
+    assert "unreadable" in caplog.text
+
+    path.write_text("[]")  # valid JSON, but not a store
+    ProfileStore(path).save("other", token="t")
+    assert (tmp_path / "config.json.corrupt").read_text() == broken  # the first copy is kept
+    assert len(list(tmp_path.glob("config.json.*.corrupt"))) == 1
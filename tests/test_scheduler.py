@@ -0,0 +1,98 @@
+import time
+import threading
+
+from errors import ConversionCancelled, ConversionTimeout
+from scheduler import JobScheduler, CANCELLED, DONE, FAILED, RUNNING
+
+URL = "https://www.figma.com/file/AbC123"
+
+
+def wait_for(condition, timeout=5):
+    deadline = time.time() + timeout
+    while not condition():
+        assert time.time() < deadline, "timed out"
+        time.sleep(0.01)
+
+
+def test_timeout_is_a_failure():
+    def run_job(job):
+        raise ConversionTimeout("Conversion exceeded its 1s time limit")
+
+    scheduler = JobScheduler(run_job, workers=1)
+    job = scheduler.submit("t", URL, "out")
+    assert job.done_event.wait(5)
+    assert job.state == FAILED
+    assert "time limit" in job.error
+
+
+def test_cancelled_job_is_cancelled():
+    def run_job(job):
+        raise ConversionCancelled("Conversion cancelled")
+
+    job = JobScheduler(run_job, workers=1).submit("t", URL, "out")
+    assert job.done_event.wait(5)
+    assert job.state == CANCELLED
+
+
+def twin_scheduler(runs):
+    def run_job(job):
+        runs.append(job.id)
+        while not job.cancel.wait(0.01):
+            if job.options.get("release").is_set():
+                return None
+        raise ConversionCancelled("Conversion cancelled")
+
+    return JobScheduler(run_job, workers=2, resolve_version=lambda job: "v1")
+
+
+def test_waiter_shares_the_twin_result():
+    runs, release = [], threading.Event()
+    scheduler = twin_scheduler(runs)
+    first = scheduler.submit("t", URL, "out", release=release)
+    wait_for(lambda: first.state == RUNNING)
+    second = scheduler.submit("t", URL, "out", release=release)
+    wait_for(lambda: second.stage.startswith("waiting"))
+    release.set()
+    assert second.done_event.wait(5)
+    assert runs == [first.id]
+    assert second.state == DONE
+
+
+def test_waiter_converts_when_the_twin_is_cancelled():
+    runs, release = [], threading.Event()
+    scheduler = twin_scheduler(runs)
+    first = scheduler.submit("t", URL, "out", release=release)
+    wait_for(lambda: first.state == RUNNING)
+    second = scheduler.submit("t", URL, "out", release=release)
+    wait_for(lambda: second.stage.startswith("waiting"))
+    scheduler.cancel(first.id)
+    wait_for(lambda: runs == [first.id, second.id])
+    release.set()
+    assert second.done_event.wait(5)
+    assert first.state == CANCELLED
+    assert second.state == DONE
+
+
+def test_cancelled_waiter_stops_waiting():
+    runs, release = [], threading.Event()
+    scheduler = twin_scheduler(runs)
+    first = scheduler.submit("t", URL, "out", release=release)
+    wait_for(lambda: first.state == RUNNING)
+    second = scheduler.submit("t", URL, "out", release=release)
+    wait_for(lambda: second.stage.startswith("waiting"))
+    scheduler.cancel(second.id)
+    assert second.done_event.wait(5)
+    assert second.state == CANCELLED
+    release.set()
+    assert first.done_event.wait(5)
+    assert first.state == DONE and runs == [first.id]
+
+
+def test_different_selections_are_not_twins():
+    runs, release = [], threading.Event()
+    scheduler = twin_scheduler(runs)
+    first = scheduler.submit("t", f"{URL}?node-id=1-2", "out", release=release)
+    second = scheduler.submit("t", f"{URL}?node-id=1-3", "out", release=release)
+    wait_for(lambda: len(runs) == 2)
+    release.set()
+    assert first.done_event.wait(5) and second.done_event.wait(5)
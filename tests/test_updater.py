@@ -0,0 +1,59 @@
+import time
+import hashlib
+
+import pytest
+
+from updater import UpdateChecker, expected_sha256, file_sha256, pick_asset, ttl_from_env
+
+RELEASE = {"tag_name": "v1.2.0", "body": "", "html_url": "", "assets": []}
+
+
+@pytest.fixture
+def checker(tmp_path):
+    return UpdateChecker("owner/app", "1.0.0", cache_path=tmp_path / "update.json", ttl=60)
+
+
+def test_fresh_answer_is_served_without_a_request(checker, monkeypatch):
+    import builtins
+
+    real_import = builtins.__import__
+
+    def no_requests(name, *args, **kwargs):
+        if name == "requests":
+            raise AssertionError("the update check made a request")
+        return real_import(name, *args, **kwargs)
+
+    checker.save_cache({"checked": time.time(), "etag": '"abc"', "release": RELEASE})
+    monkeypatch.setattr(builtins, "__import__", no_requests)
+    assert checker.latest_release() == RELEASE
+
+
+def test_stale_or_foreign_cache_is_not_fresh(checker, tmp_path):
+    checker.save_cache({"checked": time.time() - 120, "release": RELEASE})
+    assert not checker.is_fresh()
+    checker.save_cache({"checked": time.time(), "release": RELEASE})
+    assert checker.is_fresh()
+    other = UpdateChecker("owner/other", "1.0.0", cache_path=tmp_path / "update.json", ttl=60)
+    assert other.load_cache() == {}
+
+
+def test_ttl_from_env(monkeypatch):
+    monkeypatch.setenv("FIGMA_UPDATE_TTL_HOURS", "0.5")
+    assert ttl_from_env() == 1800
+    monkeypatch.delenv("FIGMA_UPDATE_TTL_HOURS")
+    assert ttl_from_env(7) == 7
+
+
+def test_pick_asset_skips_checksums_and_the_manifest():
+    assets = [{"name": "manifest.json"}, {"name": "app.zip.sha256"}, {"name": "app.zip"}]
+    assert pick_asset(assets) == {"name": "app.zip"}
+    assert pick_asset(assets[:2]) is None
+
+
+def test_expected_sha256_from_the_github_digest(tmp_path):
+    path = tmp_path / "app.zip"
+    path.write_bytes(b"release")
+    digest = hashlib.sha256(b"release").hexdigest()
+    assert file_sha256(path) == digest
+    assert expected_sha256({"name": "app.zip", "digest": f"sha256:{digest.upper()}"}, []) == digest
+    assert expected_sha256({"name": "app.zip", "digest": None}, [{"name": "other.sha256"}]) is None
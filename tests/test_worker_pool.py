@@ -0,0 +1,59 @@
+import sys
+import time
+import threading
+import subprocess
+
+import pytest
+
+from errors import ConversionCancelled, ConversionTimeout
+from streaming import kill_process_tree
+from worker_pool import ConverterPool, WorkerError
+
+
+@pytest.fixture
+def pool(fake_api, monkeypatch):
+    monkeypatch.setenv("FIGMA_API_URL", fake_api.api_url)  # inherited by the spawned workers
+    pool = ConverterPool(size=1).start()
+    yield pool
+    pool.shutdown()
+
+
+def test_worker_streams_the_job_log(pool, tmp_path):
+    events = []
+    try:
+        for event in pool.stream("t", "https://www.figma.com/file/gen100", tmp_path, use_cache=False):
+            events.append(event)
+    except WorkerError:
+        pass  # without requests installed the worker fails after its first log lines
+    assert any(event.kind == "log" for event in events)
+
+
+def test_cancel_while_waiting_for_a_worker(pool, tmp_path):
+    busy = pool._idle.get()  # the only worker is taken by another job
+    cancel = threading.Event()
+    cancel.set()
+    start = time.monotonic()
+    try:
+        with pytest.raises(ConversionCancelled):
+            list(pool.stream("t", "https://www.figma.com/file/gen100", tmp_path, cancel=cancel))
+    finally:
+        pool._idle.put(busy)
+    assert time.monotonic() - start < 1
+
+
+def test_timeout_while_waiting_for_a_worker(pool, tmp_path):
+    busy = pool._idle.get()
+    try:
+        with pytest.raises(ConversionTimeout):
+            list(pool.stream("t", "https://www.figma.com/file/gen100", tmp_path, timeout=0.3))
+    finally:
+        pool._idle.put(busy)
+
+
+@pytest.mark.skipif(sys.platform == "win32", reason="process groups are POSIX only")
+def test_kill_process_tree_reaps_its_child():
+    process = subprocess.Popen(["sleep", "30"], start_new_session=True)
+    start = time.monotonic()
+    kill_process_tree(process.pid, process.poll)
+    assert time.monotonic() - start < 1
+    assert process.poll() is not None
@@ -0,0 +1,103 @@
+""" Thread-safe hand-off from worker threads to the Tk thread.
+    Worker threads only enqueue; the Tk thread drains everything on one after() tick,
+    inserting many log lines per widget update and keeping a bounded scrollback.
+"""
+import queue
+import logging
+
+from collections import deque
+from typing import Callable, Deque, Optional
+
+UI_TICK_MS = 50
+MAX_LOG_LINES = 5000  # scrollback kept in the output textbox
+
+
+class LogSink:
+    """Batched, bounded log writer for a CTkTextbox.
+    Args:
+            textbox: the output widget (only touched from the Tk thread in drain())
+            max_lines: lines kept in the ring buffer and in the widget
+    """
+
+    def __init__(self, textbox, max_lines: int = MAX_LOG_LINES):
+        self.textbox = textbox
+        self.max_lines = max_lines
+        self.lines: Deque[str] = deque(maxlen=max_lines)
+        self._pending: "queue.SimpleQueue" = queue.SimpleQueue()
+
+    def write(self, message, clear: bool = False) -> None:
+        """Queue a line from any thread."""
+        self._pending.put((str(message), clear))
+
+    def drain(self) -> None:
+        """Insert every queued line with a single widget update (Tk thread only)."""
+        if self.textbox is None:
+            return  # lines stay queued until the widget exists
+        batch = []
+        clear = False
+        while True:
+            try:
+                message, clear_before = self._pending.get_nowait()
+            except queue.Empty:
+                break
+            if clear_before:
+                batch, clear = [], True
+                self.lines.clear()
+            batch.append(message)
+        if not batch and not clear:
+            return
+        self.lines.extend(batch)
+
+        self.textbox.configure(state="normal")
+        if clear:
+            self.textbox.delete("0.0", "end")
+        if len(batch) >= self.max_lines:
+            # the batch alone fills the scrollback: redraw from the ring buffer
+            self.textbox.delete("0.0", "end")
+            self.textbox.insert("end", "\n".join(self.lines) + "\n")
+        else:
+            self.textbox.insert("end", "\n".join(batch) + "\n")
+            line_count = int(self.textbox.index("end-1c").split(".")[0]) - 1
+            if line_count > self.max_lines:
+                self.textbox.delete("1.0", f"{line_count - self.max_lines + 1}.0")
+        self.textbox.configure(state="disabled")
+        self.textbox.see("end")  # make sure to show the latest output
+
+
+class UIQueue:
+    """Runs callables queued from any thread on the Tk thread, together with a LogSink."""
+
+    def __init__(self, root, log_sink: Optional[LogSink] = None, tick_ms: int = UI_TICK_MS):
+        self.root = root
+        self.log_sink = log_sink
+        self.tick_ms = tick_ms
+        self._calls: "queue.SimpleQueue" = queue.SimpleQueue()
+        self._after_id = None
+
+    def call(self, func: Callable, *args) -> None:
+        """Schedule func(*args) on the Tk thread (safe from worker threads)."""
+        self._calls.put((func, args))
+
+    def start(self) -> None:
+        self._after_id = self.root.after(self.tick_ms, self._tick)
+
+    def stop(self) -> None:
+        if self._after_id is not None:
+            self.root.after_cancel(self._after_id)
+            self._after_id = None
+
+    def _tick(self) -> None:
+        try:
+            while True:
+                try:
+                    func, args = self._calls.get_nowait()
+                except queue.Empty:
+                    break
+                try:
+                    func(*args)
+                except Exception as e:
+                    logging.error(f"UI callback {getattr(func, '__name__', func)} failed: {e}")
+            if self.log_sink is not None:
+                self.log_sink.drain()
+        finally:
+            self._after_id = self.root.after(self.tick_ms, self._tick)
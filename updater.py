@@ -0,0 +1,258 @@
+""" Update checking and downloading.
+    Asks GitHub for the latest release with a single conditional request and caches the
+    answer in DATA_DIR, so launches within the TTL do no network work at all and the
+    revalidations after it are mostly free 304 answers. Release assets are downloaded
+    resumably and checked against their published sha256.
+"""
+import os
+import json
+import time
+import hashlib
+import logging
+import tempfile
+
+from pathlib import Path
+from typing import Dict, Optional
+
+from figma import DATA_DIR
+
+GITHUB_API_URL = "https://api.github.com/repos/"
+UPDATE_CACHE_PATH = DATA_DIR / "cache" / "update.json"
+DEFAULT_TTL = 6 * 60 * 60  # seconds a cached answer is used without asking GitHub
+REQUEST_TIMEOUT = 5
+UPDATE_DIR = DATA_DIR / "updates"  # downloads (and partial downloads) of release assets
+MIN_CHUNK = 64 * 1024
+MAX_CHUNK = 4 * 1024 * 1024
+CHUNK_SECONDS = 0.5  # chunk sizes adapt so one chunk takes about this long
+DOWNLOAD_ATTEMPTS = 6
+CHECKSUM_SUFFIXES = (".sha256", ".sha256sum")
+
+# release fields kept in the cache (the full answer is much larger)
+_ASSET_KEYS = ("name", "browser_download_url", "size", "digest", "content_type")
+
+
+class UpdateError(Exception):
+    """Raised when the update check fails and there is no cached answer to fall back on."""
+
+
+def ttl_from_env(default: float = DEFAULT_TTL) -> float:
+    """TTL in seconds from FIGMA_UPDATE_TTL_HOURS (0 revalidates on every check)."""
+    value = os.environ.get("FIGMA_UPDATE_TTL_HOURS")
+    return float(value) * 3600 if value else default
+
+
+def _release_summary(data: Dict) -> Dict:
+    return {
+        "tag_name": data.get("tag_name", ""),
+        "body": data.get("body") or "",
+        "html_url": data.get("html_url", ""),
+        "assets": [{key: asset.get(key) for key in _ASSET_KEYS} for asset in data.get("assets") or []],
+    }
+
+
+class UpdateChecker:
+    """Cached latest-release lookup for a GitHub repository.
+    Args:
+            repo: owner/name of the repository
+            current_version: version of the running application
+            cache_path: JSON file holding the last answer, its ETag and when it was checked
+            ttl: seconds the cached answer is trusted without revalidating
+    """
+
+    def __init__(self, repo: str, current_version: str, cache_path: Path = UPDATE_CACHE_PATH,
+                 ttl: Optional[float] = None, api_url: str = GITHUB_API_URL):
+        self.repo = repo
+        self.current_version = current_version
+        self.cache_path = Path(cache_path)
+        self.ttl = ttl_from_env() if ttl is None else ttl
+        self.api_url = api_url
+
+    def load_cache(self) -> Dict:
+        try:
+            cache = json.loads(self.cache_path.read_text())
+        except (OSError, ValueError):
+            return {}
+        return cache if cache.get("repo") == self.repo else {}
+
+    def save_cache(self, cache: Dict) -> None:
+        cache["repo"] = self.repo
+        self.cache_path.parent.mkdir(parents=True, exist_ok=True)
+        fd, tmp = tempfile.mkstemp(dir=self.cache_path.parent, suffix=".tmp")
+        with os.fdopen(fd, "w") as f:
+            json.dump(cache, f, indent=2)
+        os.replace(tmp, self.cache_path)
+
+    def is_fresh(self, cache: Optional[Dict] = None) -> bool:
+        """True while the cached answer is younger than the TTL (no request needed)."""
+        cache = self.load_cache() if cache is None else cache
+        return bool(cache) and time.time() - cache.get("checked", 0) < self.ttl
+
+    def latest_release(self, force: bool = False) -> Optional[Dict]:
+        """The latest release (tag_name, body, html_url, assets), None when there is none.
+        force skips the TTL but still revalidates with the cached ETag.
+        """
+        cache = self.load_cache()
+        if not force and self.is_fresh(cache):
+            logging.info("Update check: using the cached answer")
+            return cache.get("release")
+
+        import requests
+
+        headers = {"Accept": "application/vnd.github+json"}
+        if cache.get("etag"):
+            headers["If-None-Match"] = cache["etag"]
+        url = f"{self.api_url}{self.repo}/releases/latest"
+        try:
+            response = requests.get(url, headers=headers, timeout=REQUEST_TIMEOUT)
+        except requests.RequestException as e:
+            if cache:
+                logging.warning(f"Update check failed, using the cached answer: {e}")
+                return cache.get("release")
+            raise UpdateError(f"Network error checking for updates: {e}") from e
+
+        if response.status_code == 304:
+            # unchanged, and GitHub does not count it against the rate limit
+            cache["checked"] = time.time()
+        elif response.status_code == 200:
+            cache = {"checked": time.time(), "etag": response.headers.get("ETag"),
+                     "release": _release_summary(response.json())}
+        elif response.status_code == 404:
+            # no such repository or no release yet
+            cache = {"checked": time.time(), "etag": response.headers.get("ETag"), "release": None}
+        else:
+            if cache:
+                logging.warning(f"Update check answered {response.status_code}, using the cached answer")
+                return cache.get("release")
+            raise UpdateError(f"Failed to check releases: {response.status_code}")
+        self.save_cache(cache)
+        return cache.get("release")
+
+    def is_newer(self, release: Optional[Dict]) -> bool:
+        """True when release is a newer version than the running one."""
+        if not release:
+            return False
+        import semver
+
+        try:
+            return semver.compare(release["tag_name"].lstrip("v"), self.current_version) > 0
+        except ValueError:
+            logging.warning(f"Invalid version format in GitHub release: {release['tag_name']}")
+            return False
+
+
+def pick_asset(assets) -> Optional[Dict]:
+    """The downloadable asset of a release (checksum files and the update manifest are skipped)."""
+    return next((asset for asset in assets or []
+                 if not asset["name"].endswith(CHECKSUM_SUFFIXES) and asset["name"] != "manifest.json"), None)
+
+
+def expected_sha256(asset: Dict, assets) -> Optional[str]:
+    """Checksum of asset from its GitHub digest, or from a <name>.sha256 asset next to it."""
+    digest = asset.get("digest") or ""
+    if digest.startswith("sha256:"):
+        return digest.split(":", 1)[1].lower()
+    for other in assets or []:
+        if other["name"] in (asset["name"] + suffix for suffix in CHECKSUM_SUFFIXES):
+            import requests
+
+            response = requests.get(other["browser_download_url"], timeout=REQUEST_TIMEOUT)
+            response.raise_for_status()
+            return response.text.split()[0].lower()
+    return None
+
+
+def file_sha256(path: Path) -> str:
+    digest = hashlib.sha256()
+    with open(path, "rb") as f:
+        for block in iter(lambda: f.read(1024 * 1024), b""):
+            digest.update(block)
+    return digest.hexdigest()
+
+
+def download_asset(url: str, target: Path, sha256: Optional[str] = None, progress=None, cancel=None) -> Path:
+    """Download url to target, resuming a previous partial download with HTTP Range requests.
+    Chunk sizes adapt to the link speed, dropped connections are retried from where they stopped
+    and the finished file is checked against sha256 when it is known.
+    Args:
+            progress: called with (downloaded, total) bytes, total is 0 when unknown
+            cancel: threading.Event, stops the download (the partial file is kept for later)
+    """
+    import requests
+
+    target = Path(target)
+    target.parent.mkdir(parents=True, exist_ok=True)
+    partial = target.with_name(target.name + ".part")
+    meta_path = target.with_name(target.name + ".part.json")
+    try:
+        meta = json.loads(meta_path.read_text())
+    except (OSError, ValueError):
+        meta = {}
+    if meta.get("url") != url or not partial.exists():
+        partial.unlink(missing_ok=True)
+        meta = {"url": url}
+
+    chunk = MIN_CHUNK
+    attempt = 0
+    while True:
+        offset = partial.stat().st_size if partial.exists() else 0
+        downloaded = offset
+        headers = {}
+        if offset:
+            headers["Range"] = f"bytes={offset}-"
+            if meta.get("validator"):
+                headers["If-Range"] = meta["validator"]  # full answer if the file changed meanwhile
+        try:
+            with requests.get(url, headers=headers, stream=True, timeout=(10, 60)) as response:
+                if response.status_code == 416 and offset:
+                    break  # nothing left to download
+                response.raise_for_status()
+                if response.status_code != 206:
+                    downloaded = offset = 0  # the server sent the whole file
+                meta["validator"] = response.headers.get("ETag") or response.headers.get("Last-Modified")
+                meta_path.write_text(json.dumps(meta))
+                length = int(response.headers.get("Content-Length") or 0)
+                total = offset + length if length else 0
+                with open(partial, "ab" if offset else "wb") as f:
+                    while True:
+                        if cancel is not None and cancel.is_set():
+                            raise UpdateError("Download cancelled")
+                        started = time.monotonic()
+                        data = response.raw.read(chunk, decode_content=True)
+                        if not data:
+                            break
+                        f.write(data)
+                        downloaded += len(data)
+                        elapsed = time.monotonic() - started
+                        if elapsed < CHUNK_SECONDS / 2:
+                            chunk = min(chunk * 2, MAX_CHUNK)
+                        elif elapsed > CHUNK_SECONDS * 2:
+                            chunk = max(chunk // 2, MIN_CHUNK)
+                        if progress is not None:
+                            progress(downloaded, total)
+                if total and downloaded < total:
+                    raise requests.ConnectionError(f"Connection closed after {downloaded} of {total} bytes")
+            break
+        except (requests.RequestException, OSError) as e:
+            # only connections that fail without making progress count towards the limit
+            attempt = 1 if downloaded > offset else attempt + 1
+            if attempt >= DOWNLOAD_ATTEMPTS:
+                raise UpdateError(f"Download failed after {attempt} attempts: {e}") from e
+            wait = min(2 ** attempt, 30)
+            logging.warning(f"Download interrupted ({e}), resuming in {wait}s")
+            if cancel is None:
+                time.sleep(wait)
+            elif cancel.wait(wait):
+                raise UpdateError("Download cancelled")
+
+    if sha256:
+        actual = file_sha256(partial)
+        if actual != sha256:
+            partial.unlink(missing_ok=True)
+            meta_path.unlink(missing_ok=True)
+            raise UpdateError(f"Checksum mismatch for {target.name}: expected {sha256}, got {actual}")
+        logging.info(f"Verified sha256 of {target.name}")
+    else:
+        logging.warning(f"No checksum published for {target.name}, it was not verified")
+    os.replace(partial, target)
+    meta_path.unlink(missing_ok=True)
+    return target
@@ -0,0 +1,184 @@
+""" Watch mode.
+    Polls the metadata of a list of Figma files with conditional requests and converts a file
+    into its stable output directory whenever its version changes. Files that stay unchanged
+    are polled less and less often, errors and rate limits back off further.
+"""
+import os
+import json
+import time
+import random
+import logging
+import tempfile
+import threading
+
+from dataclasses import dataclass, field
+from pathlib import Path
+from typing import Dict, List, Optional
+
+from batch import _flag
+from engine import FigmaClient, extract_file_id, output_name
+from figma import converter, create_path, get_history, get_metrics, DATA_DIR
+from scheduler import JobScheduler, ConversionJob, DONE
+
+MIN_INTERVAL = 10  # seconds between polls right after a change
+MAX_INTERVAL = 60  # unchanged files are never polled less often than this
+BACKOFF = 1.5  # interval growth per unchanged poll
+MAX_ERROR_INTERVAL = 10 * 60  # longest wait after failed polls
+STATE_PATH = DATA_DIR / "watch.json"  # last converted version of every watched file
+
+
+@dataclass
+class WatchedFile:
+    """A watched Figma file and its polling state."""
+    url: str
+    output: Path
+    options: Dict = field(default_factory=dict)
+    version: Optional[str] = None  # last version converted (or being converted)
+    validators: Dict = field(default_factory=dict)  # ETag / Last-Modified of the last answer
+    interval: float = MIN_INTERVAL
+    next_check: float = 0.0
+    errors: int = 0  # failed polls in a row
+    failures: int = 0  # failed conversions in a row
+
+    @property
+    def file_id(self) -> str:
+        return extract_file_id(self.url)
+
+    @property
+    def key(self) -> str:
+        """The file id, with the selected nodes of a partial conversion (its state and directory name)."""
+        return output_name(self.url)
+
+
+class Watcher:
+    """Polls watched files and queues a conversion whenever one changes.
+    Args:
+            token: Figma token used for polling and converting
+            files: the WatchedFile entries to follow
+            min_interval / max_interval: bounds of the adaptive polling interval
+            workers: conversions that may run at the same time
+    """
+
+    def __init__(self, token: str, files: List[WatchedFile], min_interval: float = MIN_INTERVAL,
+                 max_interval: float = MAX_INTERVAL, workers: int = 1, state_path: Path = STATE_PATH):
+        self.token = token
+        self.files = files
+        self.min_interval = min_interval
+        self.max_interval = max(max_interval, min_interval)
+        self.state_path = Path(state_path)
+        self.client = FigmaClient(token)
+        self._pending: Dict[int, tuple] = {}  # job id -> (watched file, previous version)
+        self._lock = threading.Lock()
+        self.scheduler = JobScheduler(self.run_job, workers=workers, on_change=self.job_changed,
+                                      history=get_history(), metrics=get_metrics())
+        state = self.load_state()
+        for watched in files:
+            watched.version = state.get(watched.key)
+            watched.interval = min_interval
+
+    def load_state(self) -> Dict[str, str]:
+        try:
+            return json.loads(self.state_path.read_text())
+        except (OSError, ValueError):
+            return {}
+
+    def save_version(self, key: str, version: str) -> None:
+        with self._lock:
+            state = self.load_state()
+            state[key] = version
+            self.state_path.parent.mkdir(parents=True, exist_ok=True)
+            fd, tmp = tempfile.mkstemp(dir=self.state_path.parent, suffix=".tmp")
+            with os.fdopen(fd, "w") as f:
+                json.dump(state, f, indent=2)
+            os.replace(tmp, self.state_path)
+
+    def run_job(self, job: ConversionJob):
+        return converter(job.token, job.file_url, job.output_path, **job.options)
+
+    def job_changed(self, job: ConversionJob) -> None:
+        if job.active:
+            return
+        with self._lock:
+            watched, previous = self._pending.pop(job.id, (None, None))
+        if watched is None:
+            return
+        if job.state == DONE:
+            logging.info(f"Converted {watched.file_id} version {job.version} into {watched.output}")
+            watched.failures = 0
+            self.save_version(watched.key, job.version)
+        else:
+            # convert again on a later poll, waiting longer after every failure
+            watched.failures += 1
+            watched.version = previous
+            watched.validators.clear()  # a 304 would hide the change
+            delay = min(self.min_interval * 2 ** watched.failures, MAX_ERROR_INTERVAL)
+            watched.next_check = max(watched.next_check, time.monotonic() + delay)
+            logging.error(f"Conversion of {watched.file_id} {job.state}, retrying in {delay:.0f}s: {job.error}")
+
+    def poll(self, watched: WatchedFile) -> bool:
+        """Check one file and queue its conversion when the version changed; True on a change."""
+        meta = self.client.get_file_meta_if_changed(watched.file_id, watched.validators)
+        if meta is None or meta.get("version") == watched.version:
+            return False
+        logging.info(f"{meta.get('name') or watched.file_id} changed to version {meta.get('version')}")
+        previous, watched.version = watched.version, meta.get("version")
+        with self._lock:  # job_changed() waits until the job is registered
+            job = self.scheduler.submit(self.token, watched.url, watched.output, **watched.options)
+            job.version = watched.version
+            self._pending[job.id] = (watched, previous)
+        return True
+
+    def schedule(self, watched: WatchedFile, changed: bool = False, error: Optional[Exception] = None) -> None:
+        """Pick the next poll time: reset after a change, grow while unchanged, back off on errors."""
+        if error is not None:
+            watched.errors += 1
+            retry_after = getattr(error, "retry_after", None) or 0
+            watched.interval = min(max(watched.interval * 2, retry_after), MAX_ERROR_INTERVAL)
+        else:
+            watched.errors = 0
+            if changed:
+                watched.interval = min(self.min_interval * 2 ** watched.failures, MAX_ERROR_INTERVAL)
+            else:
+                watched.interval = min(watched.interval * BACKOFF, self.max_interval)
+        # jitter so many watched files do not poll in lockstep
+        watched.next_check = time.monotonic() + watched.interval * random.uniform(0.9, 1.1)
+
+    def run(self, stop: Optional[threading.Event] = None) -> None:
+        """Poll until stop is set (or forever)."""
+        stop = stop or threading.Event()
+        logging.info(f"Watching {len(self.files)} file(s), polling every {self.min_interval:g}-{self.max_interval:g}s")
+        while not stop.is_set():
+            now = time.monotonic()
+            for watched in self.files:
+                if watched.next_check > now:
+                    continue
+                try:
+                    self.schedule(watched, changed=self.poll(watched))
+                except Exception as e:
+                    # api errors, rate limits and connection errors of the HTTP session
+                    self.schedule(watched, error=e)
+                    logging.warning(f"Polling {watched.file_id} failed, next try in {watched.interval:.0f}s: {e}")
+            wait = min(watched.next_check for watched in self.files) - time.monotonic()
+            stop.wait(max(wait, 0.1))
+
+
+def watched_files(jobs, output: Optional[str] = None) -> List[WatchedFile]:
+    """WatchedFile entries for batch.BatchJob entries, each with a stable output directory."""
+    files = []
+    for job in jobs:
+        if job.output:
+            target = Path(job.output)
+        elif output and len(jobs) == 1:
+            target = Path(output)
+        elif output:
+            target = Path(output) / output_name(job.url)
+        else:
+            target = create_path(f"watch/{output_name(job.url)}")
+        options = {
+            "engine": job.options.get("engine", "native"),
+            "use_cache": _flag(job.options, "use_cache", True),
+            "refresh": _flag(job.options, "refresh", False),
+            "incremental": _flag(job.options, "incremental", True),
+        }
+        files.append(WatchedFile(job.url, target, options))
+    return files
@@ -0,0 +1,349 @@
+""" Prewarmed converter worker pool.
+    Long lived worker processes import the conversion code and open the HTTP session once,
+    then take conversion jobs over a pipe instead of launching `tkdesigner` cold every time.
+"""
+import os
+import sys
+import time
+import queue
+import atexit
+import logging
+import threading
+import multiprocessing
+
+from typing import Optional
+
+from errors import ConversionCancelled, ConversionTimeout
+from streaming import (
+    ConversionEvent, JobFinished, drain_events, kill_process_tree, JOB_TIMEOUT, IDLE_TIMEOUT, POLL_INTERVAL,
+)
+
+DEFAULT_POOL_SIZE = 2
+DEFAULT_MAX_JOBS = 50  # recycle a worker after this many jobs
+DEFAULT_MAX_RSS_MB = 512  # recycle a worker once its memory grows past this
+HEALTH_CHECK_INTERVAL = 30
+PING_TIMEOUT = 5
+
+
+class WorkerError(Exception):
+    """Raised when a worker dies or does not answer in time."""
+
+
+def current_rss_mb() -> float:
+    """Resident set size of the current process in MB (0 if unknown)."""
+    try:
+        with open("/proc/self/status") as f:
+            for line in f:
+                if line.startswith("VmRSS:"):
+                    return int(line.split()[1]) / 1024
+    except OSError:
+        pass
+    try:
+        import resource
+        peak = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+        return peak / (1024 * 1024) if sys.platform == "darwin" else peak / 1024
+    except ImportError:
+        return 0.0
+
+
+class _PipeLogHandler(logging.Handler):
+    """Sends the log records of a running job to the parent as log events."""
+
+    def __init__(self, send):
+        super().__init__(logging.INFO)
+        self.send = send
+
+    def emit(self, record):
+        try:
+            self.send(("event", ConversionEvent("log", message=record.getMessage())))
+        except OSError:
+            pass
+
+
+def _worker_main(conn, engine_name: str) -> None:
+    """Worker loop: prewarm the imports and the session, then serve jobs until told to stop."""
+    if hasattr(os, "setsid"):
+        os.setsid()  # lead a process group so a cancel kills the worker and its children
+    # a spawned worker never runs init_app(): without this its root logger stays at WARNING
+    # and _PipeLogHandler gets none of the job's INFO records
+    logging.getLogger().setLevel(logging.INFO)
+    import engine
+    from figma import converter
+    designer = None
+    if engine_name == "tkdesigner":
+        try:
+            from tkdesigner.designer import Designer as designer
+        except ImportError:
+            designer = None
+    try:
+        # open the keep-alive connection now so the first job skips the TLS handshake
+        engine.get_session().head(os.environ.get("FIGMA_API_URL") or engine.FIGMA_API_URL, timeout=5)
+    except Exception:
+        pass
+
+    while True:
+        try:
+            message = conn.recv()
+        except (EOFError, OSError):
+            break
+        command = message[0]
+        if command == "stop":
+            break
+        if command == "ping":
+            conn.send(("pong", current_rss_mb()))
+            continue
+        if command == "convert":
+            _, token, file_url, output_path, options = message
+            send_lock = threading.Lock()  # downloads log from several threads
+
+            def send(item):
+                with send_lock:
+                    conn.send(item)
+
+            def progress(stage, done, total):
+                send(("event", ConversionEvent("progress", stage=stage, done=done, total=total)))
+
+            handler = _PipeLogHandler(send)
+            logging.getLogger().addHandler(handler)
+            try:
+                if engine_name == "tkdesigner" and designer is not None:
+                    start = time.perf_counter()
+                    designer(token, engine.extract_file_id(file_url), output_path).design()
+                    result = engine.ConversionResult(
+                        file_id=engine.extract_file_id(file_url),
+                        output_path=output_path,
+                        duration=time.perf_counter() - start,
+                    )
+                else:
+                    result = converter(
+                        token, file_url, output_path, engine=engine_name, progress=progress, **options
+                    )
+                send(("ok", result, current_rss_mb()))
+            except Exception as e:
+                send(("error", f"{type(e).__name__}: {e}", current_rss_mb()))
+            finally:
+                logging.getLogger().removeHandler(handler)
+    conn.close()
+
+
+class Worker:
+    """Handle on one worker process and its end of the pipe."""
+
+    def __init__(self, context, engine_name: str):
+        self.conn, child_conn = context.Pipe()
+        self.process = context.Process(
+            target=_worker_main, args=(child_conn, engine_name), daemon=True
+        )
+        self.process.start()
+        child_conn.close()
+        self.jobs = 0
+        self.rss_mb = 0.0
+
+    def is_alive(self) -> bool:
+        return self.process.is_alive()
+
+    def request(self, message, timeout: Optional[float] = None):
+        self.conn.send(message)
+        if not self.conn.poll(timeout):
+            raise WorkerError(f"Worker {self.process.pid} did not answer within {timeout}s")
+        try:
+            return self.conn.recv()
+        except EOFError:
+            raise WorkerError(f"Worker {self.process.pid} exited while running a job")
+
+    def ping(self) -> bool:
+        try:
+            reply = self.request(("ping",), PING_TIMEOUT)
+            self.rss_mb = reply[1]
+            return reply[0] == "pong"
+        except (WorkerError, OSError):
+            return False
+
+    def stop(self) -> None:
+        try:
+            self.conn.send(("stop",))
+        except OSError:
+            pass
+        self.process.join(timeout=2)
+        if self.process.is_alive():
+            self.process.kill()
+        self.conn.close()
+
+
+class ConverterPool:
+    """Pool of prewarmed conversion workers.
+    Args:
+            size: number of worker processes
+            max_jobs: recycle a worker after this many jobs
+            max_rss_mb: recycle a worker once its RSS grows past this
+            engine: "native" or "tkdesigner", the conversion code the workers import
+    """
+
+    def __init__(self, size=DEFAULT_POOL_SIZE, max_jobs=DEFAULT_MAX_JOBS,
+                 max_rss_mb=DEFAULT_MAX_RSS_MB, engine="native",
+                 health_interval=HEALTH_CHECK_INTERVAL):
+        self.size = max(1, int(size))
+        self.max_jobs = max_jobs
+        self.max_rss_mb = max_rss_mb
+        self.engine = engine
+        self.health_interval = health_interval
+        # spawn keeps the workers independent of the threads (and Tk) of the parent
+        self._context = multiprocessing.get_context("spawn")
+        self._idle: "queue.Queue[Worker]" = queue.Queue()
+        self._lock = threading.Lock()
+        self._stopped = threading.Event()
+        self._started = False
+
+    def start(self) -> "ConverterPool":
+        """Spawn the workers and the health check thread."""
+        with self._lock:
+            if self._started:
+                return self
+            for _ in range(self.size):
+                self._idle.put(Worker(self._context, self.engine))
+            self._started = True
+        threading.Thread(target=self._health_loop, daemon=True).start()
+        logging.info(f"Started converter pool with {self.size} worker(s)")
+        return self
+
+    def convert(self, token, file_url, output_path, timeout: Optional[float] = None, **options):
+        """Run a conversion on an idle worker and return its ConversionResult.
+        Extra options (use_cache, refresh, ...) are passed on to figma.converter in the worker.
+        """
+        result = None
+        for event in self.stream(token, file_url, output_path, timeout=timeout, idle_timeout=None, **options):
+            if event.kind == "result":
+                result = event.result
+        return result
+
+    def stream(self, token, file_url, output_path, cancel=None, timeout: Optional[float] = JOB_TIMEOUT,
+               idle_timeout: Optional[float] = IDLE_TIMEOUT, **options):
+        """Run a conversion on an idle worker, yielding its log and progress events as they arrive.
+        Cancelling or timing out kills the worker's process tree and a fresh worker takes its place.
+        """
+        if not self._started:
+            self.start()
+        waited = time.monotonic()
+        worker = self._acquire(cancel, timeout)
+        if timeout:
+            timeout = max(timeout - (time.monotonic() - waited), POLL_INTERVAL)  # the wait counts too
+        events: "queue.Queue" = queue.Queue()
+        state = {"finished": False, "aborted": False}
+
+        def read_replies():
+            while True:
+                try:
+                    reply = worker.conn.recv()
+                except (EOFError, OSError):
+                    if not state["aborted"]:
+                        events.put(JobFinished(error=WorkerError(f"Worker {worker.process.pid} exited while running a job")))
+                    return
+                if reply[0] == "event":
+                    events.put(reply[1])
+                    continue
+                worker.jobs += 1
+                worker.rss_mb = reply[-1]
+                state["finished"] = True
+                events.put(JobFinished(result=reply[1]) if reply[0] == "ok" else JobFinished(error=WorkerError(reply[1])))
+                return
+
+        def abort():
+            state["aborted"] = True
+            kill_process_tree(worker.process.pid, lambda: worker.process.join(0))
+
+        try:
+            worker.conn.send(("convert", token, file_url, str(output_path), options))
+            threading.Thread(target=read_replies, daemon=True).start()
+            yield from drain_events(events, cancel, abort, timeout, idle_timeout)
+        finally:
+            if state["finished"] and worker.is_alive():
+                self._release(worker)
+            else:
+                # cancelled, timed out, crashed or abandoned by the caller mid-job
+                if worker.is_alive():
+                    kill_process_tree(worker.process.pid, lambda: worker.process.join(0))
+                self._replace(worker)
+
+    def _acquire(self, cancel=None, timeout: Optional[float] = None) -> Worker:
+        """Wait for an idle worker, raising ConversionCancelled or ConversionTimeout while waiting."""
+        start = time.monotonic()
+        while True:
+            if cancel is not None and cancel.is_set():
+                raise ConversionCancelled("Conversion cancelled")
+            if timeout and time.monotonic() - start > timeout:
+                raise ConversionTimeout(f"Conversion exceeded its {timeout:g}s time limit waiting for a worker")
+            try:
+                return self._idle.get(timeout=POLL_INTERVAL)
+            except queue.Empty:
+                continue
+
+    def _replace(self, worker: Worker) -> None:
+        """Stop a broken worker and start a fresh one in its place."""
+        worker.stop()
+        if not self._stopped.is_set():
+            self._idle.put(Worker(self._context, self.engine))
+
+    def _release(self, worker: Worker) -> None:
+        """Give a worker back to the pool, recycling it when it is worn out."""
+        if self._stopped.is_set():
+            worker.stop()
+            return
+        if worker.jobs >= self.max_jobs or worker.rss_mb >= self.max_rss_mb:
+            logging.info(
+                f"Recycling worker {worker.process.pid} after {worker.jobs} job(s), {worker.rss_mb:.0f} MB RSS"
+            )
+            worker.stop()
+            worker = Worker(self._context, self.engine)
+        self._idle.put(worker)
+
+    def health_check(self) -> dict:
+        """Ping every idle worker and replace the ones that do not answer."""
+        checked, replaced = 0, 0
+        for _ in range(self._idle.qsize()):
+            try:
+                worker = self._idle.get_nowait()
+            except queue.Empty:
+                break
+            checked += 1
+            if not worker.is_alive() or not worker.ping():
+                logging.warning(f"Worker {worker.process.pid} failed its health check, replacing it")
+                self._replace(worker)
+                replaced += 1
+                continue
+            self._release(worker)
+        return {"size": self.size, "idle": self._idle.qsize(), "checked": checked, "replaced": replaced}
+
+    def _health_loop(self) -> None:
+        while not self._stopped.wait(self.health_interval):
+            try:
+                self.health_check()
+            except Exception as e:
+                logging.error(f"Converter pool health check failed: {e}")
+
+    def shutdown(self) -> None:
+        """Stop every idle worker; busy workers are stopped when their job returns."""
+        self._stopped.set()
+        while True:
+            try:
+                self._idle.get_nowait().stop()
+            except queue.Empty:
+                break
+
+
+_default_pool: Optional[ConverterPool] = None
+_default_lock = threading.Lock()
+
+
+def get_default_pool(**options) -> ConverterPool:
+    """Return the shared, started pool of this process.
+    Options default to the FIGMA_POOL_SIZE, FIGMA_POOL_MAX_JOBS and FIGMA_POOL_MAX_RSS_MB env vars.
+    """
+    global _default_pool
+    with _default_lock:
+        if _default_pool is None:
+            options.setdefault("size", int(os.environ.get("FIGMA_POOL_SIZE", DEFAULT_POOL_SIZE)))
+            options.setdefault("max_jobs", int(os.environ.get("FIGMA_POOL_MAX_JOBS", DEFAULT_MAX_JOBS)))
+            options.setdefault("max_rss_mb", float(os.environ.get("FIGMA_POOL_MAX_RSS_MB", DEFAULT_MAX_RSS_MB)))
+            _default_pool = ConverterPool(**options).start()
+            atexit.register(_default_pool.shutdown)
+        return _default_pool